@@ -1,11 +1,36 @@
+from .fake_carla import install_from_environment
+
+# Has to replace carla before any module below imports it
+install_from_environment()
+
 from .config import *
 from .carla_utils import *
 from .sensor_manager import *
 from .lane_predictor import *
+from .frame_sync import *
+from .shared_display import *
+from .radar_processing import *
+from .lidar_processing import *
+from .world_state import *
+from .dataset import *
+from .lane_models import *
+from .tracing import *
+from .telemetry import *
+from .lane_index import *
 
 __all__ = [
     "config",
     "carla_utils",
     "sensor_manager",
     "lane_predictor",
+    "frame_sync",
+    "shared_display",
+    "radar_processing",
+    "lidar_processing",
+    "world_state",
+    "dataset",
+    "lane_models",
+    "tracing",
+    "telemetry",
+    "lane_index",
 ]
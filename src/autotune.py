@@ -0,0 +1,380 @@
+"""Offline performance auto-tuner for simulation and sensor settings.
+
+This script sweeps a declared search space of simulation, sensor and model
+settings against a running CARLA server, measures loop throughput and
+per-stage latency for every combination, and writes the fastest profile
+that still satisfies the quality constraint to a JSON file.
+
+Setting CARLA_FAKE_SERVER=1 (or overrides such as "step_seconds=0.02") tunes
+against the in-process fake server, to exercise the search without a GPU:
+
+    CARLA_FAKE_SERVER=1 python -m src.autotune --out /tmp/profile.json
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+import numpy as np
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import carla
+
+from .config import (
+    DEFAULT_CARLA_HOST,
+    DEFAULT_CARLA_PORT,
+    CARLA_TIMEOUT_SECONDS,
+    DEFAULT_SIMULATION_SETTINGS,
+    DEFAULT_CAMERA_CONFIG,
+    DEFAULT_MODEL_CONFIG,
+    DEFAULT_GRID_SIZE,
+    DEFAULT_WINDOW_WIDTH,
+    DEFAULT_WINDOW_HEIGHT,
+    LIDAR_POINTS_PER_SECOND,
+    SENSOR_TYPE_LIDAR,
+    CameraConfig,
+    ModelConfig,
+    SimulationSettings,
+)
+from .carla_utils import (
+    create_client,
+    is_fake_server,
+    spawn_vehicle,
+    to_world_settings,
+    destroy_actor,
+    restore_world_settings,
+)
+from .frame_sync import FrameSynchronizer, attach_camera
+from .lane_predictor import ImagePreprocessor
+from .sensor_manager import (
+    DisplayManager,
+    get_default_sensor_configs,
+    spawn_sensors_from_configs,
+)
+
+
+AUTOTUNE_STAGES = ["tick", "frame_wait", "preprocess", "render"]
+DEFAULT_AUTOTUNE_TICKS = 100
+DEFAULT_AUTOTUNE_WARMUP_TICKS = 10
+DEFAULT_PROFILE_PATH = "autotune_profile.json"
+
+
+@dataclass
+class SearchSpace:
+    camera_resolutions: List[Tuple[int, int]] = field(
+        default_factory=lambda: [
+            (DEFAULT_CAMERA_CONFIG.image_size_x, DEFAULT_CAMERA_CONFIG.image_size_y),
+            (384, 192),
+            (256, 128),
+        ]
+    )
+    lidar_points_per_second: List[int] = field(
+        default_factory=lambda: [LIDAR_POINTS_PER_SECOND, 100000, 50000]
+    )
+    fixed_delta_seconds: List[float] = field(
+        default_factory=lambda: [DEFAULT_SIMULATION_SETTINGS.fixed_delta_seconds, 0.1]
+    )
+    model_resolutions: List[Tuple[int, int]] = field(
+        default_factory=lambda: [
+            (DEFAULT_MODEL_CONFIG.image_width, DEFAULT_MODEL_CONFIG.image_height),
+            (512, 256),
+            (320, 180),
+        ]
+    )
+    grid_sizes: List[List[int]] = field(default_factory=lambda: [DEFAULT_GRID_SIZE, [2, 2]])
+
+
+@dataclass
+class QualityConstraint:
+    min_camera_width: int = 0
+    min_camera_height: int = 0
+    min_model_width: int = 0
+    min_model_height: int = 0
+    max_fixed_delta_seconds: float = 1.0
+
+    def allows(self, candidate: "Candidate") -> bool:
+        return (
+            candidate.camera.image_size_x >= self.min_camera_width
+            and candidate.camera.image_size_y >= self.min_camera_height
+            and candidate.model.image_width >= self.min_model_width
+            and candidate.model.image_height >= self.min_model_height
+            and candidate.simulation.fixed_delta_seconds <= self.max_fixed_delta_seconds
+        )
+
+
+@dataclass
+class Candidate:
+    simulation: SimulationSettings
+    camera: CameraConfig
+    model: ModelConfig
+    lidar_points_per_second: int
+    grid_size: List[int]
+
+
+@dataclass
+class CandidateResult:
+    candidate: Candidate
+    ticks_per_second: float
+    stage_ms: Dict[str, float]
+
+    @property
+    def simulated_seconds_per_second(self) -> float:
+        # Comparable across fixed_delta_seconds, unlike ticks per second
+        return self.ticks_per_second * self.candidate.simulation.fixed_delta_seconds
+
+
+def expand_search_space(space: SearchSpace) -> List[Candidate]:
+    candidates = []
+    for camera_res, lidar_pps, delta, model_res, grid_size in itertools.product(
+        space.camera_resolutions,
+        space.lidar_points_per_second,
+        space.fixed_delta_seconds,
+        space.model_resolutions,
+        space.grid_sizes,
+    ):
+        candidates.append(
+            Candidate(
+                simulation=replace(DEFAULT_SIMULATION_SETTINGS, fixed_delta_seconds=delta),
+                camera=replace(DEFAULT_CAMERA_CONFIG, image_size_x=camera_res[0], image_size_y=camera_res[1]),
+                model=replace(DEFAULT_MODEL_CONFIG, image_width=model_res[0], image_height=model_res[1]),
+                lidar_points_per_second=lidar_pps,
+                grid_size=list(grid_size),
+            )
+        )
+    return candidates
+
+
+def measure_candidate(
+    client: carla.Client,
+    candidate: Candidate,
+    ticks: int = DEFAULT_AUTOTUNE_TICKS,
+    warmup_ticks: int = DEFAULT_AUTOTUNE_WARMUP_TICKS,
+) -> CandidateResult:
+    """Run one candidate for a number of synchronous ticks and time each stage.
+
+    Args:
+        client: CARLA client instance.
+        candidate: Settings to measure.
+        ticks: Measured ticks.
+        warmup_ticks: Ticks run before measuring.
+
+    Returns:
+        Loop throughput and mean per-stage latency in milliseconds.
+    """
+    world = client.get_world()
+    original_settings = world.get_settings()
+    vehicle = None
+    camera = None
+    display_manager = None
+
+    try:
+        world.apply_settings(to_world_settings(world, candidate.simulation))
+
+        vehicle = spawn_vehicle(world, autopilot=False)
+        camera, frame_buffer = attach_camera(world, vehicle, candidate.camera)
+        synchronizer = FrameSynchronizer(frame_buffer)
+        preprocessor = ImagePreprocessor(candidate.model)
+
+        display_manager = DisplayManager(
+            grid_size=candidate.grid_size,
+            window_size=[DEFAULT_WINDOW_WIDTH, DEFAULT_WINDOW_HEIGHT],
+            headless=True,
+        )
+        # Smaller grids show fewer sensors, so the ones without a cell are left out
+        sensor_configs = [
+            config
+            for config in get_default_sensor_configs()
+            if config.display_pos[0] < candidate.grid_size[0] and config.display_pos[1] < candidate.grid_size[1]
+        ]
+        for config in sensor_configs:
+            if config.sensor_type == SENSOR_TYPE_LIDAR:
+                config.sensor_options["points_per_second"] = str(candidate.lidar_points_per_second)
+        spawn_sensors_from_configs(world, display_manager, vehicle, sensor_configs)
+
+        durations = np.zeros((ticks, len(AUTOTUNE_STAGES)), dtype=np.float64)
+        loop_start = 0.0
+        for i in range(warmup_ticks + ticks):
+            if i == warmup_ticks:
+                loop_start = time.perf_counter()
+            row = durations[i - warmup_ticks] if i >= warmup_ticks else np.zeros(len(AUTOTUNE_STAGES))
+
+            t0 = time.perf_counter()
+            tick_frame = world.tick()
+            t1 = time.perf_counter()
+            image, _ = synchronizer.get_frame(tick_frame)
+            t2 = time.perf_counter()
+            preprocessor.preprocess(image)
+            t3 = time.perf_counter()
+            display_manager.render()
+            t4 = time.perf_counter()
+            row[:] = (t1 - t0, t2 - t1, t3 - t2, t4 - t3)
+
+        elapsed = time.perf_counter() - loop_start
+        stage_ms = dict(zip(AUTOTUNE_STAGES, (1000.0 * durations.mean(axis=0)).tolist()))
+        return CandidateResult(candidate, ticks / elapsed, stage_ms)
+
+    finally:
+        if display_manager:
+            display_manager.destroy()
+        if camera:
+            camera.stop()
+            destroy_actor(camera)
+        destroy_actor(vehicle)
+        restore_world_settings(world, original_settings)
+
+
+def profile_to_dict(result: CandidateResult) -> dict:
+    return {
+        "simulation": asdict(result.candidate.simulation),
+        "camera": asdict(result.candidate.camera),
+        "model": asdict(result.candidate.model),
+        "lidar_points_per_second": result.candidate.lidar_points_per_second,
+        "grid_size": result.candidate.grid_size,
+        "measurements": {
+            "ticks_per_second": result.ticks_per_second,
+            "simulated_seconds_per_second": result.simulated_seconds_per_second,
+            "stage_ms": result.stage_ms,
+        },
+    }
+
+
+def load_profile(path: str) -> Candidate:
+    data = json.loads(Path(path).read_text())
+    return Candidate(
+        simulation=SimulationSettings(**data["simulation"]),
+        camera=CameraConfig(**data["camera"]),
+        model=ModelConfig(**data["model"]),
+        lidar_points_per_second=data["lidar_points_per_second"],
+        grid_size=data["grid_size"],
+    )
+
+
+def run_autotune(
+    client: carla.Client,
+    space: SearchSpace,
+    constraint: QualityConstraint,
+    ticks: int = DEFAULT_AUTOTUNE_TICKS,
+    max_candidates: Optional[int] = None,
+) -> List[CandidateResult]:
+    """Measure every candidate of the search space that meets the constraint.
+
+    Returns:
+        Results sorted from fastest to slowest in simulated seconds per
+        wall-clock second.
+    """
+    candidates = [candidate for candidate in expand_search_space(space) if constraint.allows(candidate)]
+    if max_candidates:
+        candidates = candidates[:max_candidates]
+
+    results = []
+    for index, candidate in enumerate(candidates, start=1):
+        result = measure_candidate(client, candidate, ticks)
+        results.append(result)
+        stages = ", ".join(f"{name} {ms:.2f} ms" for name, ms in result.stage_ms.items())
+        print(
+            f"[{index}/{len(candidates)}] camera {candidate.camera.image_size_x}x{candidate.camera.image_size_y}, "
+            f"lidar {candidate.lidar_points_per_second} pts/s, delta {candidate.simulation.fixed_delta_seconds}, "
+            f"model {candidate.model.image_width}x{candidate.model.image_height}, grid {candidate.grid_size}: "
+            f"{result.ticks_per_second:.1f} ticks/s, {result.simulated_seconds_per_second:.2f} sim s/s ({stages})"
+        )
+
+    return sorted(results, key=lambda result: result.simulated_seconds_per_second, reverse=True)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    argparser = argparse.ArgumentParser(description="Auto-tune simulation and sensor settings for throughput")
+    argparser.add_argument(
+        "--host",
+        metavar="H",
+        default=DEFAULT_CARLA_HOST,
+        help=f"IP of the host server (default: {DEFAULT_CARLA_HOST})",
+    )
+    argparser.add_argument(
+        "-p",
+        "--port",
+        metavar="P",
+        default=DEFAULT_CARLA_PORT,
+        type=int,
+        help=f"TCP port to listen to (default: {DEFAULT_CARLA_PORT})",
+    )
+    argparser.add_argument(
+        "--ticks",
+        default=DEFAULT_AUTOTUNE_TICKS,
+        type=int,
+        help=f"Measured ticks per candidate (default: {DEFAULT_AUTOTUNE_TICKS})",
+    )
+    argparser.add_argument(
+        "--max-candidates",
+        default=None,
+        type=int,
+        help="Only measure the first N candidates that meet the constraint",
+    )
+    argparser.add_argument(
+        "--min-camera-res",
+        metavar="WIDTHxHEIGHT",
+        default="0x0",
+        help="Smallest acceptable camera resolution (default: no limit)",
+    )
+    argparser.add_argument(
+        "--min-model-res",
+        metavar="WIDTHxHEIGHT",
+        default="0x0",
+        help="Smallest acceptable model resize resolution (default: no limit)",
+    )
+    argparser.add_argument(
+        "--max-delta",
+        metavar="SECONDS",
+        default=1.0,
+        type=float,
+        help="Largest acceptable fixed_delta_seconds (default: 1.0)",
+    )
+    argparser.add_argument(
+        "--out",
+        metavar="PATH",
+        default=DEFAULT_PROFILE_PATH,
+        help=f"Where to write the fastest profile (default: {DEFAULT_PROFILE_PATH})",
+    )
+
+    args = argparser.parse_args()
+    args.min_camera_width, args.min_camera_height = [int(x) for x in args.min_camera_res.split("x")]
+    args.min_model_width, args.min_model_height = [int(x) for x in args.min_model_res.split("x")]
+    return args
+
+
+def main(args: argparse.Namespace) -> None:
+    """Entry point for the auto-tuner.
+
+    Args:
+        args: Command-line arguments.
+    """
+    # Sensor surfaces are composited offscreen
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+    client = create_client(args.host, args.port, CARLA_TIMEOUT_SECONDS)
+    if is_fake_server():
+        print("Running against the fake CARLA server; timings cover the client side only")
+    constraint = QualityConstraint(
+        min_camera_width=args.min_camera_width,
+        min_camera_height=args.min_camera_height,
+        min_model_width=args.min_model_width,
+        min_model_height=args.min_model_height,
+        max_fixed_delta_seconds=args.max_delta,
+    )
+
+    results = run_autotune(client, SearchSpace(), constraint, args.ticks, args.max_candidates)
+    if not results:
+        print("No candidate satisfies the quality constraint")
+        return
+
+    Path(args.out).write_text(json.dumps(profile_to_dict(results[0]), indent=2))
+    print(
+        f"Fastest profile ({results[0].simulated_seconds_per_second:.2f} simulated s/s, "
+        f"{results[0].ticks_per_second:.1f} ticks/s) written to {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -7,6 +7,7 @@ import argparse
 import random
 import pygame
 import carla
+from dataclasses import replace
 
 from .config import (
     DEFAULT_CARLA_HOST,
@@ -14,9 +15,15 @@ from .config import (
     CARLA_TIMEOUT_SECONDS,
     TRAFFIC_MANAGER_PORT,
     VEHICLE_BLUEPRINT_FILTER,
-    DEFAULT_SIMULATION_SETTINGS,
     DEFAULT_WEATHER,
     DEFAULT_GRID_SIZE,
+    DEFAULT_SHARED_DISPLAY_NAME,
+    SENSOR_PROFILE_FULL,
+    SENSOR_PROFILE_CONSUMER,
+    SENSOR_PROFILES,
+    SIMULATION_PROFILE_DEFAULT,
+    SIMULATION_PROFILES,
+    DEFAULT_SENSOR_WORKER_THREADS,
 )
 from .carla_utils import (
     create_client,
@@ -26,14 +33,27 @@ from .carla_utils import (
     destroy_actors,
     restore_world_settings,
 )
+from .shared_display import (
+    COLOR_ORDER_RGB,
+    SharedFrameRing,
+    start_viewer_process,
+)
+from .tracing import enable_tracing, get_tracer, trace_span
 from .sensor_manager import (
     DisplayManager,
     CustomTimer,
     get_default_sensor_configs,
+    get_radar_sensor_config,
+    get_default_sensor_consumers,
+    derive_sensor_rates,
+    estimate_bytes_per_tick,
     spawn_sensors_from_configs,
 )
 
 
+RADAR_DISPLAY_POS = [1, 1]
+
+
 def run_simulation(args: argparse.Namespace, client: carla.Client) -> None:
     """Main simulation loop.
 
@@ -42,18 +62,23 @@ def run_simulation(args: argparse.Namespace, client: carla.Client) -> None:
         client: CARLA client instance.
     """
     display_manager = None
+    frame_ring = None
     vehicle = None
     vehicle_list = []
     timer = CustomTimer()
+    ticks = 0
 
     try:
         # Get the world and original settings
         world = client.get_world()
         original_settings = world.get_settings()
 
-        # Setup synchronous mode if requested
-        if args.sync:
-            setup_synchronous_mode(world, client)
+        # Apply the requested simulation profile; asynchronously the server
+        # keeps the profile's fixed step but no longer waits for ticks
+        simulation = SIMULATION_PROFILES[args.sim_profile]
+        if not args.sync:
+            simulation = replace(simulation, synchronous_mode=False, traffic_manager_synchronous=False)
+        setup_synchronous_mode(world, client, simulation=simulation)
 
         # Set weather conditions
         set_weather(world)
@@ -70,24 +95,79 @@ def run_simulation(args: argparse.Namespace, client: carla.Client) -> None:
         display_manager = DisplayManager(
             grid_size=DEFAULT_GRID_SIZE,
             window_size=[args.width, args.height],
+            headless=args.viewer or simulation.headless,
+            max_cell_fps=args.max_cell_fps,
+            full_redraw=args.full_redraw,
+            worker_threads=args.sensor_workers,
         )
 
-        # Spawn all configured sensors
-        spawn_sensors_from_configs(world, display_manager, vehicle, get_default_sensor_configs())
+        # Publish the sensor grid for an out-of-process viewer if requested
+        if args.viewer:
+            frame_ring = SharedFrameRing.create(
+                args.viewer_name, (args.height, args.width, 3), color_order=COLOR_ORDER_RGB
+            )
+            start_viewer_process(args.viewer_name)
+
+        # Spawn all configured sensors, optionally swapping the rear camera
+        # cell for a front radar bird's-eye view
+        sensor_configs = get_default_sensor_configs()
+        if args.radar:
+            sensor_configs = [
+                config for config in sensor_configs if config.display_pos != RADAR_DISPLAY_POS
+            ]
+            sensor_configs.append(get_radar_sensor_config(RADAR_DISPLAY_POS))
+
+        # Only stream each sensor as often as its consumers need it
+        fixed_delta_seconds = simulation.fixed_delta_seconds
+        full_estimate = estimate_bytes_per_tick(
+            sensor_configs, display_manager.get_display_size(), fixed_delta_seconds
+        )
+        if args.sensor_profile == SENSOR_PROFILE_CONSUMER:
+            sensor_configs = derive_sensor_rates(
+                sensor_configs, get_default_sensor_consumers(), fixed_delta_seconds
+            )
+        profile_estimate = estimate_bytes_per_tick(
+            sensor_configs, display_manager.get_display_size(), fixed_delta_seconds
+        )
+        print(
+            f"Estimated sensor bandwidth: {sum(full_estimate.values()) / 1024:.1f} KiB/tick at full rate, "
+            f"{sum(profile_estimate.values()) / 1024:.1f} KiB/tick with the '{args.sensor_profile}' profile"
+        )
+
+        spawn_sensors_from_configs(
+            world,
+            display_manager,
+            vehicle,
+            sensor_configs,
+            zero_copy_rgb=not args.copied_rgb,
+        )
 
         # Simulation loop
         call_exit = False
         time_init_sim = timer.time()
         while True:
+            ticks += 1
+
             # CARLA Tick
-            if args.sync:
-                world.tick()
-            else:
-                world.wait_for_tick()
+            with trace_span("world.tick"):
+                if args.sync:
+                    world.tick()
+                else:
+                    world.wait_for_tick()
 
             # Render received data
             display_manager.render()
 
+            # Hand the composited grid to the viewer process; without a window
+            # there are no events, so the loop is stopped with Ctrl+C
+            if frame_ring is not None:
+                frame = display_manager.get_frame_view()
+                frame_ring.publish(frame)
+                del frame
+                continue
+            if display_manager.headless:
+                continue
+
             # Handle events
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -103,8 +183,22 @@ def run_simulation(args: argparse.Namespace, client: carla.Client) -> None:
     finally:
         # Cleanup
         if display_manager:
+            # Per-frame sensor callback cost
+            for line in display_manager.get_timing_report():
+                print(line)
+            for line in display_manager.get_bandwidth_report(ticks):
+                print(line)
+            print(display_manager.get_render_report())
             display_manager.destroy()
 
+        if frame_ring:
+            frame_ring.close()
+
+        # Timeline of tick, sensor callback and render spans
+        if args.trace:
+            get_tracer().export(args.trace)
+            print(f"Trace written to {args.trace}")
+
         if vehicle_list:
             destroy_actors(vehicle_list)
 
@@ -143,8 +237,76 @@ def main() -> None:
         help="window resolution (default: 1280x720)",
     )
 
+    argparser.add_argument(
+        "--sensor-profile",
+        choices=SENSOR_PROFILES,
+        default=SENSOR_PROFILE_FULL,
+        help="stream every sensor each tick, or only as often as the display "
+        f"consumer declares it needs (default: {SENSOR_PROFILE_FULL})",
+    )
+    argparser.add_argument(
+        "--sim-profile",
+        choices=list(SIMULATION_PROFILES),
+        default=SIMULATION_PROFILE_DEFAULT,
+        help="Simulation settings profile; 'no-render' and 'bulk' skip rendering and "
+        f"open no window (default: {SIMULATION_PROFILE_DEFAULT})",
+    )
+    argparser.add_argument(
+        "--radar",
+        action="store_true",
+        help="Show a front radar bird's-eye view in place of the rear camera",
+    )
+    argparser.add_argument(
+        "--copied-rgb",
+        action="store_true",
+        help="Convert camera frames through NumPy copies instead of wrapping "
+        "the BGRA buffer (for callback timing comparisons)",
+    )
+    argparser.add_argument(
+        "--max-cell-fps",
+        metavar="FPS",
+        default=None,
+        type=float,
+        help="Redraw each grid cell at most FPS times per second (default: on every new frame)",
+    )
+    argparser.add_argument(
+        "--full-redraw",
+        action="store_true",
+        help="Blit every cell and flip the whole window each tick instead of "
+        "updating only cells with new frames (for render timing comparisons)",
+    )
+    argparser.add_argument(
+        "--sensor-workers",
+        metavar="N",
+        default=DEFAULT_SENSOR_WORKER_THREADS,
+        type=int,
+        help="Process LiDAR, radar and copied camera frames on N worker threads "
+        "instead of in the sensor callbacks (default: "
+        f"{DEFAULT_SENSOR_WORKER_THREADS}, process in the callbacks)",
+    )
+    argparser.add_argument(
+        "--trace",
+        metavar="PATH",
+        default=None,
+        help="Record tick, callback, inference and render spans and write them "
+        "as Chrome trace-event JSON to PATH on exit",
+    )
+    argparser.add_argument(
+        "--viewer",
+        action="store_true",
+        help="Show the sensor grid in a separate viewer process fed through shared memory",
+    )
+    argparser.add_argument(
+        "--viewer-name",
+        metavar="NAME",
+        default=DEFAULT_SHARED_DISPLAY_NAME,
+        help=f"Shared memory name used with --viewer (default: {DEFAULT_SHARED_DISPLAY_NAME})",
+    )
+
     args = argparser.parse_args()
     args.width, args.height = [int(x) for x in args.res.split("x")]
+    if args.trace:
+        enable_tracing()
 
     try:
         client = create_client(args.host, args.port, CARLA_TIMEOUT_SECONDS)
@@ -0,0 +1,591 @@
+"""Micro-benchmarks for sensor processing paths and simulation speed.
+
+The sensor benchmarks run on synthetic measurements and need no CARLA
+server, so the cost of the processing itself can be measured on any machine:
+
+    python -m src.benchmarks radar --frames 2000
+    python -m src.benchmarks semantic-lidar
+    python -m src.benchmarks telemetry --ticks 100000
+
+The simulation benchmark drives a running server with each simulation
+profile and reports how much faster than real time it steps:
+
+    python -m src.benchmarks simulation --profiles default bulk --vehicles 30
+
+The camera benchmark compares the full front camera with the ROI camera
+that renders only the region the lane model reads:
+
+    python -m src.benchmarks camera --ticks 300
+
+The display benchmark times the sensor grid render with full redraws and
+with only the cells that received new frames:
+
+    python -m src.benchmarks display --max-cell-fps 10
+
+With CARLA_FAKE_SERVER=1 the simulation benchmark runs against the in-process
+fake server instead, which measures the client-side cost of each profile:
+
+    CARLA_FAKE_SERVER=1 python -m src.benchmarks simulation --vehicles 100 --camera
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import numpy as np
+import pygame
+import carla
+from typing import Callable, Dict, List, Optional
+
+from .config import (
+    DEFAULT_SIMULATION_SETTINGS,
+    DEFAULT_GRID_SIZE,
+    DEFAULT_WINDOW_WIDTH,
+    DEFAULT_WINDOW_HEIGHT,
+    RADAR_RANGE,
+    RADAR_HORIZONTAL_FOV,
+    RADAR_VERTICAL_FOV,
+    RADAR_POINTS_PER_SECOND,
+    LIDAR_RANGE,
+    LIDAR_RANGE_MULTIPLIER,
+    SEMANTIC_LIDAR_POINTS_PER_SECOND,
+    DEFAULT_CARLA_HOST,
+    DEFAULT_CARLA_PORT,
+    CARLA_TIMEOUT_SECONDS,
+    DEFAULT_CAMERA_CONFIG,
+    CameraConfig,
+    SIMULATION_PROFILES,
+    SimulationSettings,
+    DEFAULT_TELEMETRY_CAPACITY,
+    TELEMETRY_FLUSH_SECONDS,
+)
+from .carla_utils import (
+    create_client,
+    is_fake_server,
+    get_vehicle_blueprint,
+    setup_synchronous_mode,
+    spawn_vehicle,
+    destroy_actor,
+    destroy_actors,
+    restore_world_settings,
+)
+from .frame_sync import FrameSynchronizer, attach_camera
+from .sensor_manager import (
+    DisplayManager,
+    derive_sensor_rates,
+    get_default_sensor_configs,
+    get_default_sensor_consumers,
+    spawn_sensors_from_configs,
+)
+from .lane_predictor import ImagePreprocessor, roi_camera_config
+from .radar_processing import RADAR_DETECTION_DTYPE, RadarProcessor
+from .lidar_processing import (
+    SEMANTIC_LIDAR_DTYPE,
+    SEMANTIC_TAG_COUNT,
+    SemanticBEVGrid,
+    decode_semantic_lidar,
+)
+from .telemetry import TelemetryRecorder, read_telemetry
+
+
+BENCHMARK_SEED = 0
+
+
+def _cell_size() -> List[int]:
+    return [
+        int(DEFAULT_WINDOW_WIDTH / DEFAULT_GRID_SIZE[1]),
+        int(DEFAULT_WINDOW_HEIGHT / DEFAULT_GRID_SIZE[0]),
+    ]
+
+
+def time_calls(function: Callable[[int], None], iterations: int, warmup: int = 10) -> np.ndarray:
+    """Call function(i) repeatedly and return per-call durations in milliseconds."""
+    for i in range(warmup):
+        function(i)
+
+    durations = np.empty(iterations, dtype=np.float64)
+    for i in range(iterations):
+        start = time.perf_counter()
+        function(i)
+        durations[i] = time.perf_counter() - start
+    return durations * 1000.0
+
+
+def print_timing(label: str, durations_ms: np.ndarray, budget_ms: float = 0.0) -> None:
+    line = (
+        f"{label}: mean {durations_ms.mean():.3f} ms, "
+        f"p50 {np.percentile(durations_ms, 50):.3f} ms, "
+        f"p99 {np.percentile(durations_ms, 99):.3f} ms"
+    )
+    if budget_ms:
+        line += f" ({100.0 * durations_ms.mean() / budget_ms:.1f}% of {budget_ms:.1f} ms budget)"
+    print(line)
+
+
+def make_radar_frames(frames: int, points: int, seed: int = BENCHMARK_SEED) -> List[bytes]:
+    rng = np.random.default_rng(seed)
+    result = []
+    for _ in range(frames):
+        detections = np.empty(points, dtype=RADAR_DETECTION_DTYPE)
+        detections["velocity"] = rng.uniform(-20.0, 20.0, points)
+        detections["azimuth"] = np.radians(rng.uniform(-RADAR_HORIZONTAL_FOV / 2, RADAR_HORIZONTAL_FOV / 2, points))
+        detections["altitude"] = np.radians(rng.uniform(-RADAR_VERTICAL_FOV / 2, RADAR_VERTICAL_FOV / 2, points))
+        detections["depth"] = rng.uniform(0.5, RADAR_RANGE, points)
+        result.append(detections.tobytes())
+    return result
+
+
+def benchmark_radar(args: argparse.Namespace) -> None:
+    tick_seconds = DEFAULT_SIMULATION_SETTINGS.fixed_delta_seconds
+    points = args.points or int(RADAR_POINTS_PER_SECOND * tick_seconds)
+    raw_frames = make_radar_frames(16, points)
+    processor = RadarProcessor(_cell_size())
+
+    durations = time_calls(lambda i: processor.process(raw_frames[i % len(raw_frames)]), args.frames)
+    print_timing(f"radar ({points} detections/frame)", durations, 1000.0 * tick_seconds)
+
+
+def make_semantic_lidar_frames(frames: int, points: int, seed: int = BENCHMARK_SEED) -> List[bytes]:
+    rng = np.random.default_rng(seed)
+    result = []
+    for _ in range(frames):
+        sweep = np.empty(points, dtype=SEMANTIC_LIDAR_DTYPE)
+        distance = rng.uniform(1.0, LIDAR_RANGE, points)
+        angle = rng.uniform(-np.pi, np.pi, points)
+        sweep["x"] = distance * np.cos(angle)
+        sweep["y"] = distance * np.sin(angle)
+        sweep["z"] = rng.uniform(-2.5, 3.0, points)
+        sweep["cos_inc_angle"] = rng.uniform(0.0, 1.0, points)
+        sweep["object_idx"] = rng.integers(0, 500, points)
+        sweep["object_tag"] = rng.integers(0, SEMANTIC_TAG_COUNT, points)
+        result.append(sweep.tobytes())
+    return result
+
+
+def benchmark_semantic_lidar(args: argparse.Namespace) -> None:
+    tick_seconds = DEFAULT_SIMULATION_SETTINGS.fixed_delta_seconds
+    points = args.points or int(SEMANTIC_LIDAR_POINTS_PER_SECOND * tick_seconds)
+    raw_frames = make_semantic_lidar_frames(16, points)
+    cell_size = _cell_size()
+    grid = SemanticBEVGrid(cell_size, LIDAR_RANGE_MULTIPLIER * LIDAR_RANGE / min(cell_size))
+
+    decode = time_calls(lambda i: decode_semantic_lidar(raw_frames[i % len(raw_frames)]), args.frames)
+    build = time_calls(lambda i: grid.build(decode_semantic_lidar(raw_frames[i % len(raw_frames)])), args.frames)
+    full = time_calls(lambda i: grid.process(raw_frames[i % len(raw_frames)]), args.frames)
+
+    budget_ms = 1000.0 * tick_seconds
+    label = f"({points} points/sweep, {grid.width}x{grid.height} cells)"
+    print_timing(f"semantic lidar decode {label}", decode, budget_ms)
+    print_timing(f"semantic lidar decode + grid {label}", build, budget_ms)
+    print_timing(f"semantic lidar decode + grid + render {label}", full, budget_ms)
+
+
+def benchmark_telemetry(args: argparse.Namespace) -> None:
+    # Stand-in for per-tick work so the recording overhead shows up in context
+    work = np.random.default_rng(BENCHMARK_SEED).random((64, 64))
+
+    def tick(i: int) -> None:
+        np.dot(work, work)
+
+    plain = time_calls(tick, args.ticks)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "telemetry.bin")
+        # Room for every row, so drops would only come from a failed flush
+        recorder = TelemetryRecorder(path, capacity=max(DEFAULT_TELEMETRY_CAPACITY, 2 * args.ticks + 20))
+
+        def record(i: int) -> None:
+            recorder.record(i, 50.0, 0.1, 0.5, -0.1, 10.0, 1.0, 5.0, 2.0)
+
+        def recorded_tick(i: int) -> None:
+            tick(i)
+            record(i)
+
+        # The flush thread runs throughout, as it would in the driving loop
+        record_only = time_calls(record, args.ticks)
+        with_telemetry = time_calls(recorded_tick, args.ticks)
+        recorder.close()
+        rows = read_telemetry(path).shape[0]
+
+    print_timing("telemetry record", record_only)
+    print(f"telemetry record rate: {1000.0 / record_only.mean():,.0f} rows/s")
+    print_timing("tick without telemetry", plain)
+    print_timing("tick with telemetry", with_telemetry)
+    print(f"{rows} rows written to disk, {recorder.dropped} dropped")
+    print(
+        f"default buffer sustains {DEFAULT_TELEMETRY_CAPACITY / TELEMETRY_FLUSH_SECONDS:,.0f} rows/s "
+        f"({DEFAULT_TELEMETRY_CAPACITY} rows flushed every {TELEMETRY_FLUSH_SECONDS} s)"
+    )
+
+
+def measure_simulation_speed(
+    client: carla.Client,
+    simulation: SimulationSettings,
+    ticks: int,
+    vehicles: int,
+    camera: bool = False,
+    warmup_ticks: int = 20,
+) -> Dict[str, float]:
+    """Step the simulation with one settings profile and time it.
+
+    Args:
+        client: Connected CARLA client.
+        simulation: Settings profile to apply.
+        ticks: Ticks to time.
+        vehicles: Autopilot vehicles to spawn; the first is the hero that
+            hybrid physics is centred on.
+        camera: Attach an RGB camera to the hero so rendering cost is included.
+        warmup_ticks: Ticks run before timing.
+
+    Returns:
+        Simulated seconds, wall-clock seconds and their ratio.
+    """
+    world = client.get_world()
+    original_settings = setup_synchronous_mode(world, client, simulation=simulation)
+    actors = []
+
+    try:
+        blueprint = get_vehicle_blueprint(world)
+        spawn_points = world.get_map().get_spawn_points()
+        random.Random(BENCHMARK_SEED).shuffle(spawn_points)
+        for index, spawn_point in enumerate(spawn_points[:vehicles]):
+            blueprint.set_attribute("role_name", "hero" if index == 0 else "autopilot")
+            vehicle = world.try_spawn_actor(blueprint, spawn_point)
+            if vehicle is not None:
+                vehicle.set_autopilot(True)
+                actors.append(vehicle)
+
+        if camera and actors:
+            camera_bp = world.get_blueprint_library().find("sensor.camera.rgb")
+            camera_bp.set_attribute("image_size_x", str(DEFAULT_CAMERA_CONFIG.image_size_x))
+            camera_bp.set_attribute("image_size_y", str(DEFAULT_CAMERA_CONFIG.image_size_y))
+            transform = carla.Transform(carla.Location(z=DEFAULT_CAMERA_CONFIG.pos_z, x=DEFAULT_CAMERA_CONFIG.pos_x))
+            sensor = world.spawn_actor(camera_bp, transform, attach_to=actors[0])
+            sensor.listen(lambda image: None)
+            actors.insert(0, sensor)
+
+        for _ in range(warmup_ticks):
+            world.tick()
+
+        sim_start = world.get_snapshot().timestamp.elapsed_seconds
+        wall_start = time.perf_counter()
+        for _ in range(ticks):
+            world.tick()
+        wall_seconds = time.perf_counter() - wall_start
+        sim_seconds = world.get_snapshot().timestamp.elapsed_seconds - sim_start
+    finally:
+        for actor in actors:
+            if isinstance(actor, carla.Sensor):
+                actor.stop()
+        destroy_actors(actors)
+        restore_world_settings(world, original_settings)
+
+    return {
+        "sim_seconds": sim_seconds,
+        "wall_seconds": wall_seconds,
+        "ratio": sim_seconds / wall_seconds if wall_seconds > 0 else 0.0,
+    }
+
+
+def measure_camera_cost(
+    client: carla.Client,
+    camera_config: Optional[CameraConfig],
+    preprocessor: ImagePreprocessor,
+    ticks: int,
+    warmup_ticks: int = 20,
+) -> Dict[str, float]:
+    """Time synchronous ticks with one camera, up to the preprocessed model input.
+
+    Args:
+        client: Connected CARLA client.
+        camera_config: Camera to attach to an autopilot vehicle, or None to
+            time ticks without a camera.
+        preprocessor: Turns each frame into model input.
+        ticks: Ticks to time.
+        warmup_ticks: Ticks run before timing.
+
+    Returns:
+        Mean tick, frame wait and preprocessing milliseconds and bytes per frame.
+    """
+    world = client.get_world()
+    original_settings = setup_synchronous_mode(world, client)
+    vehicle = None
+    camera = None
+
+    try:
+        spawn_point = random.Random(BENCHMARK_SEED).choice(world.get_map().get_spawn_points())
+        vehicle = spawn_vehicle(world, spawn_point=spawn_point, autopilot=True)
+        if camera_config is not None:
+            camera, frame_buffer = attach_camera(world, vehicle, camera_config)
+            synchronizer = FrameSynchronizer(frame_buffer)
+
+        durations = np.zeros((ticks, 3), dtype=np.float64)
+        for i in range(warmup_ticks + ticks):
+            t0 = time.perf_counter()
+            tick_frame = world.tick()
+            t1 = time.perf_counter()
+            if camera is not None:
+                image, _ = synchronizer.get_frame(tick_frame)
+                t2 = time.perf_counter()
+                preprocessor.preprocess(image)
+            else:
+                t2 = t1
+            t3 = time.perf_counter()
+            if i >= warmup_ticks:
+                durations[i - warmup_ticks] = (t1 - t0, t2 - t1, t3 - t2)
+    finally:
+        if camera:
+            camera.stop()
+            destroy_actor(camera)
+        if vehicle:
+            destroy_actor(vehicle)
+        restore_world_settings(world, original_settings)
+
+    tick_ms, wait_ms, preprocess_ms = (1000.0 * durations.mean(axis=0)).tolist()
+    return {
+        "tick_ms": tick_ms,
+        "frame_wait_ms": wait_ms,
+        "preprocess_ms": preprocess_ms,
+        # BGRA, 4 bytes per pixel
+        "bytes_per_frame": 4 * camera_config.image_size_x * camera_config.image_size_y if camera_config else 0,
+    }
+
+
+def benchmark_camera(args: argparse.Namespace) -> None:
+    client = create_client(args.host, args.port, CARLA_TIMEOUT_SECONDS)
+    if is_fake_server():
+        print("Running against the fake CARLA server; timings cover the client side only")
+
+    baseline = measure_camera_cost(client, None, ImagePreprocessor(), args.ticks)
+    roi_camera = roi_camera_config()
+    modes = [
+        ("full", DEFAULT_CAMERA_CONFIG, ImagePreprocessor()),
+        ("roi", roi_camera, ImagePreprocessor(roi_frames=True)),
+    ]
+    print(
+        f"ROI camera {roi_camera.image_size_x}x{roi_camera.image_size_y}, fov {roi_camera.fov:.1f}, "
+        f"pitch {roi_camera.pitch:.1f}, yaw {roi_camera.yaw:.1f}; no camera: {baseline['tick_ms']:.2f} ms/tick"
+    )
+    for name, camera_config, preprocessor in modes:
+        result = measure_camera_cost(client, camera_config, preprocessor, args.ticks)
+        # Rendering and transfer: the extra time until the frame is in hand
+        render_ms = result["tick_ms"] + result["frame_wait_ms"] - baseline["tick_ms"]
+        print(
+            f"camera '{name}' {camera_config.image_size_x}x{camera_config.image_size_y}: "
+            f"{result['bytes_per_frame'] / 1024:.0f} KiB/tick, render + transfer {render_ms:.2f} ms, "
+            f"preprocess {result['preprocess_ms']:.2f} ms"
+        )
+
+
+def measure_display_render(
+    client: carla.Client,
+    full_redraw: bool,
+    ticks: int,
+    max_cell_fps: Optional[float] = None,
+    warmup_ticks: int = 20,
+) -> Dict[str, float]:
+    """Time DisplayManager.render with the default sensor grid in a window.
+
+    Sensors stream at the rates the display consumer asks for, so cells
+    receive frames at different rates as they do in practice.
+
+    Args:
+        client: Connected CARLA client.
+        full_redraw: Blit every cell and flip the window on every render.
+        ticks: Ticks to time.
+        max_cell_fps: Redraw cap per cell (default: none).
+        warmup_ticks: Ticks run before timing.
+
+    Returns:
+        Mean render milliseconds and grid cells redrawn per tick.
+    """
+    world = client.get_world()
+    original_settings = setup_synchronous_mode(world, client)
+    vehicle = None
+    display_manager = None
+
+    try:
+        spawn_point = random.Random(BENCHMARK_SEED).choice(world.get_map().get_spawn_points())
+        vehicle = spawn_vehicle(world, spawn_point=spawn_point, autopilot=True)
+        display_manager = DisplayManager(
+            grid_size=DEFAULT_GRID_SIZE,
+            window_size=[DEFAULT_WINDOW_WIDTH, DEFAULT_WINDOW_HEIGHT],
+            max_cell_fps=max_cell_fps,
+            full_redraw=full_redraw,
+        )
+        sensor_configs = derive_sensor_rates(
+            get_default_sensor_configs(),
+            get_default_sensor_consumers(),
+            world.get_settings().fixed_delta_seconds,
+        )
+        spawn_sensors_from_configs(world, display_manager, vehicle, sensor_configs)
+
+        for _ in range(warmup_ticks):
+            world.tick()
+            display_manager.render()
+        start_seconds, start_count, start_cells = (
+            display_manager.render_seconds,
+            display_manager.render_count,
+            display_manager.cells_rendered,
+        )
+        for _ in range(ticks):
+            world.tick()
+            display_manager.render()
+            pygame.event.pump()
+        renders = display_manager.render_count - start_count
+        render_ms = 1000.0 * (display_manager.render_seconds - start_seconds) / renders
+        cells_per_tick = (display_manager.cells_rendered - start_cells) / renders
+    finally:
+        if display_manager:
+            display_manager.destroy()
+        if vehicle:
+            destroy_actor(vehicle)
+        restore_world_settings(world, original_settings)
+
+    return {"render_ms": render_ms, "cells_per_tick": cells_per_tick}
+
+
+def benchmark_display(args: argparse.Namespace) -> None:
+    client = create_client(args.host, args.port, CARLA_TIMEOUT_SECONDS)
+    if is_fake_server():
+        print("Running against the fake CARLA server; timings cover the client side only")
+
+    for name, full_redraw in (("full redraw", True), ("dirty cells", False)):
+        result = measure_display_render(client, full_redraw, args.ticks, args.max_cell_fps)
+        print(f"display '{name}': {result['render_ms']:.3f} ms/tick, {result['cells_per_tick']:.2f} cells/tick")
+
+
+def benchmark_simulation(args: argparse.Namespace) -> None:
+    client = create_client(args.host, args.port, CARLA_TIMEOUT_SECONDS)
+    if is_fake_server():
+        print("Running against the fake CARLA server; timings cover the client side only")
+    for name in args.profiles:
+        result = measure_simulation_speed(client, SIMULATION_PROFILES[name], args.ticks, args.vehicles, args.camera)
+        print(
+            f"simulation '{name}' ({args.vehicles} vehicles{', camera' if args.camera else ''}): "
+            f"{result['sim_seconds']:.1f} s simulated in {result['wall_seconds']:.1f} s, "
+            f"{result['ratio']:.2f}x real time"
+        )
+
+
+def main() -> None:
+    """Entry point for the benchmarks."""
+    argparser = argparse.ArgumentParser(description="Sensor processing benchmarks")
+    subparsers = argparser.add_subparsers(dest="benchmark", required=True)
+
+    radar_parser = subparsers.add_parser("radar", help="Radar decoding, projection and bird's-eye rendering")
+    radar_parser.add_argument("--frames", default=2000, type=int, help="Frames to process (default: 2000)")
+    radar_parser.add_argument(
+        "--points",
+        default=0,
+        type=int,
+        help="Detections per frame (default: RADAR_POINTS_PER_SECOND per simulation tick)",
+    )
+    radar_parser.set_defaults(run=benchmark_radar)
+
+    semantic_parser = subparsers.add_parser(
+        "semantic-lidar", help="Semantic LiDAR decoding and bird's-eye occupancy grid"
+    )
+    semantic_parser.add_argument("--frames", default=1000, type=int, help="Sweeps to process (default: 1000)")
+    semantic_parser.add_argument(
+        "--points",
+        default=0,
+        type=int,
+        help="Points per sweep (default: SEMANTIC_LIDAR_POINTS_PER_SECOND per simulation tick)",
+    )
+    semantic_parser.set_defaults(run=benchmark_semantic_lidar)
+
+    telemetry_parser = subparsers.add_parser(
+        "telemetry", help="Per-tick telemetry recording cost with the background flush running"
+    )
+    telemetry_parser.add_argument("--ticks", default=100000, type=int, help="Ticks to record (default: 100000)")
+    telemetry_parser.set_defaults(run=benchmark_telemetry)
+
+    simulation_parser = subparsers.add_parser(
+        "simulation", help="Simulated-to-wall-clock time ratio of each simulation profile (needs a server)"
+    )
+    simulation_parser.add_argument(
+        "--host",
+        metavar="H",
+        default=DEFAULT_CARLA_HOST,
+        help=f"IP of the host server (default: {DEFAULT_CARLA_HOST})",
+    )
+    simulation_parser.add_argument(
+        "-p",
+        "--port",
+        metavar="P",
+        default=DEFAULT_CARLA_PORT,
+        type=int,
+        help=f"TCP port to listen to (default: {DEFAULT_CARLA_PORT})",
+    )
+    simulation_parser.add_argument(
+        "--profiles",
+        nargs="+",
+        choices=list(SIMULATION_PROFILES),
+        default=list(SIMULATION_PROFILES),
+        help="Simulation profiles to compare (default: all)",
+    )
+    simulation_parser.add_argument("--ticks", default=500, type=int, help="Ticks to time per profile (default: 500)")
+    simulation_parser.add_argument(
+        "--vehicles", default=30, type=int, help="Autopilot vehicles to spawn (default: 30)"
+    )
+    simulation_parser.add_argument(
+        "--camera",
+        action="store_true",
+        help="Attach an RGB camera to the hero vehicle so rendering cost is included",
+    )
+    simulation_parser.set_defaults(run=benchmark_simulation)
+
+    camera_parser = subparsers.add_parser(
+        "camera", help="Render, transfer and preprocessing cost of the full and ROI cameras (needs a server)"
+    )
+    camera_parser.add_argument(
+        "--host",
+        metavar="H",
+        default=DEFAULT_CARLA_HOST,
+        help=f"IP of the host server (default: {DEFAULT_CARLA_HOST})",
+    )
+    camera_parser.add_argument(
+        "-p",
+        "--port",
+        metavar="P",
+        default=DEFAULT_CARLA_PORT,
+        type=int,
+        help=f"TCP port to listen to (default: {DEFAULT_CARLA_PORT})",
+    )
+    camera_parser.add_argument("--ticks", default=300, type=int, help="Ticks to time per camera (default: 300)")
+    camera_parser.set_defaults(run=benchmark_camera)
+
+    display_parser = subparsers.add_parser(
+        "display", help="Sensor grid render time with full redraws and with dirty cells only (needs a server)"
+    )
+    display_parser.add_argument(
+        "--host",
+        metavar="H",
+        default=DEFAULT_CARLA_HOST,
+        help=f"IP of the host server (default: {DEFAULT_CARLA_HOST})",
+    )
+    display_parser.add_argument(
+        "-p",
+        "--port",
+        metavar="P",
+        default=DEFAULT_CARLA_PORT,
+        type=int,
+        help=f"TCP port to listen to (default: {DEFAULT_CARLA_PORT})",
+    )
+    display_parser.add_argument("--ticks", default=300, type=int, help="Ticks to time per mode (default: 300)")
+    display_parser.add_argument(
+        "--max-cell-fps",
+        metavar="FPS",
+        default=None,
+        type=float,
+        help="Redraw each cell at most FPS times per second (default: on every new frame)",
+    )
+    display_parser.set_defaults(run=benchmark_display)
+
+    args = argparser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
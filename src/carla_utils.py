@@ -12,6 +12,8 @@ from .config import (
     DEFAULT_WEATHER,
     TOWN05_GOOD_ROAD_IDS,
     SPAWN_DELAY_SECONDS,
+    SimulationSettings,
+    WeatherConfig,
 )
 
 
@@ -37,39 +39,84 @@ def create_client(
         raise CarlaConnectionError(f"Failed to connect to CARLA at {host}:{port}: {e}") from e
 
 
+def is_fake_server() -> bool:
+    # True when fake_carla stands in for the client library (CARLA_FAKE_SERVER)
+    return getattr(carla, "IS_FAKE_SERVER", False)
+
+
+def load_world_if_needed(client: carla.Client, town: Optional[str]) -> carla.World:
+    world = client.get_world()
+    if not town:
+        return world
+
+    # Map names look like "Carla/Maps/Town05"
+    current_town = world.get_map().name.split("/")[-1]
+    if current_town == town.split("/")[-1]:
+        return world
+
+    return client.load_world(town)
+
+
+def to_world_settings(
+    world: carla.World, simulation: SimulationSettings = DEFAULT_SIMULATION_SETTINGS
+) -> carla.WorldSettings:
+    if simulation.substepping and (
+        simulation.fixed_delta_seconds > simulation.max_substep_delta_time * simulation.max_substeps
+    ):
+        raise ValueError(
+            f"fixed_delta_seconds {simulation.fixed_delta_seconds} exceeds "
+            f"max_substep_delta_time * max_substeps ({simulation.max_substep_delta_time} * {simulation.max_substeps})"
+        )
+
+    settings = world.get_settings()
+    settings.synchronous_mode = simulation.synchronous_mode
+    settings.fixed_delta_seconds = simulation.fixed_delta_seconds
+    settings.no_rendering_mode = simulation.no_rendering_mode
+    settings.substepping = simulation.substepping
+    settings.max_substep_delta_time = simulation.max_substep_delta_time
+    settings.max_substeps = simulation.max_substeps
+    return settings
+
+
 def setup_synchronous_mode(
     world: carla.World,
     client: carla.Client,
     settings: Optional[carla.WorldSettings] = None,
     traffic_manager_port: int = TRAFFIC_MANAGER_PORT,
+    simulation: SimulationSettings = DEFAULT_SIMULATION_SETTINGS,
 ) -> carla.WorldSettings:
     original_settings = world.get_settings()
 
     traffic_manager = client.get_trafficmanager(traffic_manager_port)
-    traffic_manager.set_synchronous_mode(True)
+    traffic_manager.set_synchronous_mode(simulation.traffic_manager_synchronous)
+    traffic_manager.set_hybrid_physics_mode(simulation.hybrid_physics)
+    if simulation.hybrid_physics:
+        traffic_manager.set_hybrid_physics_radius(simulation.hybrid_physics_radius)
 
     if settings is None:
-        settings = world.get_settings()
-        settings.synchronous_mode = True
-        settings.fixed_delta_seconds = DEFAULT_SIMULATION_SETTINGS.fixed_delta_seconds
+        settings = to_world_settings(world, simulation)
 
     world.apply_settings(settings)
 
     return original_settings
 
 
+def to_weather_parameters(weather: WeatherConfig = DEFAULT_WEATHER) -> carla.WeatherParameters:
+    return carla.WeatherParameters(
+        cloudiness=weather.cloudiness,
+        precipitation=weather.precipitation,
+        precipitation_deposits=weather.precipitation_deposits,
+        wind_intensity=weather.wind_intensity,
+        sun_azimuth_angle=weather.sun_azimuth_angle,
+        sun_altitude_angle=weather.sun_altitude_angle,
+        fog_density=weather.fog_density,
+        wetness=weather.wetness,
+    )
+
+
 def set_weather(world: carla.World, weather: Optional[carla.WeatherParameters] = None) -> None:
     if weather is None:
-        weather = carla.WeatherParameters(
-            cloudiness=DEFAULT_WEATHER.cloudiness,
-            precipitation=DEFAULT_WEATHER.precipitation,
-            precipitation_deposits=DEFAULT_WEATHER.precipitation_deposits,
-            wind_intensity=DEFAULT_WEATHER.wind_intensity,
-            sun_azimuth_angle=DEFAULT_WEATHER.sun_azimuth_angle,
-            sun_altitude_angle=DEFAULT_WEATHER.sun_altitude_angle,
-            fog_density=DEFAULT_WEATHER.fog_density,
-            wetness=DEFAULT_WEATHER.wetness,
-        )
+        weather = to_weather_parameters(DEFAULT_WEATHER)
     world.set_weather(weather)
 
 
@@ -150,6 +197,19 @@ def spawn_vehicle_on_road(
     return vehicle
 
 
+def reset_vehicle(world: carla.World, vehicle: carla.Vehicle, spawn_point: carla.Transform) -> int:
+    """Teleport a vehicle to a spawn point and bring it to rest.
+
+    Returns:
+        Frame id of the tick that applied the reset.
+    """
+    vehicle.apply_control(carla.VehicleControl())
+    vehicle.set_target_velocity(carla.Vector3D())
+    vehicle.set_target_angular_velocity(carla.Vector3D())
+    vehicle.set_transform(spawn_point)
+    return world.tick()
+
+
 def find_vehicle_by_pattern(world: carla.World, pattern: str = VEHICLE_BLUEPRINT_FILTER) -> Optional[carla.Vehicle]:
     actors = world.get_actors().filter(pattern)
     for actor in actors:
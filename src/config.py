@@ -9,16 +9,66 @@ TRAFFIC_MANAGER_PORT = 8000
 
 VEHICLE_BLUEPRINT_FILTER = "*model3*"
 
+# Set to 1 (or to comma-separated FakeServerConfig overrides such as
+# "step_seconds=0.01,seed=3") to run against fake_carla instead of a server
+FAKE_CARLA_ENV_VAR = "CARLA_FAKE_SERVER"
+
+
+@dataclass
+class FakeServerConfig:
+    seed: int = 0
+    # Wall-clock time every tick takes, standing in for the server step
+    step_seconds: float = 0.0
+    # Deliver sensor data on a callback thread like the client library does,
+    # instead of inside World.tick()
+    async_callbacks: bool = True
+    # Every town is a ring road of two lanes per direction around this radius
+    track_radius_meters: float = 150.0
+    lane_width_meters: float = 3.5
+    autopilot_speed_kph: float = 30.0
+
+
+DEFAULT_FAKE_SERVER_CONFIG = FakeServerConfig()
+
 
 @dataclass
 class SimulationSettings:
     synchronous_mode: bool = True
     fixed_delta_seconds: float = 0.05
     traffic_manager_synchronous: bool = True
+    # Skips all server rendering; camera sensors then deliver no images
+    no_rendering_mode: bool = False
+    # fixed_delta_seconds must not exceed max_substep_delta_time * max_substeps
+    substepping: bool = True
+    max_substep_delta_time: float = 0.01
+    max_substeps: int = 10
+    # Traffic Manager only simulates physics for vehicles near the hero
+    hybrid_physics: bool = False
+    hybrid_physics_radius: float = 50.0
+    # No client windows; the server spectator window is controlled by
+    # launching CarlaUE4 with -RenderOffScreen
+    headless: bool = False
 
 
 DEFAULT_SIMULATION_SETTINGS = SimulationSettings()
 
+SIMULATION_PROFILE_DEFAULT = "default"
+SIMULATION_PROFILE_NO_RENDER = "no-render"
+SIMULATION_PROFILE_BULK = "bulk"
+SIMULATION_PROFILES: Dict[str, SimulationSettings] = {
+    SIMULATION_PROFILE_DEFAULT: DEFAULT_SIMULATION_SETTINGS,
+    SIMULATION_PROFILE_NO_RENDER: SimulationSettings(no_rendering_mode=True, headless=True),
+    # Coarser physics and hybrid Traffic Manager for data generation runs
+    SIMULATION_PROFILE_BULK: SimulationSettings(
+        fixed_delta_seconds=0.1,
+        no_rendering_mode=True,
+        max_substep_delta_time=0.02,
+        max_substeps=5,
+        hybrid_physics=True,
+        headless=True,
+    ),
+}
+
 
 @dataclass
 class WeatherConfig:
@@ -34,6 +84,37 @@ class WeatherConfig:
 
 DEFAULT_WEATHER = WeatherConfig()
 
+WEATHER_PRESETS: Dict[str, WeatherConfig] = {
+    "default": DEFAULT_WEATHER,
+    "clear-noon": WeatherConfig(
+        cloudiness=5.0, precipitation=0.0, wind_intensity=10.0, sun_altitude_angle=45.0, wetness=0.0
+    ),
+    "cloudy-noon": WeatherConfig(
+        cloudiness=60.0, precipitation=0.0, wind_intensity=10.0, sun_altitude_angle=45.0, wetness=0.0
+    ),
+    "wet-sunset": WeatherConfig(
+        cloudiness=20.0,
+        precipitation=0.0,
+        precipitation_deposits=50.0,
+        wind_intensity=10.0,
+        sun_altitude_angle=15.0,
+        wetness=50.0,
+    ),
+    "hard-rain-noon": WeatherConfig(
+        cloudiness=100.0,
+        precipitation=100.0,
+        precipitation_deposits=90.0,
+        wind_intensity=100.0,
+        sun_altitude_angle=45.0,
+        fog_density=7.0,
+        wetness=100.0,
+    ),
+    "foggy-morning": WeatherConfig(
+        cloudiness=30.0, precipitation=0.0, sun_altitude_angle=10.0, fog_density=60.0, wetness=0.0
+    ),
+    "clear-night": WeatherConfig(cloudiness=5.0, precipitation=0.0, sun_altitude_angle=-90.0, wetness=0.0),
+}
+
 CAMERA_HEIGHT = 2.4
 
 
@@ -43,10 +124,29 @@ class CameraConfig:
     image_size_y: int = 256
     pos_z: float = 1.6
     pos_x: float = 0.9
+    # Horizontal field of view and mounting angles, in degrees
+    fov: float = 90.0
+    pitch: float = 0.0
+    yaw: float = 0.0
 
 
 DEFAULT_CAMERA_CONFIG = CameraConfig()
 
+FRAME_POLICY_WAIT = "wait"
+FRAME_POLICY_REUSE = "reuse"
+FRAME_POLICIES = [FRAME_POLICY_WAIT, FRAME_POLICY_REUSE]
+
+
+@dataclass
+class FrameSyncConfig:
+    policy: str = FRAME_POLICY_WAIT
+    timeout_seconds: float = 0.1
+    max_reuse_age_frames: int = 2
+    histogram_max_age_frames: int = 32
+
+
+DEFAULT_FRAME_SYNC_CONFIG = FrameSyncConfig()
+
 LIDAR_CHANNELS = 64
 LIDAR_RANGE = 100
 LIDAR_POINTS_PER_SECOND = 250000
@@ -54,6 +154,26 @@ LIDAR_ROTATION_FREQUENCY = 20
 SEMANTIC_LIDAR_POINTS_PER_SECOND = 100000
 LIDAR_RANGE_MULTIPLIER = 2.0
 
+# Rates a consumer of the sensor grid display asks for; the simulation rate
+# (1 / fixed_delta_seconds) caps them
+DISPLAY_PRIMARY_SENSOR_HZ = 20.0
+DISPLAY_SECONDARY_SENSOR_HZ = 5.0
+
+# Threads processing LiDAR, radar and copied camera frames off the sensor
+# callback threads; 0 processes them inside the callbacks
+DEFAULT_SENSOR_WORKER_THREADS = 0
+
+SENSOR_PROFILE_FULL = "full"
+SENSOR_PROFILE_CONSUMER = "consumer"
+SENSOR_PROFILES = [SENSOR_PROFILE_FULL, SENSOR_PROFILE_CONSUMER]
+
+RADAR_RANGE = 50
+RADAR_HORIZONTAL_FOV = 30
+RADAR_VERTICAL_FOV = 10
+RADAR_POINTS_PER_SECOND = 1500
+RADAR_CLOSING_SPEED_THRESHOLD_MPS = 0.5
+RADAR_POINT_RADIUS_PIXELS = 1
+
 
 @dataclass
 class DisplayConfig:
@@ -66,6 +186,19 @@ DEFAULT_GRID_SIZE = [2, 3]
 DEFAULT_WINDOW_WIDTH = 1280
 DEFAULT_WINDOW_HEIGHT = 720
 
+DEFAULT_SHARED_DISPLAY_NAME = "carla_display"
+SHARED_DISPLAY_SLOTS = 3
+SHARED_DISPLAY_POLL_SECONDS = 0.005
+SHARED_DISPLAY_ATTACH_TIMEOUT_SECONDS = 30.0
+
+# Spans kept by the tracer before the oldest are overwritten
+DEFAULT_TRACE_CAPACITY = 1 << 18
+
+# Per-tick telemetry rows kept in memory; at 1 kHz this is over a minute
+# of slack for the background flush
+DEFAULT_TELEMETRY_CAPACITY = 1 << 16
+TELEMETRY_FLUSH_SECONDS = 0.5
+
 
 @dataclass
 class ModelConfig:
@@ -77,10 +210,72 @@ class ModelConfig:
     image_width: int = 640
     height_crop_portion: float = 0.4
     width_crop_portion: float = 0.5
+    # Further downscaling of the cropped region before edge detection
+    input_scale: float = 1.0
 
 
 DEFAULT_MODEL_CONFIG = ModelConfig()
 
+DEFAULT_TRAINING_DATA_DIR = "archive/train_label"
+VALIDATION_SPLIT = 0.2
+TRAINING_BATCH_SIZE = 32
+
+DEFAULT_DATASET_DIR = "archive/generated"
+DATASET_SHARD_SIZE = 500
+DATASET_CAPTURE_INTERVAL_TICKS = 2
+DATASET_VEHICLES_PER_SERVER = 4
+# Frames below this speed (waiting at lights) add little but duplicates
+DATASET_MIN_SPEED_KPH = 5.0
+# Lane direction is taken this far ahead of the vehicle along its lane
+DATASET_LABEL_LOOKAHEAD_METERS = 5.0
+
+# Near-duplicate filtering: edge maps are hashed on a DEDUP_HASH_SIZE square
+# grid, and frames within the Hamming distance of a kept frame whose steering
+# differs by at most the tolerance are dropped
+DEDUP_HASH_SIZE = 8
+DEDUP_HAMMING_THRESHOLD = 2
+DEDUP_LABEL_TOLERANCE_DEGREES = 0.5
+
+INFERENCE_MODE_EVERY_FRAME = "every-frame"
+INFERENCE_MODE_INTERVAL = "interval"
+INFERENCE_MODE_ASYNC = "async"
+INFERENCE_MODES = [INFERENCE_MODE_EVERY_FRAME, INFERENCE_MODE_INTERVAL, INFERENCE_MODE_ASYNC]
+
+STEERING_HOLD = "hold"
+STEERING_EXTRAPOLATE = "extrapolate"
+STEERING_HOLD_POLICIES = [STEERING_HOLD, STEERING_EXTRAPOLATE]
+
+
+@dataclass
+class InferenceScheduleConfig:
+    mode: str = INFERENCE_MODE_EVERY_FRAME
+    interval_frames: int = 3
+    steering_policy: str = STEERING_HOLD
+    max_extrapolation_frames: int = 5
+
+
+DEFAULT_INFERENCE_SCHEDULE = InferenceScheduleConfig()
+
+
+@dataclass
+class ChangeGateConfig:
+    # Mean absolute change of the block-averaged edge map, in [0, 1], below
+    # which the previous angle is reused
+    threshold: float = 0.01
+    downsample_factor: int = 8
+    max_consecutive_skips: int = 5
+
+
+DEFAULT_CHANGE_GATE = ChangeGateConfig()
+
+MODEL_RELOAD_POLL_SECONDS = 1.0
+MODEL_WARMUP_RUNS = 5
+# In-loop predictions of a swapped-in model before it is compared with the previous one
+MODEL_SWAP_REPORT_PREDICTIONS = 100
+
+# Recent prediction latencies kept for the p95 in LanePredictor.latency_summary
+PREDICT_LATENCY_WINDOW = 10000
+
 CANNY_THRESHOLD_LOW = 50
 CANNY_THRESHOLD_HIGH = 150
 NORMALIZATION_FACTOR = 255.0
@@ -103,16 +298,67 @@ THROTTLE_INCREMENT = 0.05
 BRAKE_INCREMENT = 0.2
 STEER_INCREMENT = 0.05
 MANUAL_CONTROL_FPS = 60
+# Simulation steps run back to back after a stall before skipping ahead
+MAX_CATCH_UP_STEPS = 5
+# Recent input latencies kept for the p95 in the control window summary
+INPUT_LATENCY_WINDOW = 10000
 
 SPAWN_DELAY_SECONDS = 5
 TOWN05_GOOD_ROAD_IDS = [37]
 
+# Lane centerline index: sample spacing along lanes and grid cell size
+LANE_INDEX_SPACING_METERS = 1.0
+LANE_INDEX_CELL_METERS = 4.0
+DEFAULT_LANE_INDEX_CACHE_DIR = ".cache/lane_index"
+
+DEFAULT_SWEEP_CACHE_DIR = ".cache/sweep"
+SWEEP_EPISODE_TICKS = 600
+SWEEP_WARMUP_TICKS = 20
+
 COLOR_WHITE = (255, 255, 255)
 COLOR_BLACK = (0, 0, 0)
 COLOR_RED = (0, 0, 255)
 COLOR_GREEN = (0, 255, 0)
 COLOR_BLUE = (255, 0, 0)
 
+# Radar bird's-eye colors (RGB, as drawn by pygame)
+RADAR_COLOR_CLOSING = (255, 60, 60)
+RADAR_COLOR_RECEDING = (60, 120, 255)
+RADAR_COLOR_STATIC = (255, 255, 255)
+
+# CARLA semantic tags (index = ObjTag), CityScapes palette in RGB
+SEMANTIC_TAG_COLORS = [
+    (0, 0, 0),  # Unlabeled
+    (128, 64, 128),  # Roads
+    (244, 35, 232),  # SideWalks
+    (70, 70, 70),  # Building
+    (102, 102, 156),  # Wall
+    (190, 153, 153),  # Fence
+    (153, 153, 153),  # Pole
+    (250, 170, 30),  # TrafficLight
+    (220, 220, 0),  # TrafficSign
+    (107, 142, 35),  # Vegetation
+    (152, 251, 152),  # Terrain
+    (70, 130, 180),  # Sky
+    (220, 20, 60),  # Pedestrian
+    (255, 0, 0),  # Rider
+    (0, 0, 142),  # Car
+    (0, 0, 70),  # Truck
+    (0, 60, 100),  # Bus
+    (0, 80, 100),  # Train
+    (0, 0, 230),  # Motorcycle
+    (119, 11, 32),  # Bicycle
+    (110, 190, 160),  # Static
+    (170, 120, 50),  # Dynamic
+    (55, 90, 80),  # Other
+    (45, 60, 150),  # Water
+    (157, 234, 50),  # RoadLine
+    (81, 0, 81),  # Ground
+    (150, 100, 100),  # Bridge
+    (230, 150, 140),  # RailTrack
+    (180, 165, 180),  # GuardRail
+]
+
 SENSOR_TYPE_RGB_CAMERA = "RGBCamera"
 SENSOR_TYPE_LIDAR = "LiDAR"
 SENSOR_TYPE_SEMANTIC_LIDAR = "SemanticLiDAR"
@@ -1,11 +1,18 @@
 """Manual vehicle control using Pygame.
 
 This script provides a Pygame-based manual control interface for a vehicle
-that has already been spawned in CARLA.
+that has already been spawned in CARLA. The simulation advances at real time
+in steps of fixed_delta_seconds, keyboard input is sampled at its own rate,
+and the window shows the ego camera, redrawn only when a new frame arrives.
 """
 import argparse
+import time
+import numpy as np
 import pygame
 import carla
+from collections import deque
+from dataclasses import replace
+from typing import Optional, Tuple
 
 from .config import (
     DEFAULT_CARLA_HOST,
@@ -16,11 +23,17 @@ from .config import (
     BRAKE_INCREMENT,
     STEER_INCREMENT,
     MANUAL_CONTROL_FPS,
+    MAX_CATCH_UP_STEPS,
+    INPUT_LATENCY_WINDOW,
+    DEFAULT_CAMERA_CONFIG,
+    DEFAULT_SIMULATION_SETTINGS,
 )
 from .carla_utils import (
     create_client,
     find_vehicle_by_pattern,
 )
+from .frame_sync import FrameBuffer, attach_camera
+from .tracing import enable_tracing, get_tracer, trace_span
 
 
 class ManualController:
@@ -36,13 +49,19 @@ class ManualController:
         self.vehicle = vehicle
         self.world = world
         self.control = carla.VehicleControl()
+        # Time of the earliest input sample not yet applied by a tick
+        self.pending_input_time: Optional[float] = None
 
-    def update_control_from_keys(self, keys: pygame.key.ScancodeWrapper) -> None:
+    def update_control_from_keys(self, keys: pygame.key.ScancodeWrapper, sampled_at: Optional[float] = None) -> None:
         """Update vehicle control based on pressed keys.
 
         Args:
             keys: Pygame key state from pygame.key.get_pressed().
+            sampled_at: time.perf_counter() when the keys were read, kept
+                for latency measurement if the control changes.
         """
+        previous = (self.control.throttle, self.control.brake, self.control.steer, self.control.hand_brake)
+
         # Throttle control (W/↑)
         if keys[pygame.K_UP] or keys[pygame.K_w]:
             self.control.throttle = min(self.control.throttle + THROTTLE_INCREMENT, 1.0)
@@ -66,49 +85,175 @@ class ManualController:
         # Handbrake (Space)
         self.control.hand_brake = keys[pygame.K_SPACE]
 
+        current = (self.control.throttle, self.control.brake, self.control.steer, self.control.hand_brake)
+        if sampled_at is not None and current != previous and self.pending_input_time is None:
+            self.pending_input_time = sampled_at
+
     def apply_control(self) -> None:
         """Apply the current control state to the vehicle."""
         self.vehicle.apply_control(self.control)
 
 
+class FixedStepScheduler:
+    """Wall-clock schedule of fixed-length steps.
+
+    due_steps() returns how many steps have come due since the last call.
+    After a stall, at most max_catch_up_steps are run back to back and the
+    rest are dropped, so the schedule skips ahead instead of spiralling.
+    """
+
+    def __init__(self, step_seconds: float, max_catch_up_steps: int = MAX_CATCH_UP_STEPS) -> None:
+        self.step_seconds = step_seconds
+        self.max_catch_up_steps = max_catch_up_steps
+        self.next_step_time: Optional[float] = None
+        self.steps = 0
+        self.dropped_steps = 0
+
+    def due_steps(self, now: float) -> int:
+        if self.next_step_time is None:
+            self.next_step_time = now
+        if now < self.next_step_time:
+            return 0
+
+        steps = int((now - self.next_step_time) // self.step_seconds) + 1
+        if steps > self.max_catch_up_steps:
+            self.dropped_steps += steps - self.max_catch_up_steps
+            steps = self.max_catch_up_steps
+            self.next_step_time = now + self.step_seconds
+        else:
+            self.next_step_time += steps * self.step_seconds
+        self.steps += steps
+        return steps
+
+
+class ControlTimingStats:
+    def __init__(self) -> None:
+        self.input_samples = 0
+        self.rendered_frames = 0
+        # Running totals, plus a bounded window of recent latencies for the p95
+        self.input_latency_count = 0
+        self.input_latency_ms_total = 0.0
+        self.recent_input_latencies_ms: deque = deque(maxlen=INPUT_LATENCY_WINDOW)
+
+    def record_input_latency(self, sampled_at: float, applied_at: float) -> None:
+        latency_ms = 1000.0 * (applied_at - sampled_at)
+        self.input_latency_count += 1
+        self.input_latency_ms_total += latency_ms
+        self.recent_input_latencies_ms.append(latency_ms)
+
+    def summary(self, scheduler: FixedStepScheduler, elapsed_seconds: float) -> dict:
+        recent = np.array(self.recent_input_latencies_ms or [0.0])
+        elapsed_seconds = max(elapsed_seconds, 1e-9)
+        return {
+            "step_rate_hz": scheduler.steps / elapsed_seconds,
+            "dropped_steps": scheduler.dropped_steps,
+            "input_rate_hz": self.input_samples / elapsed_seconds,
+            "render_rate_hz": self.rendered_frames / elapsed_seconds,
+            "mean_input_latency_ms": (
+                self.input_latency_ms_total / self.input_latency_count if self.input_latency_count else 0.0
+            ),
+            # Over the last INPUT_LATENCY_WINDOW inputs
+            "p95_input_latency_ms": float(np.percentile(recent, 95)),
+        }
+
+
+def attach_ego_camera(
+    world: carla.World, vehicle: carla.Vehicle, window_size: tuple
+) -> Tuple[carla.Sensor, FrameBuffer]:
+    """Attach an RGB camera rendering at the window size.
+
+    Args:
+        world: CARLA world instance.
+        vehicle: Vehicle to attach the camera to.
+        window_size: Pygame window (width, height).
+
+    Returns:
+        Tuple of (camera actor, frame buffer tagged with simulation frame ids).
+    """
+    camera_config = replace(DEFAULT_CAMERA_CONFIG, image_size_x=window_size[0], image_size_y=window_size[1])
+    return attach_camera(world, vehicle, camera_config)
+
+
 def run_control_loop(
     vehicle: carla.Vehicle,
     world: carla.World,
     window_size: tuple = (512, 256),
-) -> None:
+    input_hz: float = MANUAL_CONTROL_FPS,
+    max_catch_up_steps: int = MAX_CATCH_UP_STEPS,
+) -> dict:
     """Run the manual control loop.
 
+    The simulation is stepped on a wall-clock schedule of
+    fixed_delta_seconds, so simulated time runs at real time. Keyboard input
+    is sampled at input_hz independently of it, and the window is redrawn
+    only when the ego camera delivers a new frame.
+
     Args:
         vehicle: Vehicle to control.
         world: CARLA world instance.
         window_size: Pygame window (width, height).
+        input_hz: Keyboard sampling rate.
+        max_catch_up_steps: Most simulation steps run back to back after a stall.
+
+    Returns:
+        Dictionary of step, input and render rates and input-to-control latency.
     """
     pygame.init()
     pygame.display.set_caption("Pygame CARLA manual control window")
     screen = pygame.display.set_mode(window_size)
 
+    step_seconds = world.get_settings().fixed_delta_seconds or DEFAULT_SIMULATION_SETTINGS.fixed_delta_seconds
+    scheduler = FixedStepScheduler(step_seconds, max_catch_up_steps)
+    input_scheduler = FixedStepScheduler(1.0 / input_hz, max_catch_up_steps=1)
+    stats = ControlTimingStats()
+
     controller = ManualController(vehicle, world)
-    clock = pygame.time.Clock()
+    camera, frame_buffer = attach_ego_camera(world, vehicle, window_size)
+    last_rendered_frame = -1
+    start = time.perf_counter()
     done = False
 
-    while not done:
-        # Update control based on keyboard input
-        keys = pygame.key.get_pressed()
-        controller.update_control_from_keys(keys)
-        controller.apply_control()
-
-        # Advance simulation
-        world.tick()
-
-        # Handle pygame events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                done = True
-
-        # Update display
-        pygame.display.flip()
-        pygame.display.update()
-        clock.tick(MANUAL_CONTROL_FPS)
+    try:
+        while not done:
+            now = time.perf_counter()
+
+            # Sample keyboard input at its own rate
+            if input_scheduler.due_steps(now):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        done = True
+                controller.update_control_from_keys(pygame.key.get_pressed(), sampled_at=now)
+                stats.input_samples += 1
+
+            # Advance simulation by every step that has come due
+            steps = scheduler.due_steps(now)
+            if steps:
+                controller.apply_control()
+            for _ in range(steps):
+                with trace_span("world.tick"):
+                    world.tick()
+                if controller.pending_input_time is not None:
+                    stats.record_input_latency(controller.pending_input_time, time.perf_counter())
+                    controller.pending_input_time = None
+
+            # Redraw only for a new camera frame
+            image, frame = frame_buffer.latest()
+            if frame != last_rendered_frame:
+                with trace_span("display.flip"):
+                    screen.blit(pygame.image.frombuffer(image, window_size, "BGRA"), (0, 0))
+                    pygame.display.flip()
+                last_rendered_frame = frame
+                stats.rendered_frames += 1
+
+            # Sleep until the next step or input sample is due
+            next_time = min(scheduler.next_step_time, input_scheduler.next_step_time)
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+    finally:
+        camera.stop()
+        camera.destroy()
+        pygame.quit()
+
+    return stats.summary(scheduler, time.perf_counter() - start)
 
 
 def main(args: argparse.Namespace) -> None:
@@ -120,6 +265,9 @@ def main(args: argparse.Namespace) -> None:
     Raises:
         RuntimeError: If no vehicle is found matching the filter pattern.
     """
+    if args.trace:
+        enable_tracing()
+
     # Connect to CARLA
     client = create_client(args.host, args.port, CARLA_TIMEOUT_SECONDS)
     world = client.get_world()
@@ -136,7 +284,20 @@ def main(args: argparse.Namespace) -> None:
     print(f"Controlling vehicle: {vehicle.type_id}")
 
     # Run control loop
-    run_control_loop(vehicle, world, (args.width, args.height))
+    try:
+        summary = run_control_loop(
+            vehicle,
+            world,
+            (args.width, args.height),
+            input_hz=args.input_hz,
+            max_catch_up_steps=args.max_catch_up,
+        )
+        print(", ".join(f"{key}: {value:.3f}" for key, value in summary.items()))
+    finally:
+        # Timeline of tick and render spans
+        if args.trace:
+            get_tracer().export(args.trace)
+            print(f"Trace written to {args.trace}")
 
 
 def parse_args() -> argparse.Namespace:
@@ -170,6 +331,26 @@ def parse_args() -> argparse.Namespace:
         default="512x256",
         help="window resolution (default: 512x256)",
     )
+    argparser.add_argument(
+        "--input-hz",
+        metavar="HZ",
+        default=MANUAL_CONTROL_FPS,
+        type=float,
+        help=f"Keyboard sampling rate, independent of the simulation step (default: {MANUAL_CONTROL_FPS})",
+    )
+    argparser.add_argument(
+        "--max-catch-up",
+        metavar="N",
+        default=MAX_CATCH_UP_STEPS,
+        type=int,
+        help=f"Most simulation steps run back to back after a stall (default: {MAX_CATCH_UP_STEPS})",
+    )
+    argparser.add_argument(
+        "--trace",
+        metavar="PATH",
+        default=None,
+        help="Record tick and render spans and write them as Chrome trace-event JSON to PATH on exit",
+    )
 
     args = argparser.parse_args()
     args.width, args.height = [int(x) for x in args.res.split("x")]
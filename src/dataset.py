@@ -0,0 +1,88 @@
+import os
+import random
+import cv2
+import numpy as np
+from typing import List, Optional, Tuple
+
+from .config import ModelConfig, DEFAULT_MODEL_CONFIG, NORMALIZATION_FACTOR, DEFAULT_TRAINING_DATA_DIR
+from .lane_predictor import ImagePreprocessor
+
+
+def parse_steering_label(file_stem: str, yaw_adjustment_degrees: float) -> float:
+    # Labels are stored as the last "_"-separated part of the file name
+    return float(file_stem.split("_")[-1]) / yaw_adjustment_degrees
+
+
+def list_labeled_images(img_dir: str = DEFAULT_TRAINING_DATA_DIR, seed: Optional[int] = None) -> List[str]:
+    stems = [os.path.splitext(f)[0] for f in os.listdir(img_dir) if f.endswith(".png")]
+    random.Random(seed).shuffle(stems)
+    return stems
+
+
+def load_edge_maps(
+    img_dir: str = DEFAULT_TRAINING_DATA_DIR,
+    config: Optional[ModelConfig] = None,
+    stems: Optional[List[str]] = None,
+    seed: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Load a labeled image directory as uint8 edge maps and raw labels.
+
+    Images go through the same ImagePreprocessor.edge_map as frames at
+    inference time.
+
+    Returns:
+        Tuple of (edge maps of shape (N, H, W), labels divided by the yaw
+        adjustment).
+    """
+    config = config or DEFAULT_MODEL_CONFIG
+    preprocessor = ImagePreprocessor(config)
+    stems = stems if stems is not None else list_labeled_images(img_dir, seed)
+
+    height, width, _ = preprocessor.output_shape()
+    edges = np.empty((len(stems), height, width), dtype=np.uint8)
+    labels = np.empty(len(stems), dtype=np.float32)
+    for index, stem in enumerate(stems):
+        image = cv2.imread(os.path.join(img_dir, stem + ".png"), cv2.IMREAD_GRAYSCALE)
+        edges[index] = preprocessor.edge_map(image)
+        labels[index] = parse_steering_label(stem, config.yaw_adjustment_degrees)
+
+    return edges, labels
+
+
+def list_shards(shard_dir: str) -> List[str]:
+    return sorted(os.path.join(shard_dir, f) for f in os.listdir(shard_dir) if f.endswith(".npz"))
+
+
+def load_shard_edge_maps(
+    shard_paths: List[str], config: Optional[ModelConfig] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Load dataset_factory shards as uint8 edge maps and raw labels.
+
+    Returns the same arrays as load_edge_maps, so shards and labeled image
+    directories train the same way.
+    """
+    config = config or DEFAULT_MODEL_CONFIG
+    preprocessor = ImagePreprocessor(config)
+    height, width, _ = preprocessor.output_shape()
+
+    edge_chunks, label_chunks = [], []
+    for path in shard_paths:
+        with np.load(path) as shard:
+            images = shard["images"]
+            edges = np.empty((images.shape[0], height, width), dtype=np.uint8)
+            for index, image in enumerate(images):
+                edges[index] = preprocessor.edge_map(image)
+            edge_chunks.append(edges)
+            label_chunks.append(shard["labels_degrees"] / np.float32(config.yaw_adjustment_degrees))
+
+    if not edge_chunks:
+        return np.empty((0, height, width), dtype=np.uint8), np.empty(0, dtype=np.float32)
+    return np.concatenate(edge_chunks), np.concatenate(label_chunks)
+
+
+def to_training_arrays(edges: np.ndarray, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Model inputs in [0, 1] with a channel axis, labels rescaled to [-1, 1]
+    x = (edges / NORMALIZATION_FACTOR).astype(np.float32)[:, :, :, np.newaxis]
+    true_max = max(abs(float(labels.min())), float(labels.max()))
+    y = labels * (1.0 / true_max) if true_max else labels.copy()
+    return x, y
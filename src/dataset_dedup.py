@@ -0,0 +1,326 @@
+"""Drop near-duplicate frames from a training dataset.
+
+Consecutive driving frames barely differ, so most of a recorded dataset
+repeats what the model has already seen. Every edge map is reduced to a
+small perceptual hash, and a frame is dropped when a kept frame has a hash
+within a Hamming distance and a steering label within a tolerance. The
+held-out validation frames are never filtered, and with --epochs the lane
+model is trained on the full and on the filtered training set to compare
+training time and validation MSE:
+
+    python -m src.dataset_dedup --data archive/train_label --epochs 10
+    python -m src.dataset_dedup --data archive/generated --threshold 3 --keep-list kept.txt
+"""
+import argparse
+import os
+import time
+import numpy as np
+import keras
+from typing import Dict, List, Optional, Tuple
+
+from .config import (
+    ModelConfig,
+    DEFAULT_MODEL_CONFIG,
+    DEFAULT_TRAINING_DATA_DIR,
+    VALIDATION_SPLIT,
+    TRAINING_BATCH_SIZE,
+    DEDUP_HASH_SIZE,
+    DEDUP_HAMMING_THRESHOLD,
+    DEDUP_LABEL_TOLERANCE_DEGREES,
+)
+from .dataset import list_labeled_images, list_shards, load_edge_maps, load_shard_edge_maps, to_training_arrays
+from .lane_models import LANE_MODEL_VARIANTS, build_lane_model
+
+
+# Set bits per byte value
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+_HASH_CHUNK_SIZE = 4096
+
+
+def edge_map_hashes(edges: np.ndarray, hash_size: int = DEDUP_HASH_SIZE) -> np.ndarray:
+    """Perceptual hashes of a batch of edge maps.
+
+    Each map is split into a hash_size x hash_size grid of blocks, and a bit
+    is set for every block with more edge pixels than the map's average
+    block, so the hash follows where the lane markings are.
+
+    Args:
+        edges: (N, H, W) uint8 edge maps.
+        hash_size: Blocks per side; hashes have hash_size**2 bits.
+
+    Returns:
+        (N, ceil(hash_size**2 / 8)) uint8 packed hashes.
+    """
+    count, height, width = edges.shape
+    block_height, block_width = height // hash_size, width // hash_size
+    if block_height == 0 or block_width == 0:
+        raise ValueError(f"Edge maps of {height}x{width} are smaller than the {hash_size}x{hash_size} hash grid")
+
+    packed = np.empty((count, (hash_size * hash_size + 7) // 8), dtype=np.uint8)
+    # Trailing rows and columns that do not fill a block are ignored
+    trimmed = edges[:, : block_height * hash_size, : block_width * hash_size]
+    for start in range(0, count, _HASH_CHUNK_SIZE):
+        chunk = trimmed[start : start + _HASH_CHUNK_SIZE]
+        blocks = chunk.reshape(chunk.shape[0], hash_size, block_height, hash_size, block_width).sum(
+            axis=(2, 4), dtype=np.uint32
+        )
+        blocks = blocks.reshape(chunk.shape[0], -1)
+        bits = blocks > blocks.mean(axis=1, keepdims=True)
+        packed[start : start + chunk.shape[0]] = np.packbits(bits, axis=1)
+    return packed
+
+
+def hamming_distances(hashes: np.ndarray, query: np.ndarray) -> np.ndarray:
+    # Packed hashes (N, B) against one packed hash (B,)
+    return _POPCOUNT[hashes ^ query].sum(axis=1, dtype=np.int32)
+
+
+class HashIndex:
+    """Packed hashes bucketed by bands of bits for Hamming radius lookups.
+
+    The bits are split into max_distance + 1 disjoint bands. Two hashes
+    within max_distance differ in at most max_distance bands, so they agree
+    exactly on at least one, and only hashes sharing a band bucket with the
+    query need their distance computed.
+    """
+
+    def __init__(self, bits: int, max_distance: int = DEDUP_HAMMING_THRESHOLD) -> None:
+        self.bits = bits
+        self.max_distance = max_distance
+        self.bands = np.array_split(np.arange(bits), min(max_distance + 1, bits))
+        self.buckets: List[Dict[bytes, List[int]]] = [{} for _ in self.bands]
+        self.count = 0
+        # Grown by doubling; rows past count are unused
+        self.ids = np.empty(64, dtype=np.int64)
+        self.hashes = np.empty((64, (bits + 7) // 8), dtype=np.uint8)
+
+    def band_keys(self, hashes: np.ndarray) -> List[Tuple[bytes, ...]]:
+        # Bucket keys of many packed hashes, computed in one pass
+        bits = np.unpackbits(hashes, axis=1)[:, : self.bits]
+        bands = [np.packbits(bits[:, band], axis=1) for band in self.bands]
+        return [tuple(band[row].tobytes() for band in bands) for row in range(hashes.shape[0])]
+
+    def add(self, item_id: int, packed_hash: np.ndarray, keys: Optional[Tuple[bytes, ...]] = None) -> None:
+        if self.count == self.ids.shape[0]:
+            self.ids = np.resize(self.ids, 2 * self.count)
+            self.hashes = np.resize(self.hashes, (2 * self.count, self.hashes.shape[1]))
+        slot = self.count
+        self.ids[slot] = item_id
+        self.hashes[slot] = packed_hash
+        self.count += 1
+        for bucket, key in zip(self.buckets, keys or self.band_keys(packed_hash[np.newaxis])[0]):
+            bucket.setdefault(key, []).append(slot)
+
+    def query(
+        self, packed_hash: np.ndarray, keys: Optional[Tuple[bytes, ...]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Ids of the added hashes within max_distance and their distances."""
+        slots = set()
+        for bucket, key in zip(self.buckets, keys or self.band_keys(packed_hash[np.newaxis])[0]):
+            slots.update(bucket.get(key, ()))
+        if not slots:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+
+        slots = np.fromiter(slots, dtype=np.int64, count=len(slots))
+        distances = hamming_distances(self.hashes[slots], packed_hash)
+        close = distances <= self.max_distance
+        return self.ids[slots[close]], distances[close]
+
+    def __len__(self) -> int:
+        return self.count
+
+
+def deduplicate(
+    edges: np.ndarray,
+    labels: np.ndarray,
+    hamming_threshold: int = DEDUP_HAMMING_THRESHOLD,
+    label_tolerance: float = DEDUP_LABEL_TOLERANCE_DEGREES / DEFAULT_MODEL_CONFIG.yaw_adjustment_degrees,
+    hash_size: int = DEDUP_HASH_SIZE,
+) -> np.ndarray:
+    """Indices of the frames to keep, in their original order.
+
+    Frames are visited in order; a frame is dropped when an already kept
+    frame is within hamming_threshold and its label within label_tolerance.
+
+    Args:
+        edges: (N, H, W) uint8 edge maps.
+        labels: (N,) steering labels, in the units of label_tolerance.
+        hamming_threshold: Largest hash distance still counted as a duplicate.
+        label_tolerance: Largest label difference still counted as a duplicate.
+        hash_size: Hash grid blocks per side.
+    """
+    hashes = edge_map_hashes(edges, hash_size)
+    index = HashIndex(hash_size * hash_size, hamming_threshold)
+    keys = index.band_keys(hashes)
+    keep = []
+    for i in range(hashes.shape[0]):
+        neighbours, _ = index.query(hashes[i], keys[i])
+        if neighbours.size and np.any(np.abs(labels[neighbours] - labels[i]) <= label_tolerance):
+            continue
+        index.add(i, hashes[i], keys[i])
+        keep.append(i)
+    return np.asarray(keep, dtype=np.int64)
+
+
+def train_and_validate(
+    x_train: np.ndarray,
+    y_train: np.ndarray,
+    x_val: np.ndarray,
+    y_val: np.ndarray,
+    variant_name: str,
+    epochs: int,
+    seed: int,
+) -> Dict[str, float]:
+    # Same initial weights and batch order for every training set compared
+    keras.utils.set_random_seed(seed)
+    model = build_lane_model(LANE_MODEL_VARIANTS[variant_name], x_train.shape[1:])
+    model.compile(loss="mean_squared_error", optimizer="adam")
+
+    start = time.perf_counter()
+    history = model.fit(
+        x_train,
+        y_train,
+        batch_size=TRAINING_BATCH_SIZE,
+        shuffle=False,
+        epochs=epochs,
+        validation_data=(x_val, y_val),
+        verbose=0,
+    )
+    return {
+        "train_s": time.perf_counter() - start,
+        "val_mse": float(history.history["val_loss"][-1]),
+    }
+
+
+def load_dataset(args: argparse.Namespace, config: ModelConfig) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Edge maps, labels and a name per frame, in a seeded random order."""
+    shards = list_shards(args.data)
+    if shards:
+        edges, labels = load_shard_edge_maps(shards, config)
+        names = []
+        for path in shards:
+            with np.load(path) as shard:
+                names.extend(f"{os.path.basename(path)}:{row}" for row in range(shard["labels_degrees"].shape[0]))
+        order = np.random.default_rng(args.seed).permutation(labels.shape[0])[: args.limit or None]
+        print(f"{len(shards)} shards from {args.data}")
+        return edges[order], labels[order], [names[i] for i in order]
+
+    stems = list_labeled_images(args.data, seed=args.seed)
+    if args.limit:
+        stems = stems[: args.limit]
+    edges, labels = load_edge_maps(args.data, config, stems=stems)
+    print(f"{len(stems)} labeled images from {args.data}")
+    return edges, labels, stems
+
+
+def main(args: argparse.Namespace) -> None:
+    """Entry point for dataset deduplication.
+
+    Args:
+        args: Command-line arguments.
+    """
+    variant = LANE_MODEL_VARIANTS[args.variant]
+    config = variant.model_config()
+    edges, labels, names = load_dataset(args, config)
+
+    # The validation frames stay as they are so both training sets are
+    # scored on the same data
+    validation_count = int(labels.shape[0] * VALIDATION_SPLIT)
+    train = np.arange(labels.shape[0] - validation_count)
+    validation = np.arange(labels.shape[0] - validation_count, labels.shape[0])
+
+    start = time.perf_counter()
+    keep = train[
+        deduplicate(
+            edges[train],
+            labels[train],
+            hamming_threshold=args.threshold,
+            label_tolerance=args.label_tolerance / config.yaw_adjustment_degrees,
+            hash_size=args.hash_size,
+        )
+    ]
+    dedup_seconds = time.perf_counter() - start
+    print(
+        f"Kept {keep.shape[0]} of {train.shape[0]} training frames "
+        f"({100.0 * (1.0 - keep.shape[0] / max(train.shape[0], 1)):.1f}% fewer) in {dedup_seconds:.2f} s"
+    )
+
+    if args.keep_list:
+        with open(args.keep_list, "w") as f:
+            f.writelines(f"{names[i]}\n" for i in np.concatenate([keep, validation]))
+        print(f"Kept frame names (training and validation) written to {args.keep_list}")
+
+    if args.epochs <= 0:
+        return
+
+    x, y = to_training_arrays(edges, labels)
+    results = {}
+    for name, rows in (("all", train), ("deduplicated", keep)):
+        print(f"Training {args.variant} on {name} frames...")
+        results[name] = train_and_validate(
+            x[rows], y[rows], x[validation], y[validation], args.variant, args.epochs, args.seed
+        )
+
+    print(f"{'training set':<14} {'frames':>8} {'train s':>8} {'val MSE':>9}")
+    for name, rows in (("all", train), ("deduplicated", keep)):
+        result = results[name]
+        print(f"{name:<14} {rows.shape[0]:>8} {result['train_s']:>8.1f} {result['val_mse']:>9.4f}")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    argparser = argparse.ArgumentParser(description="Drop near-duplicate frames from a training dataset")
+    argparser.add_argument(
+        "--data",
+        metavar="DIR",
+        default=DEFAULT_TRAINING_DATA_DIR,
+        help=f"Directory of labeled images or .npz shards (default: {DEFAULT_TRAINING_DATA_DIR})",
+    )
+    argparser.add_argument(
+        "--threshold",
+        default=DEDUP_HAMMING_THRESHOLD,
+        type=int,
+        help=f"Largest hash Hamming distance counted as a duplicate (default: {DEDUP_HAMMING_THRESHOLD})",
+    )
+    argparser.add_argument(
+        "--label-tolerance",
+        metavar="DEGREES",
+        default=DEDUP_LABEL_TOLERANCE_DEGREES,
+        type=float,
+        help="Largest steering label difference counted as a duplicate "
+        f"(default: {DEDUP_LABEL_TOLERANCE_DEGREES})",
+    )
+    argparser.add_argument(
+        "--hash-size",
+        default=DEDUP_HASH_SIZE,
+        type=int,
+        help=f"Hash grid blocks per side; hashes have the square of this in bits (default: {DEDUP_HASH_SIZE})",
+    )
+    argparser.add_argument("--limit", default=0, type=int, help="Use at most this many frames (default: all)")
+    argparser.add_argument("--seed", default=0, type=int, help="Shuffle and weight seed (default: 0)")
+    argparser.add_argument(
+        "--variant",
+        choices=list(LANE_MODEL_VARIANTS),
+        default="baseline",
+        help="Model variant trained with --epochs (default: baseline)",
+    )
+    argparser.add_argument(
+        "--epochs",
+        default=0,
+        type=int,
+        help="Train on the full and the deduplicated set for this many epochs and "
+        "compare them (default: 0, no training)",
+    )
+    argparser.add_argument(
+        "--keep-list",
+        metavar="PATH",
+        default=None,
+        help="Write the names of the kept frames to PATH, one per line (default: not written)",
+    )
+
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,344 @@
+"""Labeled lane-following data generated from Traffic Manager autopilot.
+
+Each local CARLA server gets its own generator process. A generator drives
+several vehicles on autopilot, captures the front camera of each with the
+same CameraConfig pose used for inference, and labels every frame with the
+yaw offset between the vehicle and the lane direction taken from the map.
+Frames are stored as grayscale images in compressed .npz shards, which
+dataset.load_shard_edge_maps feeds into training:
+
+    python -m src.dataset_factory --ports 2000 2002 --frames 5000 --out archive/generated
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import time
+import cv2
+import numpy as np
+import carla
+from typing import List, Optional
+
+from .config import (
+    DEFAULT_CARLA_HOST,
+    DEFAULT_CARLA_PORT,
+    CARLA_TIMEOUT_SECONDS,
+    TRAFFIC_MANAGER_PORT,
+    VEHICLE_BLUEPRINT_FILTER,
+    DEFAULT_CAMERA_CONFIG,
+    DEFAULT_FRAME_SYNC_CONFIG,
+    DEFAULT_DATASET_DIR,
+    DATASET_SHARD_SIZE,
+    DATASET_CAPTURE_INTERVAL_TICKS,
+    DATASET_VEHICLES_PER_SERVER,
+    DATASET_MIN_SPEED_KPH,
+    DATASET_LABEL_LOOKAHEAD_METERS,
+    MPS_TO_KPH_MULTIPLIER,
+    SIMULATION_PROFILE_DEFAULT,
+    SIMULATION_PROFILES,
+)
+from .carla_utils import (
+    create_client,
+    load_world_if_needed,
+    setup_synchronous_mode,
+    get_vehicle_blueprint,
+    destroy_actors,
+    restore_world_settings,
+)
+from .frame_sync import attach_camera
+
+
+def wrap_degrees(angle: float) -> float:
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+def lane_yaw_offset(
+    world_map: carla.Map, vehicle: carla.Vehicle, lookahead_meters: float = DATASET_LABEL_LOOKAHEAD_METERS
+) -> Optional[float]:
+    """Yaw of the vehicle relative to its lane, in degrees.
+
+    Positive when the vehicle points right of the lane direction, so the
+    label has the sign of the correction LanePredictor applies (steer is the
+    negated prediction). Returns None inside junctions, where the lane
+    direction is ambiguous.
+    """
+    transform = vehicle.get_transform()
+    waypoint = world_map.get_waypoint(transform.location, project_to_road=True)
+    if waypoint is None or waypoint.is_junction:
+        return None
+    if lookahead_meters > 0:
+        ahead = waypoint.next(lookahead_meters)
+        if ahead:
+            waypoint = ahead[0]
+    return wrap_degrees(transform.rotation.yaw - waypoint.transform.rotation.yaw)
+
+
+class ShardWriter:
+    """Accumulates labeled frames in preallocated arrays and writes full shards."""
+
+    def __init__(self, out_dir: str, prefix: str, image_shape: tuple, shard_size: int = DATASET_SHARD_SIZE) -> None:
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.images = np.empty((shard_size,) + tuple(image_shape), dtype=np.uint8)
+        self.labels = np.empty(shard_size, dtype=np.float32)
+        self.speeds = np.empty(shard_size, dtype=np.float32)
+        self.frames = np.empty(shard_size, dtype=np.int64)
+        self.count = 0
+        self.shards_written = 0
+        self.frames_written = 0
+        os.makedirs(out_dir, exist_ok=True)
+
+    def add(self, gray_image: np.ndarray, label_degrees: float, speed_kph: float, frame: int) -> None:
+        self.images[self.count] = gray_image
+        self.labels[self.count] = label_degrees
+        self.speeds[self.count] = speed_kph
+        self.frames[self.count] = frame
+        self.count += 1
+        if self.count == self.shard_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.count == 0:
+            return
+        path = os.path.join(self.out_dir, f"{self.prefix}_{self.shards_written:05d}.npz")
+        np.savez_compressed(
+            path,
+            images=self.images[: self.count],
+            labels_degrees=self.labels[: self.count],
+            speeds_kph=self.speeds[: self.count],
+            frames=self.frames[: self.count],
+        )
+        self.shards_written += 1
+        self.frames_written += self.count
+        self.count = 0
+
+
+def generate_on_server(
+    host: str,
+    port: int,
+    traffic_manager_port: int,
+    out_dir: str,
+    frames: int,
+    vehicles: int = DATASET_VEHICLES_PER_SERVER,
+    town: Optional[str] = None,
+    sim_profile: str = SIMULATION_PROFILE_DEFAULT,
+    capture_interval: int = DATASET_CAPTURE_INTERVAL_TICKS,
+    shard_size: int = DATASET_SHARD_SIZE,
+    seed: int = 0,
+    progress: Optional["multiprocessing.Queue"] = None,
+) -> int:
+    """Generate labeled frames on one server until frames are written.
+
+    Args:
+        host: Server host.
+        port: Server port.
+        traffic_manager_port: Traffic Manager port, unique per server.
+        out_dir: Directory for the shards.
+        frames: Labeled frames to write.
+        vehicles: Autopilot vehicles with a camera each.
+        town: Map to load (default: current map).
+        sim_profile: Simulation profile; it must keep rendering on.
+        capture_interval: Ticks between captures, so consecutive frames differ.
+        shard_size: Frames per shard.
+        seed: Seed for spawn point selection.
+        progress: Queue receiving (port, frames written) after every shard.
+
+    Returns:
+        Number of frames written.
+    """
+    simulation = SIMULATION_PROFILES[sim_profile]
+    if simulation.no_rendering_mode:
+        raise ValueError(f"Simulation profile '{sim_profile}' disables rendering; cameras would get no images")
+
+    client = create_client(host, port, CARLA_TIMEOUT_SECONDS)
+    world = load_world_if_needed(client, town)
+    world_map = world.get_map()
+    original_settings = setup_synchronous_mode(
+        world, client, traffic_manager_port=traffic_manager_port, simulation=simulation
+    )
+    writer = ShardWriter(
+        out_dir,
+        f"shard_{port}",
+        (DEFAULT_CAMERA_CONFIG.image_size_y, DEFAULT_CAMERA_CONFIG.image_size_x),
+        shard_size,
+    )
+    actors: List[carla.Actor] = []
+
+    try:
+        blueprint = get_vehicle_blueprint(world, VEHICLE_BLUEPRINT_FILTER)
+        spawn_points = world_map.get_spawn_points()
+        random.Random(seed + port).shuffle(spawn_points)
+
+        capture = []
+        for spawn_point in spawn_points[:vehicles]:
+            vehicle = world.try_spawn_actor(blueprint, spawn_point)
+            if vehicle is None:
+                continue
+            vehicle.set_autopilot(True, traffic_manager_port)
+            camera, frame_buffer = attach_camera(world, vehicle, DEFAULT_CAMERA_CONFIG)
+            actors.extend([camera, vehicle])
+            capture.append((vehicle, frame_buffer))
+        if not capture:
+            raise RuntimeError(f"No vehicles could be spawned on {host}:{port}")
+
+        tick = 0
+        while writer.frames_written + writer.count < frames:
+            tick_frame = world.tick()
+            tick += 1
+            if tick % capture_interval:
+                continue
+
+            for vehicle, frame_buffer in capture:
+                velocity = vehicle.get_velocity()
+                speed_kph = MPS_TO_KPH_MULTIPLIER * np.sqrt(velocity.x**2 + velocity.y**2 + velocity.z**2)
+                if speed_kph < DATASET_MIN_SPEED_KPH:
+                    continue
+                label = lane_yaw_offset(world_map, vehicle)
+                if label is None:
+                    continue
+
+                image, frame, timed_out = frame_buffer.wait_for_frame(
+                    tick_frame, DEFAULT_FRAME_SYNC_CONFIG.timeout_seconds
+                )
+                if timed_out:
+                    continue
+                shards_before = writer.shards_written
+                writer.add(cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY), label, speed_kph, frame)
+                if progress is not None and writer.shards_written != shards_before:
+                    progress.put((port, writer.frames_written))
+
+        writer.flush()
+        if progress is not None:
+            progress.put((port, writer.frames_written))
+    finally:
+        for actor in actors:
+            if isinstance(actor, carla.Sensor):
+                actor.stop()
+        destroy_actors(actors)
+        restore_world_settings(world, original_settings)
+
+    return writer.frames_written
+
+
+def _generator_process(kwargs: dict) -> None:
+    generate_on_server(**kwargs)
+
+
+def main(args: argparse.Namespace) -> None:
+    """Entry point for the dataset factory.
+
+    Args:
+        args: Command-line arguments.
+    """
+    context = multiprocessing.get_context("spawn")
+    progress = context.Queue()
+    processes = []
+    for index, port in enumerate(args.ports):
+        kwargs = dict(
+            host=args.host,
+            port=port,
+            traffic_manager_port=TRAFFIC_MANAGER_PORT + index,
+            out_dir=args.out,
+            frames=args.frames,
+            vehicles=args.vehicles,
+            town=args.town,
+            sim_profile=args.sim_profile,
+            capture_interval=args.capture_interval,
+            shard_size=args.shard_size,
+            seed=args.seed,
+            progress=progress,
+        )
+        process = context.Process(target=_generator_process, args=(kwargs,), name=f"generator-{port}")
+        process.start()
+        processes.append(process)
+
+    # Aggregate throughput as shards come in
+    start = time.perf_counter()
+    written = {port: 0 for port in args.ports}
+    while any(process.is_alive() for process in processes):
+        try:
+            port, frames = progress.get(timeout=1.0)
+        except queue.Empty:
+            continue
+        written[port] = frames
+        elapsed = time.perf_counter() - start
+        total = sum(written.values())
+        print(f"{total} labeled frames in {elapsed:.1f} s ({total / elapsed:.1f} frames/s over {len(processes)} servers)")
+
+    for process in processes:
+        process.join()
+    while not progress.empty():
+        port, frames = progress.get()
+        written[port] = frames
+
+    elapsed = time.perf_counter() - start
+    total = sum(written.values())
+    for port, frames in written.items():
+        print(f"Server {port}: {frames} frames ({frames / elapsed:.1f} frames/s)")
+    print(f"Total: {total} labeled frames in {elapsed:.1f} s ({total / elapsed:.1f} frames/s), written to {args.out}")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    argparser = argparse.ArgumentParser(description="Generate labeled lane-following data from autopilot driving")
+    argparser.add_argument(
+        "--host",
+        metavar="H",
+        default=DEFAULT_CARLA_HOST,
+        help=f"IP of the host server (default: {DEFAULT_CARLA_HOST})",
+    )
+    argparser.add_argument(
+        "--ports",
+        metavar="P",
+        nargs="+",
+        default=[DEFAULT_CARLA_PORT],
+        type=int,
+        help=f"TCP ports of the local servers, one generator each (default: {DEFAULT_CARLA_PORT})",
+    )
+    argparser.add_argument(
+        "--town",
+        metavar="NAME",
+        default=None,
+        help="CARLA town/map to load on every server (default: current map)",
+    )
+    argparser.add_argument(
+        "--out",
+        metavar="DIR",
+        default=DEFAULT_DATASET_DIR,
+        help=f"Directory for the .npz shards (default: {DEFAULT_DATASET_DIR})",
+    )
+    argparser.add_argument("--frames", default=5000, type=int, help="Labeled frames per server (default: 5000)")
+    argparser.add_argument(
+        "--vehicles",
+        default=DATASET_VEHICLES_PER_SERVER,
+        type=int,
+        help=f"Autopilot vehicles with a camera per server (default: {DATASET_VEHICLES_PER_SERVER})",
+    )
+    argparser.add_argument(
+        "--capture-interval",
+        metavar="TICKS",
+        default=DATASET_CAPTURE_INTERVAL_TICKS,
+        type=int,
+        help=f"Ticks between captures (default: {DATASET_CAPTURE_INTERVAL_TICKS})",
+    )
+    argparser.add_argument(
+        "--shard-size",
+        default=DATASET_SHARD_SIZE,
+        type=int,
+        help=f"Frames per shard (default: {DATASET_SHARD_SIZE})",
+    )
+    argparser.add_argument(
+        "--sim-profile",
+        choices=[name for name, profile in SIMULATION_PROFILES.items() if not profile.no_rendering_mode],
+        default=SIMULATION_PROFILE_DEFAULT,
+        help=f"Simulation settings profile; cameras need rendering (default: {SIMULATION_PROFILE_DEFAULT})",
+    )
+    argparser.add_argument("--seed", default=0, type=int, help="Seed for spawn point selection (default: 0)")
+
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,198 @@
+"""Episode management by teleporting the ego vehicle instead of respawning it.
+
+EpisodeManager keeps the ego vehicle and its attached sensors alive across
+episodes and resets by moving the vehicle to a new spawn point at rest. Run
+as a script, it measures reset latency against the respawn path that
+model_self_steer.main goes through for every run:
+
+    python -m src.episode --episodes 10 --town Town05
+"""
+import argparse
+import random
+import time
+import numpy as np
+import carla
+from typing import Callable, List, Optional
+
+from .config import (
+    DEFAULT_CARLA_HOST,
+    DEFAULT_CARLA_PORT,
+    CARLA_TIMEOUT_SECONDS,
+    VEHICLE_BLUEPRINT_FILTER,
+    TOWN05_GOOD_ROAD_IDS,
+    DEFAULT_CAMERA_CONFIG,
+)
+from .carla_utils import (
+    VehicleSpawnError,
+    create_client,
+    load_world_if_needed,
+    setup_synchronous_mode,
+    find_spawn_points_by_road_id,
+    spawn_vehicle,
+    spawn_vehicle_on_road,
+    reset_vehicle,
+    destroy_actor,
+    destroy_actors,
+    restore_world_settings,
+)
+from .frame_sync import attach_camera
+
+
+class EpisodeManager:
+    def __init__(
+        self,
+        world: carla.World,
+        road_ids: List[int] = TOWN05_GOOD_ROAD_IDS,
+        filter_pattern: str = VEHICLE_BLUEPRINT_FILTER,
+        attach_sensors: Optional[Callable[[carla.Vehicle], List[carla.Actor]]] = None,
+    ) -> None:
+        self.world = world
+        self.road_ids = road_ids
+        self.filter_pattern = filter_pattern
+        self.attach_sensors = attach_sensors
+
+        # Spawn points are looked up once instead of per episode
+        self.spawn_points = find_spawn_points_by_road_id(world, road_ids)
+        if not self.spawn_points:
+            raise VehicleSpawnError(f"No spawn points found on road IDs: {road_ids}")
+
+        self.vehicle: Optional[carla.Vehicle] = None
+        self.sensors: List[carla.Actor] = []
+        self.episode = 0
+        self.reset_seconds: List[float] = []
+
+    def start(self, spawn_point: Optional[carla.Transform] = None) -> carla.Vehicle:
+        spawn_point = spawn_point or random.choice(self.spawn_points)
+        self.vehicle = spawn_vehicle(
+            self.world, spawn_point=spawn_point, filter_pattern=self.filter_pattern, autopilot=False
+        )
+        if self.attach_sensors is not None:
+            self.sensors = self.attach_sensors(self.vehicle)
+        self.world.tick()
+        return self.vehicle
+
+    def reset(self, spawn_point: Optional[carla.Transform] = None) -> int:
+        """Start a new episode by teleporting the ego vehicle.
+
+        Args:
+            spawn_point: Where to place the vehicle (default: random spawn
+                point on the configured roads).
+
+        Returns:
+            Frame id of the first tick of the new episode. Sensor frames
+            older than this belong to the previous episode.
+        """
+        if self.vehicle is None:
+            self.start(spawn_point)
+            return self.world.tick()
+
+        start = time.perf_counter()
+        frame = reset_vehicle(self.world, self.vehicle, spawn_point or random.choice(self.spawn_points))
+        self.reset_seconds.append(time.perf_counter() - start)
+        self.episode += 1
+        return frame
+
+    def close(self) -> None:
+        for sensor in self.sensors:
+            if isinstance(sensor, carla.Sensor) and sensor.is_alive:
+                sensor.stop()
+        destroy_actors(self.sensors)
+        destroy_actor(self.vehicle)
+        self.sensors = []
+        self.vehicle = None
+
+
+def _attach_camera(world: carla.World) -> Callable[[carla.Vehicle], List[carla.Actor]]:
+    def attach(vehicle: carla.Vehicle) -> List[carla.Actor]:
+        camera, _ = attach_camera(world, vehicle, DEFAULT_CAMERA_CONFIG)
+        return [camera]
+
+    return attach
+
+
+def measure_respawn(world: carla.World, attach_sensors: Callable[[carla.Vehicle], List[carla.Actor]]) -> float:
+    """Time one episode setup and teardown the way model_self_steer.main does it."""
+    start = time.perf_counter()
+    vehicle = spawn_vehicle_on_road(world, road_ids=TOWN05_GOOD_ROAD_IDS, autopilot=False)
+    sensors = attach_sensors(vehicle)
+    world.tick()
+    for sensor in sensors:
+        sensor.stop()
+    destroy_actors(sensors)
+    destroy_actor(vehicle)
+    world.tick()
+    return time.perf_counter() - start
+
+
+def _summary(label: str, seconds: List[float]) -> str:
+    values = 1000.0 * np.array(seconds)
+    return f"{label}: mean {values.mean():.1f} ms, p95 {np.percentile(values, 95):.1f} ms over {len(values)} episodes"
+
+
+def main(args: argparse.Namespace) -> None:
+    """Entry point for the reset latency comparison.
+
+    Args:
+        args: Command-line arguments.
+    """
+    client = create_client(args.host, args.port, CARLA_TIMEOUT_SECONDS)
+
+    start = time.perf_counter()
+    world = load_world_if_needed(client, args.town)
+    print(f"World ready in {time.perf_counter() - start:.2f} s")
+
+    original_settings = setup_synchronous_mode(world, client)
+    attach_sensors = _attach_camera(world)
+    manager = EpisodeManager(world, attach_sensors=attach_sensors)
+
+    try:
+        manager.start()
+        for _ in range(args.episodes):
+            manager.reset()
+        manager.close()
+
+        respawn_seconds = [measure_respawn(world, attach_sensors) for _ in range(args.respawns)]
+
+        print(_summary("Teleport reset", manager.reset_seconds))
+        print(_summary("Respawn", respawn_seconds))
+    finally:
+        manager.close()
+        restore_world_settings(world, original_settings)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    argparser = argparse.ArgumentParser(description="Compare teleport episode reset with respawning")
+    argparser.add_argument(
+        "--host",
+        metavar="H",
+        default=DEFAULT_CARLA_HOST,
+        help=f"IP of the host server (default: {DEFAULT_CARLA_HOST})",
+    )
+    argparser.add_argument(
+        "-p",
+        "--port",
+        metavar="P",
+        default=DEFAULT_CARLA_PORT,
+        type=int,
+        help=f"TCP port to listen to (default: {DEFAULT_CARLA_PORT})",
+    )
+    argparser.add_argument(
+        "--town",
+        metavar="NAME",
+        default=None,
+        help="CARLA town/map to load if it is not already loaded (default: current map)",
+    )
+    argparser.add_argument("--episodes", default=20, type=int, help="Teleport resets to time (default: 20)")
+    argparser.add_argument(
+        "--respawns",
+        default=3,
+        type=int,
+        help="Respawns to time; each includes the spawn delay (default: 3)",
+    )
+
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
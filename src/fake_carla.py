@@ -0,0 +1,1221 @@
+import enum
+import fnmatch
+import math
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+import zlib
+import numpy as np
+from dataclasses import fields, replace
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .config import DEFAULT_FAKE_SERVER_CONFIG, FAKE_CARLA_ENV_VAR, FakeServerConfig
+from .radar_processing import RADAR_DETECTION_DTYPE
+from .lidar_processing import SEMANTIC_LIDAR_DTYPE, SEMANTIC_TAG_COUNT
+
+
+# Lets callers tell the stand-in from the real client library
+IS_FAKE_SERVER = True
+
+_config = DEFAULT_FAKE_SERVER_CONFIG
+
+
+class Vector3D:
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0) -> None:
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    def __add__(self, other: "Vector3D") -> "Vector3D":
+        return type(self)(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other: "Vector3D") -> "Vector3D":
+        return type(self)(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, scale: float) -> "Vector3D":
+        return type(self)(self.x * scale, self.y * scale, self.z * scale)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Vector3D) and (self.x, self.y, self.z) == (other.x, other.y, other.z)
+
+    def length(self) -> float:
+        return math.sqrt(self.x**2 + self.y**2 + self.z**2)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(x={self.x:.6f}, y={self.y:.6f}, z={self.z:.6f})"
+
+
+class Location(Vector3D):
+    def distance(self, other: "Location") -> float:
+        return (self - other).length()
+
+
+class Rotation:
+    def __init__(self, pitch: float = 0.0, yaw: float = 0.0, roll: float = 0.0) -> None:
+        self.pitch = float(pitch)
+        self.yaw = float(yaw)
+        self.roll = float(roll)
+
+    def get_forward_vector(self) -> Vector3D:
+        pitch, yaw = math.radians(self.pitch), math.radians(self.yaw)
+        return Vector3D(math.cos(pitch) * math.cos(yaw), math.cos(pitch) * math.sin(yaw), math.sin(pitch))
+
+    def get_right_vector(self) -> Vector3D:
+        yaw = math.radians(self.yaw)
+        return Vector3D(-math.sin(yaw), math.cos(yaw), 0.0)
+
+    def __repr__(self) -> str:
+        return f"Rotation(pitch={self.pitch:.6f}, yaw={self.yaw:.6f}, roll={self.roll:.6f})"
+
+
+class Transform:
+    def __init__(self, location: Optional[Location] = None, rotation: Optional[Rotation] = None) -> None:
+        self.location = location if location is not None else Location()
+        self.rotation = rotation if rotation is not None else Rotation()
+
+    def get_forward_vector(self) -> Vector3D:
+        return self.rotation.get_forward_vector()
+
+    def get_right_vector(self) -> Vector3D:
+        return self.rotation.get_right_vector()
+
+    def transform(self, location: Location) -> Location:
+        # Local to world; attachments only follow the parent's yaw
+        forward, right = self.get_forward_vector(), self.get_right_vector()
+        return Location(
+            self.location.x + location.x * forward.x + location.y * right.x,
+            self.location.y + location.x * forward.y + location.y * right.y,
+            self.location.z + location.z,
+        )
+
+    def __repr__(self) -> str:
+        return f"Transform({self.location!r}, {self.rotation!r})"
+
+
+class VehicleControl:
+    def __init__(
+        self,
+        throttle: float = 0.0,
+        steer: float = 0.0,
+        brake: float = 0.0,
+        hand_brake: bool = False,
+        reverse: bool = False,
+        manual_gear_shift: bool = False,
+        gear: int = 0,
+    ) -> None:
+        self.throttle = float(throttle)
+        self.steer = float(steer)
+        self.brake = float(brake)
+        self.hand_brake = bool(hand_brake)
+        self.reverse = bool(reverse)
+        self.manual_gear_shift = bool(manual_gear_shift)
+        self.gear = int(gear)
+
+
+class WeatherParameters:
+    _DEFAULTS = {
+        "cloudiness": 0.0,
+        "precipitation": 0.0,
+        "precipitation_deposits": 0.0,
+        "wind_intensity": 0.0,
+        "sun_azimuth_angle": 0.0,
+        "sun_altitude_angle": 0.0,
+        "fog_density": 0.0,
+        "fog_distance": 0.0,
+        "fog_falloff": 0.0,
+        "wetness": 0.0,
+        "scattering_intensity": 0.0,
+        "mie_scattering_scale": 0.0,
+        "rayleigh_scattering_scale": 0.0331,
+        "dust_storm": 0.0,
+    }
+
+    def __init__(self, **kwargs: float) -> None:
+        for name, default in self._DEFAULTS.items():
+            setattr(self, name, float(kwargs.pop(name, default)))
+        if kwargs:
+            raise TypeError(f"Unknown weather parameters: {sorted(kwargs)}")
+
+
+class WorldSettings:
+    def __init__(
+        self,
+        synchronous_mode: bool = False,
+        no_rendering_mode: bool = False,
+        fixed_delta_seconds: Optional[float] = None,
+        substepping: bool = True,
+        max_substep_delta_time: float = 0.01,
+        max_substeps: int = 10,
+    ) -> None:
+        self.synchronous_mode = synchronous_mode
+        self.no_rendering_mode = no_rendering_mode
+        self.fixed_delta_seconds = fixed_delta_seconds
+        self.substepping = substepping
+        self.max_substep_delta_time = max_substep_delta_time
+        self.max_substeps = max_substeps
+
+    def _copy(self) -> "WorldSettings":
+        return WorldSettings(**vars(self))
+
+
+class LaneType(enum.IntFlag):
+    NONE = 1
+    Driving = 2
+    Stop = 4
+    Shoulder = 8
+    Biking = 16
+    Sidewalk = 32
+    Any = 0xFFFFFFFE
+
+
+class ColorConverter(enum.IntEnum):
+    Raw = 0
+    Depth = 1
+    LogarithmicDepth = 2
+    CityScapesPalette = 3
+
+
+class Timestamp:
+    def __init__(self, frame: int, elapsed_seconds: float, delta_seconds: float) -> None:
+        self.frame = frame
+        self.elapsed_seconds = elapsed_seconds
+        self.delta_seconds = delta_seconds
+        self.platform_timestamp = time.perf_counter()
+
+
+class ActorAttribute:
+    def __init__(self, id: str, value: str, recommended_values: Tuple[str, ...] = ()) -> None:
+        self.id = id
+        self._value = str(value)
+        self.recommended_values = list(recommended_values) or [self._value]
+
+    def as_str(self) -> str:
+        return self._value
+
+    def as_int(self) -> int:
+        return int(float(self._value))
+
+    def as_float(self) -> float:
+        return float(self._value)
+
+    def as_bool(self) -> bool:
+        return self._value.lower() in ("true", "1")
+
+    def __str__(self) -> str:
+        return self._value
+
+
+class ActorBlueprint:
+    def __init__(self, id: str, tags: List[str], attributes: Dict[str, str]) -> None:
+        self.id = id
+        self.tags = tags
+        self._attributes = {name: ActorAttribute(name, value) for name, value in attributes.items()}
+
+    def has_attribute(self, id: str) -> bool:
+        return id in self._attributes
+
+    def get_attribute(self, id: str) -> ActorAttribute:
+        if id not in self._attributes:
+            raise IndexError(f"Blueprint {self.id} has no attribute '{id}'")
+        return self._attributes[id]
+
+    def set_attribute(self, id: str, value: str) -> None:
+        attribute = self.get_attribute(id)
+        attribute._value = str(value)
+
+    def has_tag(self, tag: str) -> bool:
+        return tag in self.tags
+
+    def match_tags(self, pattern: str) -> bool:
+        return any(fnmatch.fnmatch(tag, pattern) for tag in self.tags)
+
+    def _copy(self) -> "ActorBlueprint":
+        return ActorBlueprint(self.id, self.tags, {name: value.as_str() for name, value in self._attributes.items()})
+
+    def __iter__(self) -> Iterator[ActorAttribute]:
+        return iter(self._attributes.values())
+
+
+_SENSOR_ATTRIBUTES = {"role_name": "front", "sensor_tick": "0.0"}
+_LIDAR_ATTRIBUTES = {
+    **_SENSOR_ATTRIBUTES,
+    "channels": "32",
+    "range": "10.0",
+    "points_per_second": "56000",
+    "rotation_frequency": "10.0",
+    "upper_fov": "10.0",
+    "lower_fov": "-30.0",
+    "horizontal_fov": "360.0",
+}
+
+
+def _make_blueprints() -> List[ActorBlueprint]:
+    vehicle_attributes = {"role_name": "autopilot", "color": "17,37,103", "number_of_wheels": "4"}
+    return [
+        ActorBlueprint("vehicle.tesla.model3", ["vehicle", "tesla", "model3", "car"], vehicle_attributes),
+        ActorBlueprint("vehicle.lincoln.mkz_2020", ["vehicle", "lincoln", "mkz_2020", "car"], vehicle_attributes),
+        ActorBlueprint("vehicle.audi.a2", ["vehicle", "audi", "a2", "car"], vehicle_attributes),
+        ActorBlueprint(
+            "sensor.camera.rgb",
+            ["sensor", "camera", "rgb"],
+            {**_SENSOR_ATTRIBUTES, "image_size_x": "800", "image_size_y": "600", "fov": "90.0"},
+        ),
+        ActorBlueprint(
+            "sensor.lidar.ray_cast",
+            ["sensor", "lidar", "ray_cast"],
+            {
+                **_LIDAR_ATTRIBUTES,
+                "dropoff_general_rate": "0.45",
+                "dropoff_intensity_limit": "0.8",
+                "dropoff_zero_intensity": "0.4",
+                "noise_stddev": "0.0",
+            },
+        ),
+        ActorBlueprint("sensor.lidar.ray_cast_semantic", ["sensor", "lidar", "ray_cast_semantic"], _LIDAR_ATTRIBUTES),
+        ActorBlueprint(
+            "sensor.other.radar",
+            ["sensor", "other", "radar"],
+            {
+                **_SENSOR_ATTRIBUTES,
+                "horizontal_fov": "30.0",
+                "vertical_fov": "30.0",
+                "range": "100.0",
+                "points_per_second": "1500",
+            },
+        ),
+    ]
+
+
+class BlueprintLibrary(list):
+    def find(self, id: str) -> ActorBlueprint:
+        for blueprint in self:
+            if blueprint.id == id:
+                return blueprint._copy()
+        raise IndexError(f"Blueprint '{id}' not found")
+
+    def filter(self, pattern: str) -> "BlueprintLibrary":
+        return BlueprintLibrary(
+            blueprint._copy()
+            for blueprint in self
+            if fnmatch.fnmatch(blueprint.id, pattern) or blueprint.match_tags(pattern)
+        )
+
+
+class SensorData:
+    def __init__(self, frame: int, timestamp: float, transform: Transform) -> None:
+        self.frame = frame
+        self.timestamp = timestamp
+        self.transform = transform
+
+
+class Image(SensorData):
+    def __init__(self, frame: int, timestamp: float, transform: Transform, array: np.ndarray, fov: float) -> None:
+        super().__init__(frame, timestamp, transform)
+        self.height, self.width = array.shape[:2]
+        self.fov = fov
+        self.raw_data = memoryview(array.reshape(-1))
+
+    def convert(self, color_converter: ColorConverter) -> None:
+        # Images are already raw BGRA; other palettes are not simulated
+        pass
+
+
+class LidarMeasurement(SensorData):
+    def __init__(
+        self, frame: int, timestamp: float, transform: Transform, points: np.ndarray, channels: int, angle: float
+    ) -> None:
+        super().__init__(frame, timestamp, transform)
+        self.channels = channels
+        self.horizontal_angle = angle
+        self.raw_data = memoryview(points.view(np.uint8).reshape(-1))
+        self._point_count = points.shape[0]
+
+    def get_point_count(self, channel: int) -> int:
+        return self._point_count // self.channels
+
+    def __len__(self) -> int:
+        return self._point_count
+
+
+class SemanticLidarMeasurement(LidarMeasurement):
+    pass
+
+
+class RadarMeasurement(SensorData):
+    def __init__(self, frame: int, timestamp: float, transform: Transform, detections: np.ndarray) -> None:
+        super().__init__(frame, timestamp, transform)
+        self.raw_data = memoryview(detections.view(np.uint8).reshape(-1))
+        self._detection_count = detections.shape[0]
+
+    def get_detection_count(self) -> int:
+        return self._detection_count
+
+    def __len__(self) -> int:
+        return self._detection_count
+
+
+_ROAD_COUNT = 8
+# Road ids 30-37, so Town05's preferred road 37 has spawn points
+_FIRST_ROAD_ID = 30
+_LANE_IDS = (-2, -1, 1, 2)
+_SPAWN_POINTS_PER_LANE = 24
+
+
+class Waypoint:
+    def __init__(self, world_map: "Map", lane_id: int, angle: float) -> None:
+        self._map = world_map
+        self._angle = angle % (2.0 * math.pi)
+        self.lane_id = lane_id
+        self.lane_width = world_map._lane_width
+        self.lane_type = LaneType.Driving
+        self.is_junction = False
+        self.section_id = 0
+        segment = int(self._angle / (2.0 * math.pi / _ROAD_COUNT)) % _ROAD_COUNT
+        self.road_id = _FIRST_ROAD_ID + segment
+        radius = world_map._lane_radius(lane_id)
+        self.s = radius * (self._angle - segment * 2.0 * math.pi / _ROAD_COUNT)
+        self.transform = world_map._pose(lane_id, self._angle)
+        self.id = hash((lane_id, round(self._angle, 9)))
+
+    def next(self, distance: float) -> List["Waypoint"]:
+        step = distance / self._map._lane_radius(self.lane_id)
+        return [Waypoint(self._map, self.lane_id, self._angle + self._map._direction(self.lane_id) * step)]
+
+    def previous(self, distance: float) -> List["Waypoint"]:
+        step = distance / self._map._lane_radius(self.lane_id)
+        return [Waypoint(self._map, self.lane_id, self._angle - self._map._direction(self.lane_id) * step)]
+
+
+class Map:
+    """A ring road standing in for every town.
+
+    Negative lanes run with increasing angle around the origin and positive
+    lanes against it, two per direction with right-hand traffic. The radius
+    varies per town name so towns differ but stay deterministic.
+    """
+
+    def __init__(self, name: str, config: FakeServerConfig) -> None:
+        self.name = name if "/" in name else f"Carla/Maps/{name}"
+        short_name = self.name.split("/")[-1]
+        self._radius = config.track_radius_meters + 20.0 * (zlib.crc32(short_name.encode()) % 5)
+        self._lane_width = config.lane_width_meters
+
+    def _lane_radius(self, lane_id: int) -> float:
+        # Lane -1 / 1 border the centre line; -2 is right of -1 when driving
+        offset = (abs(lane_id) - 0.5) * self._lane_width
+        return self._radius - offset if lane_id < 0 else self._radius + offset
+
+    @staticmethod
+    def _direction(lane_id: int) -> float:
+        return 1.0 if lane_id < 0 else -1.0
+
+    def _pose(self, lane_id: int, angle: float, z: float = 0.0) -> Transform:
+        radius = self._lane_radius(lane_id)
+        yaw = math.degrees(angle) + 90.0 * self._direction(lane_id)
+        return Transform(
+            Location(radius * math.cos(angle), radius * math.sin(angle), z),
+            Rotation(yaw=(yaw + 180.0) % 360.0 - 180.0),
+        )
+
+    def _project(self, location: Location) -> Tuple[int, float, float]:
+        # Nearest lane, angle around the ring and distance from the lane centre
+        radius = math.hypot(location.x, location.y)
+        angle = math.atan2(location.y, location.x)
+        lane_id = min(_LANE_IDS, key=lambda lane: abs(radius - self._lane_radius(lane)))
+        return lane_id, angle, abs(radius - self._lane_radius(lane_id))
+
+    def get_spawn_points(self) -> List[Transform]:
+        spawn_points = []
+        for index, lane_id in enumerate(_LANE_IDS):
+            for point in range(_SPAWN_POINTS_PER_LANE):
+                angle = 2.0 * math.pi * (point + 0.25 * index) / _SPAWN_POINTS_PER_LANE
+                spawn_points.append(self._pose(lane_id, angle, z=0.5))
+        return spawn_points
+
+    def get_waypoint(
+        self, location: Location, project_to_road: bool = True, lane_type: LaneType = LaneType.Driving
+    ) -> Optional[Waypoint]:
+        lane_id, angle, distance = self._project(location)
+        if not project_to_road and distance > self._lane_width / 2.0:
+            return None
+        return Waypoint(self, lane_id, angle)
+
+    def generate_waypoints(self, distance: float) -> List[Waypoint]:
+        waypoints = []
+        for lane_id in _LANE_IDS:
+            count = max(1, int(2.0 * math.pi * self._lane_radius(lane_id) / distance))
+            waypoints.extend(Waypoint(self, lane_id, 2.0 * math.pi * i / count) for i in range(count))
+        return waypoints
+
+    def to_opendrive(self) -> str:
+        return (
+            f'<OpenDRIVE><header name="{self.name}"/>'
+            f'<ring radius="{self._radius}" laneWidth="{self._lane_width}" lanes="{len(_LANE_IDS)}"/></OpenDRIVE>'
+        )
+
+
+class Actor:
+    def __init__(
+        self,
+        world: "World",
+        actor_id: int,
+        blueprint: ActorBlueprint,
+        transform: Transform,
+        parent: Optional["Actor"] = None,
+    ) -> None:
+        self._world = world
+        self.id = actor_id
+        self.type_id = blueprint.id
+        self.attributes = {attribute.id: attribute.as_str() for attribute in blueprint}
+        self.parent = parent
+        self.is_alive = True
+        # Relative to the parent for attached actors
+        self._transform = Transform(
+            Location(transform.location.x, transform.location.y, transform.location.z),
+            Rotation(transform.rotation.pitch, transform.rotation.yaw, transform.rotation.roll),
+        )
+        self._velocity = Vector3D()
+        self._angular_velocity = Vector3D()
+        self._acceleration = Vector3D()
+
+    def get_world(self) -> "World":
+        return self._world
+
+    def get_transform(self) -> Transform:
+        if self.parent is None:
+            return Transform(self._transform.location + Location(), Rotation(**vars(self._transform.rotation)))
+        parent = self.parent.get_transform()
+        rotation = self._transform.rotation
+        return Transform(
+            parent.transform(self._transform.location),
+            Rotation(rotation.pitch, parent.rotation.yaw + rotation.yaw, rotation.roll),
+        )
+
+    def get_location(self) -> Location:
+        return self.get_transform().location
+
+    def get_velocity(self) -> Vector3D:
+        return self.parent.get_velocity() if self.parent is not None else Vector3D(**vars(self._velocity))
+
+    def get_angular_velocity(self) -> Vector3D:
+        return Vector3D(**vars(self._angular_velocity))
+
+    def get_acceleration(self) -> Vector3D:
+        return Vector3D(**vars(self._acceleration))
+
+    def set_transform(self, transform: Transform) -> None:
+        self._transform = Transform(
+            Location(transform.location.x, transform.location.y, transform.location.z),
+            Rotation(transform.rotation.pitch, transform.rotation.yaw, transform.rotation.roll),
+        )
+
+    def set_location(self, location: Location) -> None:
+        self._transform.location = Location(location.x, location.y, location.z)
+
+    def set_target_velocity(self, velocity: Vector3D) -> None:
+        self._velocity = Vector3D(velocity.x, velocity.y, velocity.z)
+
+    def set_target_angular_velocity(self, angular_velocity: Vector3D) -> None:
+        self._angular_velocity = Vector3D(angular_velocity.x, angular_velocity.y, angular_velocity.z)
+
+    def destroy(self) -> bool:
+        return self._world._destroy_actor(self)
+
+    def _step(self, delta_seconds: float) -> None:
+        pass
+
+    def __repr__(self) -> str:
+        return f"Actor(id={self.id}, type={self.type_id})"
+
+
+# Kinematic bicycle model of a mid-size car
+_WHEELBASE_METERS = 2.9
+_MAX_STEER_RADIANS = math.radians(70.0)
+_MAX_ACCELERATION_MPS2 = 5.0
+_MAX_DECELERATION_MPS2 = 9.0
+_ROLLING_DECELERATION_MPS2 = 0.3
+_DRAG_COEFFICIENT = 0.0015
+
+
+class Vehicle(Actor):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._control = VehicleControl()
+        self._autopilot = False
+        self._speed = 0.0
+        self._lane: Tuple[int, float] = (-1, 0.0)
+        # Autopilot vehicles drift around the configured speed, per actor
+        rng = np.random.default_rng((self._world._config.seed, self.id))
+        self._autopilot_speed = self._world._config.autopilot_speed_kph / 3.6 * rng.uniform(0.85, 1.15)
+
+    def apply_control(self, control: VehicleControl) -> None:
+        self._control = control
+
+    def get_control(self) -> VehicleControl:
+        return self._control
+
+    def set_autopilot(self, enabled: bool = True, tm_port: int = 8000) -> None:
+        self._autopilot = enabled
+        if enabled:
+            lane_id, angle, _ = self._world._map._project(self._transform.location)
+            self._lane = (lane_id, angle)
+
+    def set_transform(self, transform: Transform) -> None:
+        super().set_transform(transform)
+        if self._autopilot:
+            self.set_autopilot(True)
+
+    def set_target_velocity(self, velocity: Vector3D) -> None:
+        super().set_target_velocity(velocity)
+        forward = self._transform.get_forward_vector()
+        self._speed = velocity.x * forward.x + velocity.y * forward.y
+
+    def _step(self, delta_seconds: float) -> None:
+        if self._autopilot:
+            self._step_autopilot(delta_seconds)
+        else:
+            self._step_physics(delta_seconds)
+
+    def _set_motion(self, speed: float, previous_speed: float, delta_seconds: float) -> None:
+        forward = self._transform.get_forward_vector()
+        self._speed = speed
+        self._velocity = forward * speed
+        self._acceleration = forward * ((speed - previous_speed) / delta_seconds)
+
+    def _step_autopilot(self, delta_seconds: float) -> None:
+        world_map = self._world._map
+        previous_speed = self._speed
+        speed = min(self._autopilot_speed, previous_speed + 3.0 * delta_seconds)
+        lane_id, angle = self._lane
+        angle += world_map._direction(lane_id) * speed * delta_seconds / world_map._lane_radius(lane_id)
+        self._lane = (lane_id, angle)
+        self._transform = world_map._pose(lane_id, angle, self._transform.location.z)
+        self._angular_velocity = Vector3D(0.0, 0.0, math.degrees(speed / world_map._lane_radius(lane_id)))
+        self._set_motion(speed, previous_speed, delta_seconds)
+
+    def _step_physics(self, delta_seconds: float) -> None:
+        control = self._control
+        previous_speed = self._speed
+        brake = 1.0 if control.hand_brake else control.brake
+        direction = -1.0 if control.reverse else 1.0
+
+        speed = abs(previous_speed)
+        acceleration = (
+            _MAX_ACCELERATION_MPS2 * control.throttle
+            - _MAX_DECELERATION_MPS2 * brake
+            - (_ROLLING_DECELERATION_MPS2 + _DRAG_COEFFICIENT * speed**2 if speed > 0 else 0.0)
+        )
+        speed = direction * max(0.0, speed + acceleration * delta_seconds)
+
+        yaw_rate = speed / _WHEELBASE_METERS * math.tan(np.clip(control.steer, -1.0, 1.0) * _MAX_STEER_RADIANS)
+        rotation = self._transform.rotation
+        rotation.yaw = (rotation.yaw + math.degrees(yaw_rate * delta_seconds) + 180.0) % 360.0 - 180.0
+        forward = rotation.get_forward_vector()
+        self._transform.location = self._transform.location + Location(forward.x, forward.y, 0.0) * (
+            speed * delta_seconds
+        )
+        self._angular_velocity = Vector3D(0.0, 0.0, math.degrees(yaw_rate))
+        self._set_motion(speed, previous_speed, delta_seconds)
+
+
+class _SyntheticSource:
+    # Buffers are read-only and reused, so consumers that keep a measurement
+    # alive (zero-copy surfaces) never see it change
+    _POOL_SIZE = 4
+
+    def __init__(self, seed: int) -> None:
+        self._rng = np.random.default_rng(seed)
+        self._pool: List[np.ndarray] = []
+        self._pool_key = None
+
+    def _generate(self, count: int, attributes: Dict[str, float]) -> np.ndarray:
+        raise NotImplementedError
+
+    def buffer(self, frame: int, count: int, attributes: Dict[str, float]) -> np.ndarray:
+        key = (count, tuple(sorted(attributes.items())))
+        if key != self._pool_key:
+            self._pool = [self._generate(count, attributes) for _ in range(self._POOL_SIZE)]
+            for array in self._pool:
+                array.flags.writeable = False
+            self._pool_key = key
+        return self._pool[frame % self._POOL_SIZE]
+
+
+class _LidarSource(_SyntheticSource):
+    def _generate(self, count: int, attributes: Dict[str, float]) -> np.ndarray:
+        distance = self._rng.uniform(2.0, attributes["range"], count)
+        angle = self._rng.uniform(-math.pi, math.pi, count)
+        points = np.empty((count, 4), dtype=np.float32)
+        points[:, 0] = distance * np.cos(angle)
+        points[:, 1] = distance * np.sin(angle)
+        points[:, 2] = self._rng.uniform(-2.5, 1.0, count)
+        points[:, 3] = self._rng.uniform(0.0, 1.0, count)
+        return points
+
+
+class _SemanticLidarSource(_SyntheticSource):
+    def _generate(self, count: int, attributes: Dict[str, float]) -> np.ndarray:
+        distance = self._rng.uniform(2.0, attributes["range"], count)
+        angle = self._rng.uniform(-math.pi, math.pi, count)
+        points = np.empty(count, dtype=SEMANTIC_LIDAR_DTYPE)
+        points["x"] = distance * np.cos(angle)
+        points["y"] = distance * np.sin(angle)
+        points["z"] = self._rng.uniform(-2.5, 1.0, count)
+        points["cos_inc_angle"] = self._rng.uniform(0.0, 1.0, count)
+        points["object_idx"] = self._rng.integers(0, 500, count)
+        points["object_tag"] = self._rng.integers(0, SEMANTIC_TAG_COUNT, count)
+        return points
+
+
+class _RadarSource(_SyntheticSource):
+    def _generate(self, count: int, attributes: Dict[str, float]) -> np.ndarray:
+        detections = np.empty(count, dtype=RADAR_DETECTION_DTYPE)
+        half_horizontal = math.radians(attributes["horizontal_fov"]) / 2.0
+        half_vertical = math.radians(attributes["vertical_fov"]) / 2.0
+        detections["velocity"] = self._rng.uniform(-20.0, 20.0, count)
+        detections["azimuth"] = self._rng.uniform(-half_horizontal, half_horizontal, count)
+        detections["altitude"] = self._rng.uniform(-half_vertical, half_vertical, count)
+        detections["depth"] = self._rng.uniform(0.5, attributes["range"], count)
+        return detections
+
+
+class _CameraSource:
+    """Road scene with two lane markings converging at the horizon.
+
+    The scene is rendered once, wider than the image; every frame is one
+    copy of a window into it, shifted by the parent vehicle's offset from
+    its lane so steering changes what the camera sees.
+    """
+
+    _MARGIN_FRACTION = 0.25
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.margin = int(width * self._MARGIN_FRACTION)
+        scene = np.empty((height, width + 2 * self.margin, 4), dtype=np.uint8)
+        horizon = height // 2
+        scene[:horizon] = (200, 160, 120, 255)
+        scene[horizon:] = (70, 70, 70, 255)
+
+        # Lane markings one lane width apart at the bottom of the image
+        rows = np.arange(horizon, height)
+        centre = self.margin + width / 2.0
+        half_spread = (rows - horizon) / max(height - horizon, 1) * width * 0.45
+        line_width = np.maximum(1, (rows - horizon) // 40 + 1)
+        columns = np.arange(scene.shape[1])
+        for side in (-1.0, 1.0):
+            line = centre + side * half_spread
+            mask = np.abs(columns[None, :] - line[:, None]) <= line_width[:, None]
+            scene[horizon:][mask] = (255, 255, 255, 255)
+        self.scene = scene
+
+    def frame(self, shift_pixels: int) -> np.ndarray:
+        start = self.margin + int(np.clip(shift_pixels, -self.margin, self.margin))
+        return self.scene[:, start : start + self.width].copy()
+
+
+class Sensor(Actor):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._callback: Optional[Callable] = None
+        self._last_emit: Optional[float] = None
+        seed = (self._world._config.seed * 1000003 + self.id) % (2**32)
+        if self.type_id == "sensor.camera.rgb":
+            self._source = _CameraSource(int(self.attributes["image_size_x"]), int(self.attributes["image_size_y"]))
+        elif self.type_id == "sensor.lidar.ray_cast":
+            self._source = _LidarSource(seed)
+        elif self.type_id == "sensor.lidar.ray_cast_semantic":
+            self._source = _SemanticLidarSource(seed)
+        elif self.type_id == "sensor.other.radar":
+            self._source = _RadarSource(seed)
+        else:
+            self._source = None
+
+    def listen(self, callback: Callable) -> None:
+        self._callback = callback
+
+    def stop(self) -> None:
+        self._callback = None
+
+    def is_listening(self) -> bool:
+        return self._callback is not None
+
+    def _due(self, elapsed_seconds: float) -> bool:
+        sensor_tick = float(self.attributes.get("sensor_tick", 0.0))
+        return self._last_emit is None or elapsed_seconds - self._last_emit >= sensor_tick - 1e-9
+
+    def _measure(self, timestamp: Timestamp, no_rendering: bool) -> Optional[SensorData]:
+        since_last = timestamp.elapsed_seconds - self._last_emit if self._last_emit is not None else 0.0
+        self._last_emit = timestamp.elapsed_seconds
+        interval = max(since_last, timestamp.delta_seconds)
+        transform = self.get_transform()
+        frame, elapsed = timestamp.frame, timestamp.elapsed_seconds
+
+        if isinstance(self._source, _CameraSource):
+            # Cameras produce nothing while the server does not render
+            if no_rendering:
+                return None
+            array = self._source.frame(self._view_shift())
+            return Image(frame, elapsed, transform, array, float(self.attributes["fov"]))
+
+        numeric = {
+            name: float(self.attributes[name])
+            for name in ("range", "horizontal_fov", "vertical_fov")
+            if name in self.attributes
+        }
+        count = int(float(self.attributes.get("points_per_second", 0)) * interval)
+        if isinstance(self._source, (_LidarSource, _SemanticLidarSource)):
+            channels = int(self.attributes["channels"])
+            count -= count % channels
+            points = self._source.buffer(frame, count, numeric)
+            angle = (360.0 * float(self.attributes["rotation_frequency"]) * elapsed) % 360.0
+            semantic = isinstance(self._source, _SemanticLidarSource)
+            measurement_type = SemanticLidarMeasurement if semantic else LidarMeasurement
+            return measurement_type(frame, elapsed, transform, points, channels, angle)
+        if isinstance(self._source, _RadarSource):
+            return RadarMeasurement(frame, elapsed, transform, self._source.buffer(frame, count, numeric))
+        return None
+
+    def _view_shift(self) -> int:
+        # Pixels the scene moves for the parent's lateral and heading error
+        if self.parent is None:
+            return 0
+        transform = self.parent.get_transform()
+        waypoint = self._world._map.get_waypoint(transform.location)
+        lane = waypoint.transform
+        right = lane.get_right_vector()
+        offset = transform.location - lane.location
+        lateral = offset.x * right.x + offset.y * right.y
+        heading = (transform.rotation.yaw - lane.rotation.yaw + 180.0) % 360.0 - 180.0
+        return int(round(self._source.width * (0.1 * lateral + 0.01 * heading)))
+
+
+class ActorSnapshot:
+    def __init__(self, actor: Actor) -> None:
+        self.id = actor.id
+        self._transform = actor.get_transform()
+        self._velocity = actor.get_velocity()
+        self._angular_velocity = actor.get_angular_velocity()
+        self._acceleration = actor.get_acceleration()
+
+    def get_transform(self) -> Transform:
+        return self._transform
+
+    def get_velocity(self) -> Vector3D:
+        return self._velocity
+
+    def get_angular_velocity(self) -> Vector3D:
+        return self._angular_velocity
+
+    def get_acceleration(self) -> Vector3D:
+        return self._acceleration
+
+
+class WorldSnapshot:
+    def __init__(self, world_id: int, timestamp: Timestamp, actors: List[Actor]) -> None:
+        self.id = world_id
+        self.frame = timestamp.frame
+        self.timestamp = timestamp
+        self._actors = {actor.id: ActorSnapshot(actor) for actor in actors}
+
+    def __iter__(self) -> Iterator[ActorSnapshot]:
+        return iter(self._actors.values())
+
+    def __len__(self) -> int:
+        return len(self._actors)
+
+    def has_actor(self, actor_id: int) -> bool:
+        return actor_id in self._actors
+
+    def find(self, actor_id: int) -> Optional[ActorSnapshot]:
+        return self._actors.get(actor_id)
+
+
+class ActorList(list):
+    def filter(self, pattern: str) -> "ActorList":
+        return ActorList(actor for actor in self if fnmatch.fnmatch(actor.type_id, pattern))
+
+    def find(self, actor_id: int) -> Optional[Actor]:
+        return next((actor for actor in self if actor.id == actor_id), None)
+
+
+class _CallbackDispatcher:
+    """Runs sensor callbacks on one thread, in the order data was produced."""
+
+    def __init__(self) -> None:
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="fake-carla-callbacks", daemon=True)
+        self._thread.start()
+
+    def post(self, sensor: Sensor, data: SensorData) -> None:
+        self._queue.put((sensor, data))
+
+    def _run(self) -> None:
+        while True:
+            sensor, data = self._queue.get()
+            callback = sensor._callback
+            if callback is None or not sensor.is_alive:
+                continue
+            try:
+                callback(data)
+            except Exception:
+                traceback.print_exc()
+
+
+_DEFAULT_DELTA_SECONDS = 0.05
+_SPAWN_CLEARANCE_METERS = 2.0
+
+
+class World:
+    def __init__(self, server: "_Server", map_name: str) -> None:
+        self._server = server
+        self._config = server.config
+        self.id = server.next_world_id()
+        self._map = Map(map_name, self._config)
+        self._settings = WorldSettings()
+        self._weather = WeatherParameters()
+        self._blueprints = BlueprintLibrary(_make_blueprints())
+        self._actors: Dict[int, Actor] = {}
+        self._timestamp = Timestamp(0, 0.0, 0.0)
+        self._lock = threading.RLock()
+        self._spectator = self._create_actor(
+            Actor, ActorBlueprint("spectator", ["spectator"], {}), Transform(Location(z=50.0), Rotation(pitch=-90.0))
+        )
+
+    def get_map(self) -> Map:
+        return self._map
+
+    def get_settings(self) -> WorldSettings:
+        return self._settings._copy()
+
+    def apply_settings(self, settings: WorldSettings) -> int:
+        self._settings = settings._copy()
+        return self._timestamp.frame
+
+    def get_weather(self) -> WeatherParameters:
+        return self._weather
+
+    def set_weather(self, weather: WeatherParameters) -> None:
+        self._weather = weather
+
+    def get_blueprint_library(self) -> BlueprintLibrary:
+        return self._blueprints
+
+    def get_spectator(self) -> Actor:
+        return self._spectator
+
+    def get_snapshot(self) -> WorldSnapshot:
+        with self._lock:
+            return WorldSnapshot(self.id, self._timestamp, list(self._actors.values()))
+
+    def get_actors(self, actor_ids: Optional[List[int]] = None) -> ActorList:
+        with self._lock:
+            actors = list(self._actors.values())
+        if actor_ids is not None:
+            wanted = set(actor_ids)
+            actors = [actor for actor in actors if actor.id in wanted]
+        return ActorList(actors)
+
+    def get_actor(self, actor_id: int) -> Optional[Actor]:
+        return self._actors.get(actor_id)
+
+    def _create_actor(
+        self, actor_type: type, blueprint: ActorBlueprint, transform: Transform, parent: Optional[Actor] = None
+    ) -> Actor:
+        with self._lock:
+            actor = actor_type(self, self._server.next_actor_id(), blueprint, transform, parent)
+            self._actors[actor.id] = actor
+            return actor
+
+    def try_spawn_actor(
+        self, blueprint: ActorBlueprint, transform: Transform, attach_to: Optional[Actor] = None, attachment_type=None
+    ) -> Optional[Actor]:
+        if blueprint.id.startswith("vehicle."):
+            for actor in self._actors.values():
+                if not isinstance(actor, Vehicle):
+                    continue
+                if actor.get_location().distance(transform.location) < _SPAWN_CLEARANCE_METERS:
+                    return None
+            return self._create_actor(Vehicle, blueprint, transform)
+        if blueprint.id.startswith("sensor."):
+            return self._create_actor(Sensor, blueprint, transform, attach_to)
+        return self._create_actor(Actor, blueprint, transform, attach_to)
+
+    def spawn_actor(
+        self, blueprint: ActorBlueprint, transform: Transform, attach_to: Optional[Actor] = None, attachment_type=None
+    ) -> Actor:
+        actor = self.try_spawn_actor(blueprint, transform, attach_to, attachment_type)
+        if actor is None:
+            raise RuntimeError("Spawn failed because of collision at spawn position")
+        return actor
+
+    def _destroy_actor(self, actor: Actor) -> bool:
+        with self._lock:
+            if self._actors.pop(actor.id, None) is None:
+                return False
+            actor.is_alive = False
+            if isinstance(actor, Sensor):
+                actor.stop()
+            return True
+
+    def _destroy_all(self) -> None:
+        for actor in list(self._actors.values()):
+            self._destroy_actor(actor)
+
+    def tick(self, seconds: float = 10.0) -> int:
+        if self._config.step_seconds > 0:
+            time.sleep(self._config.step_seconds)
+
+        delta_seconds = self._settings.fixed_delta_seconds or _DEFAULT_DELTA_SECONDS
+        with self._lock:
+            previous = self._timestamp
+            timestamp = Timestamp(previous.frame + 1, previous.elapsed_seconds + delta_seconds, delta_seconds)
+            actors = sorted(self._actors.values(), key=lambda actor: actor.id)
+            for actor in actors:
+                actor._step(delta_seconds)
+            self._timestamp = timestamp
+
+        for actor in actors:
+            if isinstance(actor, Sensor) and actor.is_listening() and actor._due(timestamp.elapsed_seconds):
+                data = actor._measure(timestamp, self._settings.no_rendering_mode)
+                if data is None:
+                    continue
+                if self._config.async_callbacks:
+                    self._server.dispatcher.post(actor, data)
+                else:
+                    actor._callback(data)
+        return timestamp.frame
+
+    def wait_for_tick(self, seconds: float = 10.0) -> WorldSnapshot:
+        # Nothing runs between calls, so waiting steps the world once
+        self.tick(seconds)
+        return self.get_snapshot()
+
+
+class TrafficManager:
+    def __init__(self, port: int) -> None:
+        self._port = port
+        self.synchronous_mode = False
+        self.hybrid_physics_mode = False
+        self.hybrid_physics_radius = 50.0
+
+    def get_port(self) -> int:
+        return self._port
+
+    def set_synchronous_mode(self, enabled: bool = True) -> None:
+        self.synchronous_mode = enabled
+
+    def set_hybrid_physics_mode(self, enabled: bool = True) -> None:
+        self.hybrid_physics_mode = enabled
+
+    def set_hybrid_physics_radius(self, radius: float) -> None:
+        self.hybrid_physics_radius = radius
+
+    def set_random_device_seed(self, seed: int) -> None:
+        pass
+
+    def set_global_distance_to_leading_vehicle(self, distance: float) -> None:
+        pass
+
+    def global_percentage_speed_difference(self, percentage: float) -> None:
+        pass
+
+
+class command:
+    """Batch commands for Client.apply_batch_sync."""
+
+    # Stands for the actor spawned by the enclosing SpawnActor
+    FutureActor = 0
+
+    class SpawnActor:
+        def __init__(self, blueprint: ActorBlueprint, transform: Transform, parent: Optional[Actor] = None) -> None:
+            self.blueprint = blueprint
+            self.transform = transform
+            self.parent = parent
+            self.then_commands: list = []
+
+        def then(self, command) -> "command.SpawnActor":
+            self.then_commands.append(command)
+            return self
+
+    class DestroyActor:
+        def __init__(self, actor) -> None:
+            self.actor = actor
+
+    class SetAutopilot:
+        def __init__(self, actor, enabled: bool, tm_port: int = 8000) -> None:
+            self.actor = actor
+            self.enabled = enabled
+            self.tm_port = tm_port
+
+    class ApplyVehicleControl:
+        def __init__(self, actor, control: VehicleControl) -> None:
+            self.actor = actor
+            self.control = control
+
+    class ApplyTransform:
+        def __init__(self, actor, transform: Transform) -> None:
+            self.actor = actor
+            self.transform = transform
+
+    class Response:
+        def __init__(self, actor_id: int = 0, error: str = "") -> None:
+            self.actor_id = actor_id
+            self.error = error
+
+        def has_error(self) -> bool:
+            return bool(self.error)
+
+
+class _Server:
+    """State of one fake server, shared by every client of its host and port."""
+
+    def __init__(self, config: FakeServerConfig) -> None:
+        self.config = config
+        self.dispatcher = _CallbackDispatcher()
+        self.traffic_managers: Dict[int, TrafficManager] = {}
+        self._world_ids = iter(range(1, 1 << 62))
+        self._actor_ids = iter(range(1, 1 << 62))
+        self.world = World(self, "Town10HD_Opt")
+
+    def next_world_id(self) -> int:
+        return next(self._world_ids)
+
+    def next_actor_id(self) -> int:
+        return next(self._actor_ids)
+
+
+_servers: Dict[Tuple[str, int], _Server] = {}
+_servers_lock = threading.Lock()
+
+AVAILABLE_MAPS = ["Town01", "Town02", "Town03", "Town04", "Town05", "Town06", "Town07", "Town10HD_Opt"]
+
+
+class Client:
+    def __init__(self, host: str = "127.0.0.1", port: int = 2000, worker_threads: int = 0) -> None:
+        with _servers_lock:
+            if (host, port) not in _servers:
+                _servers[(host, port)] = _Server(_config)
+            self._server = _servers[(host, port)]
+        self._timeout = 5.0
+
+    def set_timeout(self, seconds: float) -> None:
+        self._timeout = seconds
+
+    def get_client_version(self) -> str:
+        return "fake"
+
+    def get_server_version(self) -> str:
+        return "fake"
+
+    def get_world(self) -> World:
+        return self._server.world
+
+    def get_available_maps(self) -> List[str]:
+        return [f"/Game/Carla/Maps/{name}" for name in AVAILABLE_MAPS]
+
+    def load_world(self, map_name: str, reset_settings: bool = True, map_layers=None) -> World:
+        name = map_name.split("/")[-1]
+        if name not in AVAILABLE_MAPS:
+            raise RuntimeError(f"map not found: {map_name}")
+        previous = self._server.world
+        previous._destroy_all()
+        self._server.world = World(self._server, name)
+        if not reset_settings:
+            self._server.world._settings = previous._settings._copy()
+        return self._server.world
+
+    def reload_world(self, reset_settings: bool = True) -> World:
+        return self.load_world(self._server.world.get_map().name, reset_settings)
+
+    def get_trafficmanager(self, client_connection: int = 8000) -> TrafficManager:
+        managers = self._server.traffic_managers
+        if client_connection not in managers:
+            managers[client_connection] = TrafficManager(client_connection)
+        return managers[client_connection]
+
+    def _resolve(self, actor, future_id: int) -> Actor:
+        actor_id = future_id if actor is command.FutureActor and future_id else getattr(actor, "id", actor)
+        resolved = self._server.world.get_actor(actor_id)
+        if resolved is None:
+            raise RuntimeError(f"actor {actor_id} not found")
+        return resolved
+
+    def _execute(self, batch_command, future_id: int = 0) -> int:
+        world = self._server.world
+        if isinstance(batch_command, command.SpawnActor):
+            parent = self._resolve(batch_command.parent, future_id) if batch_command.parent is not None else None
+            actor = world.spawn_actor(batch_command.blueprint, batch_command.transform, parent)
+            for then_command in batch_command.then_commands:
+                self._execute(then_command, actor.id)
+            return actor.id
+        actor = self._resolve(batch_command.actor, future_id)
+        if isinstance(batch_command, command.DestroyActor):
+            actor.destroy()
+        elif isinstance(batch_command, command.SetAutopilot):
+            actor.set_autopilot(batch_command.enabled, batch_command.tm_port)
+        elif isinstance(batch_command, command.ApplyVehicleControl):
+            actor.apply_control(batch_command.control)
+        elif isinstance(batch_command, command.ApplyTransform):
+            actor.set_transform(batch_command.transform)
+        else:
+            raise RuntimeError(f"unsupported command {type(batch_command).__name__}")
+        return actor.id
+
+    def apply_batch_sync(self, commands: list, do_tick: bool = False) -> List["command.Response"]:
+        responses = []
+        for batch_command in commands:
+            try:
+                responses.append(command.Response(self._execute(batch_command)))
+            except RuntimeError as e:
+                responses.append(command.Response(0, str(e)))
+        if do_tick:
+            self._server.world.tick()
+        return responses
+
+    def apply_batch(self, commands: list, do_tick: bool = False) -> None:
+        self.apply_batch_sync(commands, do_tick)
+
+
+def parse_fake_server_config(value: str) -> FakeServerConfig:
+    """FakeServerConfig from the environment variable value.
+
+    "1" selects the defaults; "name=value" pairs separated by commas
+    override single fields.
+    """
+    overrides = {}
+    types = {field.name: type(getattr(DEFAULT_FAKE_SERVER_CONFIG, field.name)) for field in fields(FakeServerConfig)}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        name, raw = (part.strip() for part in item.split("=", 1))
+        if name not in types:
+            raise ValueError(f"Unknown fake server setting '{name}', expected one of {sorted(types)}")
+        overrides[name] = raw.lower() in ("1", "true", "yes") if types[name] is bool else types[name](raw)
+    return replace(DEFAULT_FAKE_SERVER_CONFIG, **overrides)
+
+
+def install_fake_carla(config: FakeServerConfig = DEFAULT_FAKE_SERVER_CONFIG) -> None:
+    """Make "import carla" return this module.
+
+    Has to run before anything imports the real client library.
+    """
+    global _config
+    module = sys.modules[__name__]
+    existing = sys.modules.get("carla")
+    if existing is not None and existing is not module:
+        raise RuntimeError("carla was imported before the fake server could be installed")
+    _config = config
+    sys.modules["carla"] = module
+
+
+def install_from_environment() -> bool:
+    value = os.environ.get(FAKE_CARLA_ENV_VAR, "")
+    if value in ("", "0"):
+        return False
+    install_fake_carla(parse_fake_server_config(value))
+    return True
@@ -0,0 +1,157 @@
+import json
+import threading
+import numpy as np
+import carla
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .config import (
+    DEFAULT_FRAME_SYNC_CONFIG,
+    FRAME_POLICY_WAIT,
+    FRAME_POLICIES,
+)
+from .tracing import trace_span
+
+
+class FrameBuffer:
+    def __init__(self, image_height: int, image_width: int, channels: int = 4) -> None:
+        self._condition = threading.Condition()
+        self.image = np.zeros((image_height, image_width, channels), dtype=np.uint8)
+        self.frame = -1
+        self.timestamp = 0.0
+
+    def put(self, image: carla.Image) -> None:
+        with trace_span("camera callback"):
+            array = np.reshape(np.copy(image.raw_data), (image.height, image.width, 4))
+            with self._condition:
+                self.image = array
+                self.frame = image.frame
+                self.timestamp = image.timestamp
+                self._condition.notify_all()
+
+    def latest(self) -> Tuple[np.ndarray, int]:
+        with self._condition:
+            return self.image, self.frame
+
+    def wait_for_frame(self, frame: int, timeout: float) -> Tuple[np.ndarray, int, bool]:
+        # Returns the newest image, its frame id and whether the wait timed out.
+        with self._condition:
+            arrived = self._condition.wait_for(lambda: self.frame >= frame, timeout)
+            return self.image, self.frame, not arrived
+
+
+class FrameAgeHistogram:
+    def __init__(self, max_age_frames: int = DEFAULT_FRAME_SYNC_CONFIG.histogram_max_age_frames) -> None:
+        # The last bin collects every age above max_age_frames, the extra
+        # "missing" count collects frames consumed before any image arrived.
+        self.max_age_frames = max_age_frames
+        self.counts = np.zeros(max_age_frames + 2, dtype=np.int64)
+        self.missing = 0
+        self.timeouts = 0
+
+    def record(self, age_frames: int, timed_out: bool = False) -> None:
+        if timed_out:
+            self.timeouts += 1
+        if age_frames < 0:
+            self.missing += 1
+            return
+        self.counts[min(age_frames, self.max_age_frames + 1)] += 1
+
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def mean_age_frames(self) -> float:
+        total = self.total()
+        if total == 0:
+            return 0.0
+        ages = np.arange(self.counts.shape[0])
+        return float((ages * self.counts).sum() / total)
+
+    def percentile_age_frames(self, percentile: float) -> int:
+        total = self.total()
+        if total == 0:
+            return 0
+        cumulative = np.cumsum(self.counts)
+        return int(np.searchsorted(cumulative, total * percentile / 100.0))
+
+    def to_dict(self, fixed_delta_seconds: Optional[float] = None) -> dict:
+        result = {
+            "bins_frames": list(range(self.max_age_frames + 1)) + [f">{self.max_age_frames}"],
+            "counts": self.counts.tolist(),
+            "total": self.total(),
+            "missing": self.missing,
+            "timeouts": self.timeouts,
+            "mean_age_frames": self.mean_age_frames(),
+            "p50_age_frames": self.percentile_age_frames(50),
+            "p95_age_frames": self.percentile_age_frames(95),
+            "p99_age_frames": self.percentile_age_frames(99),
+        }
+        if fixed_delta_seconds:
+            result["fixed_delta_seconds"] = fixed_delta_seconds
+            result["mean_age_seconds"] = result["mean_age_frames"] * fixed_delta_seconds
+            result["p95_age_seconds"] = result["p95_age_frames"] * fixed_delta_seconds
+        return result
+
+    def export(self, path: str, fixed_delta_seconds: Optional[float] = None, **metadata) -> None:
+        result = dict(metadata)
+        result.update(self.to_dict(fixed_delta_seconds))
+        Path(path).write_text(json.dumps(result, indent=2))
+
+
+class FrameSynchronizer:
+    def __init__(
+        self,
+        frame_buffer: FrameBuffer,
+        config: Optional["FrameSyncConfig"] = None,
+    ) -> None:
+        self.config = config or DEFAULT_FRAME_SYNC_CONFIG
+        if self.config.policy not in FRAME_POLICIES:
+            raise ValueError(f"Unknown frame policy: {self.config.policy}")
+
+        self.frame_buffer = frame_buffer
+        self.histogram = FrameAgeHistogram(self.config.histogram_max_age_frames)
+
+    def get_frame(self, tick_frame: int) -> Tuple[np.ndarray, int]:
+        """Return the image to run inference on for the given simulation frame.
+
+        With the "wait" policy the call blocks until the camera frame matching
+        the tick arrives or the timeout expires. With the "reuse" policy the
+        latest image is returned immediately unless it is more than
+        max_reuse_age_frames old, in which case it waits like "wait" does.
+
+        Returns:
+            Tuple of (image, frame age in simulation frames).
+        """
+        timed_out = False
+        if self.config.policy == FRAME_POLICY_WAIT:
+            image, frame, timed_out = self.frame_buffer.wait_for_frame(tick_frame, self.config.timeout_seconds)
+        else:
+            image, frame = self.frame_buffer.latest()
+            if frame < 0 or tick_frame - frame > self.config.max_reuse_age_frames:
+                image, frame, timed_out = self.frame_buffer.wait_for_frame(
+                    tick_frame - self.config.max_reuse_age_frames, self.config.timeout_seconds
+                )
+
+        age_frames = max(tick_frame - frame, 0) if frame >= 0 else -1
+        self.histogram.record(age_frames, timed_out)
+        return image, age_frames
+
+
+def attach_camera(
+    world: carla.World, vehicle: carla.Vehicle, camera_config: "CameraConfig"
+) -> Tuple[carla.Actor, FrameBuffer]:
+    camera_bp = world.get_blueprint_library().find("sensor.camera.rgb")
+    camera_bp.set_attribute("image_size_x", str(camera_config.image_size_x))
+    camera_bp.set_attribute("image_size_y", str(camera_config.image_size_y))
+    camera_bp.set_attribute("fov", str(camera_config.fov))
+    camera = world.spawn_actor(
+        camera_bp,
+        carla.Transform(
+            carla.Location(z=camera_config.pos_z, x=camera_config.pos_x),
+            carla.Rotation(pitch=camera_config.pitch, yaw=camera_config.yaw),
+        ),
+        attach_to=vehicle,
+    )
+    frame_buffer = FrameBuffer(camera_config.image_size_y, camera_config.image_size_x)
+    camera.listen(frame_buffer.put)
+    return camera, frame_buffer
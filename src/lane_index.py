@@ -0,0 +1,231 @@
+import hashlib
+import os
+import numpy as np
+import carla
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import LANE_INDEX_SPACING_METERS, LANE_INDEX_CELL_METERS, DEFAULT_LANE_INDEX_CACHE_DIR
+
+
+@dataclass
+class LaneDeviation:
+    # Per query position; -1 / NaN where no lane sample is within one cell
+    sample_index: np.ndarray
+    # Signed distance from the centerline, positive right of the lane direction
+    lateral_offset: np.ndarray
+    # Query yaw minus lane yaw in degrees, wrapped to [-180, 180)
+    heading_error_degrees: np.ndarray
+    road_id: np.ndarray
+    lane_id: np.ndarray
+
+
+class LaneIndex:
+    """Driving-lane centerline samples in a uniform grid.
+
+    Every driving lane is sampled once with Map.generate_waypoints. Samples
+    are sorted by grid cell, with a start and count per cell. A query reads
+    its 3x3 cell neighbourhood padded to the fullest cell, so a batch of
+    positions is matched in a few array operations and no RPCs.
+    """
+
+    def __init__(
+        self,
+        locations: np.ndarray,
+        yaws_degrees: np.ndarray,
+        lane_widths: np.ndarray,
+        road_ids: np.ndarray,
+        lane_ids: np.ndarray,
+        cell_meters: float = LANE_INDEX_CELL_METERS,
+    ) -> None:
+        self.locations = np.asarray(locations, dtype=np.float64)
+        self.yaws_degrees = np.asarray(yaws_degrees, dtype=np.float64)
+        self.lane_widths = np.asarray(lane_widths, dtype=np.float32)
+        self.road_ids = np.asarray(road_ids, dtype=np.int32)
+        self.lane_ids = np.asarray(lane_ids, dtype=np.int32)
+        self.cell_meters = cell_meters
+
+        yaws = np.radians(self.yaws_degrees)
+        self.directions = np.stack([np.cos(yaws), np.sin(yaws)], axis=1)
+        self._build_grid()
+
+    def _build_grid(self) -> None:
+        # One empty cell of margin so neighbourhood lookups never leave the grid
+        self.origin = self.locations[:, :2].min(axis=0) - self.cell_meters
+        cells = self._cell_coordinates(self.locations[:, :2])
+        self.grid_shape = tuple(int(n) + 2 for n in cells.max(axis=0))
+
+        flat = cells[:, 0] * self.grid_shape[1] + cells[:, 1]
+        self.sorted_samples = np.argsort(flat, kind="stable").astype(np.int32)
+        counts = np.bincount(flat, minlength=self.grid_shape[0] * self.grid_shape[1])
+        self.cell_count = counts.astype(np.int32)
+        self.cell_start = (np.cumsum(counts) - counts).astype(np.int32)
+        self.cell_capacity = int(counts.max())
+        self._slots = np.arange(self.cell_capacity, dtype=np.int32)
+
+    def _cell_coordinates(self, xy: np.ndarray) -> np.ndarray:
+        return np.floor((xy - self.origin) / self.cell_meters).astype(np.int64)
+
+    def __len__(self) -> int:
+        return self.locations.shape[0]
+
+    def nearest(self, positions: np.ndarray, yaws_degrees: Optional[np.ndarray] = None) -> np.ndarray:
+        """Index of the closest centerline sample within one cell size, or -1.
+
+        With yaws given, samples pointing more than 90 degrees away from the
+        query heading are ignored, so vehicles match their own carriageway.
+        """
+        xy = np.asarray(positions, dtype=np.float64)[:, :2]
+        cells = self._cell_coordinates(xy)
+        inside = np.all((cells >= 1) & (cells < np.array(self.grid_shape) - 1), axis=1)
+        cells = np.clip(cells, 1, np.array(self.grid_shape) - 2)
+
+        # Candidates from the 3x3 neighbourhood: (queries, 9 * capacity)
+        offsets = np.array([du * self.grid_shape[1] + dv for du in (-1, 0, 1) for dv in (-1, 0, 1)])
+        neighbours = (cells[:, 0] * self.grid_shape[1] + cells[:, 1])[:, None] + offsets[None, :]
+        positions_in_cell = self.cell_start[neighbours][..., None] + self._slots
+        valid = (self._slots < self.cell_count[neighbours][..., None]).reshape(xy.shape[0], -1)
+        safe = self.sorted_samples[np.where(valid, positions_in_cell.reshape(xy.shape[0], -1), 0)]
+
+        delta = self.locations[safe, :2] - xy[:, None, :]
+        distances = np.einsum("qck,qck->qc", delta, delta)
+        valid &= distances <= self.cell_meters**2
+        if yaws_degrees is not None:
+            yaws = np.radians(np.asarray(yaws_degrees, dtype=np.float64))
+            heading = np.stack([np.cos(yaws), np.sin(yaws)], axis=1)
+            valid &= np.einsum("qck,qk->qc", self.directions[safe], heading) >= 0.0
+        distances[~valid] = np.inf
+
+        best = np.argmin(distances, axis=1)
+        found = inside & np.isfinite(distances[np.arange(xy.shape[0]), best])
+        return np.where(found, safe[np.arange(xy.shape[0]), best], -1)
+
+    def query(self, positions: np.ndarray, yaws_degrees: Optional[np.ndarray] = None) -> LaneDeviation:
+        """Lateral offset and heading error of many positions at once.
+
+        Args:
+            positions: (N, 2) or (N, 3) world coordinates.
+            yaws_degrees: (N,) headings; also restrict matches to lanes
+                running the same way.
+
+        Returns:
+            LaneDeviation arrays of length N.
+        """
+        xy = np.asarray(positions, dtype=np.float64)[:, :2]
+        index = self.nearest(positions, yaws_degrees)
+        found = index >= 0
+        safe = np.where(found, index, 0)
+
+        # x forward, y right: cross(direction, delta) is positive to the right
+        delta = xy - self.locations[safe, :2]
+        direction = self.directions[safe]
+        lateral = direction[:, 0] * delta[:, 1] - direction[:, 1] * delta[:, 0]
+        lateral = np.where(found, lateral, np.nan)
+
+        if yaws_degrees is not None:
+            heading_error = (np.asarray(yaws_degrees) - self.yaws_degrees[safe] + 180.0) % 360.0 - 180.0
+            heading_error = np.where(found, heading_error, np.nan)
+        else:
+            heading_error = np.full(xy.shape[0], np.nan)
+
+        return LaneDeviation(
+            sample_index=index,
+            lateral_offset=lateral,
+            heading_error_degrees=heading_error,
+            road_id=np.where(found, self.road_ids[safe], -1),
+            lane_id=np.where(found, self.lane_ids[safe], 0),
+        )
+
+    def query_world_state(self, cache: "WorldStateCache") -> LaneDeviation:
+        # Every actor of the last snapshot; rotations are (pitch, yaw, roll)
+        return self.query(cache.locations, cache.rotations[:, 1])
+
+    @classmethod
+    def from_map(
+        cls,
+        world_map: carla.Map,
+        spacing_meters: float = LANE_INDEX_SPACING_METERS,
+        cell_meters: float = LANE_INDEX_CELL_METERS,
+    ) -> "LaneIndex":
+        waypoints = [
+            waypoint
+            for waypoint in world_map.generate_waypoints(spacing_meters)
+            if waypoint.lane_type == carla.LaneType.Driving
+        ]
+        rows = np.array(
+            [
+                (
+                    waypoint.transform.location.x,
+                    waypoint.transform.location.y,
+                    waypoint.transform.location.z,
+                    waypoint.transform.rotation.yaw,
+                    waypoint.lane_width,
+                    waypoint.road_id,
+                    waypoint.lane_id,
+                )
+                for waypoint in waypoints
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 7)
+        return cls(rows[:, 0:3], rows[:, 3], rows[:, 4], rows[:, 5], rows[:, 6], cell_meters)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(
+            path,
+            locations=self.locations,
+            yaws_degrees=self.yaws_degrees,
+            lane_widths=self.lane_widths,
+            road_ids=self.road_ids,
+            lane_ids=self.lane_ids,
+        )
+
+    @classmethod
+    def load(cls, path: str, cell_meters: float = LANE_INDEX_CELL_METERS) -> "LaneIndex":
+        with np.load(path) as data:
+            return cls(
+                data["locations"],
+                data["yaws_degrees"],
+                data["lane_widths"],
+                data["road_ids"],
+                data["lane_ids"],
+                cell_meters,
+            )
+
+
+def lane_index_cache_path(
+    world_map: carla.Map,
+    spacing_meters: float = LANE_INDEX_SPACING_METERS,
+    cache_dir: str = DEFAULT_LANE_INDEX_CACHE_DIR,
+) -> str:
+    # Keyed by the OpenDRIVE content so edited maps with the same name rebuild
+    digest = hashlib.sha1(world_map.to_opendrive().encode()).hexdigest()[:12]
+    name = world_map.name.split("/")[-1]
+    return os.path.join(cache_dir, f"{name}_{digest}_{spacing_meters:g}m.npz")
+
+
+def load_lane_index(
+    world_map: carla.Map,
+    spacing_meters: float = LANE_INDEX_SPACING_METERS,
+    cell_meters: float = LANE_INDEX_CELL_METERS,
+    cache_dir: Optional[str] = DEFAULT_LANE_INDEX_CACHE_DIR,
+) -> LaneIndex:
+    """Lane index for a map, built once and then read from the disk cache.
+
+    Args:
+        world_map: Map to index.
+        spacing_meters: Distance between centerline samples.
+        cell_meters: Grid cell size; positions farther than this from every
+            centerline get no match.
+        cache_dir: Cache directory, or None to always build.
+    """
+    if cache_dir is None:
+        return LaneIndex.from_map(world_map, spacing_meters, cell_meters)
+
+    path = lane_index_cache_path(world_map, spacing_meters, cache_dir)
+    if os.path.exists(path):
+        return LaneIndex.load(path, cell_meters)
+
+    index = LaneIndex.from_map(world_map, spacing_meters, cell_meters)
+    index.save(path)
+    return index
@@ -0,0 +1,123 @@
+import time
+import numpy as np
+from dataclasses import dataclass, replace
+from typing import Dict, Tuple
+
+from keras.models import Sequential
+from keras.layers import (
+    Input,
+    Conv2D,
+    SeparableConv2D,
+    DepthwiseConv2D,
+    MaxPooling2D,
+    Flatten,
+    Dense,
+    Activation,
+)
+
+from .config import ModelConfig, DEFAULT_MODEL_CONFIG
+
+
+CONV_STANDARD = "standard"
+CONV_SEPARABLE = "separable"
+DOWNSAMPLE_POOL = "pool"
+DOWNSAMPLE_STRIDE = "stride"
+
+
+@dataclass(frozen=True)
+class LaneModelVariant:
+    name: str
+    filters: Tuple[int, ...] = (64, 64, 64, 64)
+    conv: str = CONV_STANDARD
+    downsample: str = DOWNSAMPLE_POOL
+    dense_units: int = 32
+    # Passed on to ModelConfig.input_scale; the preprocessor shrinks the crop
+    input_scale: float = 1.0
+
+    def model_config(self, base: ModelConfig = DEFAULT_MODEL_CONFIG) -> ModelConfig:
+        return replace(base, input_scale=self.input_scale)
+
+
+LANE_MODEL_VARIANTS: Dict[str, LaneModelVariant] = {
+    variant.name: variant
+    for variant in [
+        # Architecture of model_build.ipynb
+        LaneModelVariant("baseline"),
+        LaneModelVariant("narrow", filters=(16, 32, 32, 64)),
+        LaneModelVariant("strided", filters=(32, 32, 64, 64), downsample=DOWNSAMPLE_STRIDE),
+        LaneModelVariant("separable", filters=(32, 64, 64, 64), conv=CONV_SEPARABLE),
+        LaneModelVariant("small_crop", filters=(32, 32, 64), input_scale=0.5),
+    ]
+}
+
+
+def build_lane_model(variant: LaneModelVariant, input_shape: Tuple[int, int, int]) -> Sequential:
+    """Build a lane steering regressor for one variant.
+
+    Every conv block halves the resolution, either with a 2x2 max pool after
+    a stride-1 conv or with a stride-2 conv. The first block is always a
+    standard conv since a separable conv on a single channel saves nothing.
+    """
+    if variant.conv not in (CONV_STANDARD, CONV_SEPARABLE):
+        raise ValueError(f"Unknown conv type: {variant.conv}")
+    if variant.downsample not in (DOWNSAMPLE_POOL, DOWNSAMPLE_STRIDE):
+        raise ValueError(f"Unknown downsampling: {variant.downsample}")
+
+    model = Sequential(name=variant.name)
+    model.add(Input(shape=input_shape))
+    strides = 2 if variant.downsample == DOWNSAMPLE_STRIDE else 1
+    for index, filters in enumerate(variant.filters):
+        layer = SeparableConv2D if variant.conv == CONV_SEPARABLE and index > 0 else Conv2D
+        model.add(layer(filters, (3, 3), strides=strides, activation="relu", padding="same"))
+        if variant.downsample == DOWNSAMPLE_POOL:
+            model.add(MaxPooling2D((2, 2)))
+    model.add(Flatten())
+    model.add(Dense(variant.dense_units))
+    model.add(Activation("relu"))
+    model.add(Dense(1))
+    return model
+
+
+def count_flops(model: Sequential) -> int:
+    """Multiply-accumulate count of one forward pass, times two.
+
+    Only conv and dense layers are counted; pooling and activations are
+    small next to them.
+    """
+    flops = 0
+    for layer in model.layers:
+        if isinstance(layer, (Conv2D, SeparableConv2D, DepthwiseConv2D)):
+            _, out_h, out_w, out_c = layer.output.shape
+            in_c = layer.input.shape[-1]
+            kernel = int(np.prod(layer.kernel_size))
+            # Subclass checks first: in some Keras versions these derive from Conv2D
+            if isinstance(layer, SeparableConv2D):
+                macs = out_h * out_w * in_c * (kernel + out_c)
+            elif isinstance(layer, DepthwiseConv2D):
+                macs = out_h * out_w * in_c * kernel
+            else:
+                macs = out_h * out_w * in_c * out_c * kernel
+        elif isinstance(layer, Dense):
+            macs = layer.input.shape[-1] * layer.units
+        else:
+            continue
+        flops += 2 * int(macs)
+    return flops
+
+
+def measure_latency(model: Sequential, input_shape: Tuple[int, int, int], runs: int = 50, warmup: int = 5) -> float:
+    """Median single-frame CPU latency in milliseconds.
+
+    Calls the model the same way LanePredictor.predict_angle does, with a
+    batch of one.
+    """
+    sample = np.random.default_rng(0).random((1,) + tuple(input_shape), dtype=np.float32)
+    for _ in range(warmup):
+        model(sample, training=False)
+
+    times = np.empty(runs)
+    for run in range(runs):
+        start = time.perf_counter()
+        np.asarray(model(sample, training=False))
+        times[run] = time.perf_counter() - start
+    return float(1000.0 * np.median(times))
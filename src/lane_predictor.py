@@ -1,25 +1,46 @@
 import math
+import os
+import threading
+import time
 import cv2
 import numpy as np
 import carla
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Tuple, Optional, List
 
 from keras.models import load_model
 
 from .config import (
     DEFAULT_MODEL_CONFIG,
+    DEFAULT_CAMERA_CONFIG,
     CANNY_THRESHOLD_LOW,
     CANNY_THRESHOLD_HIGH,
     NORMALIZATION_FACTOR,
     MPS_TO_KPH_MULTIPLIER,
     DEFAULT_TEXT_DISPLAY,
+    DEFAULT_INFERENCE_SCHEDULE,
+    DEFAULT_CHANGE_GATE,
+    MODEL_RELOAD_POLL_SECONDS,
+    MODEL_WARMUP_RUNS,
+    MODEL_SWAP_REPORT_PREDICTIONS,
+    PREDICT_LATENCY_WINDOW,
+    INFERENCE_MODES,
+    INFERENCE_MODE_EVERY_FRAME,
+    INFERENCE_MODE_INTERVAL,
+    STEERING_HOLD_POLICIES,
+    STEERING_EXTRAPOLATE,
 )
+from .tracing import trace_span
 
 
 class ImagePreprocessor:
-    def __init__(self, config: Optional["ModelConfig"] = None) -> None:
+    def __init__(self, config: Optional["ModelConfig"] = None, roi_frames: bool = False) -> None:
         self.config = config or DEFAULT_MODEL_CONFIG
+        # Frames from a roi_camera_config camera already cover only the crop
+        self.roi_frames = roi_frames
         self._calculate_crop_dimensions()
 
     def _calculate_crop_dimensions(self) -> None:
@@ -27,17 +48,44 @@ class ImagePreprocessor:
         self.width_from = int((self.config.image_width - self.config.image_width * self.config.width_crop_portion) / 2)
         self.width_to = self.width_from + int(self.config.width_crop_portion * self.config.image_width)
 
-    def preprocess(self, image: np.ndarray) -> np.ndarray:
-        img = np.float32(image)
-        gray_image = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    def output_shape(self) -> Tuple[int, int, int]:
+        height = self.config.image_height - self.height_from
+        width = self.width_to - self.width_from
+        if self.config.input_scale != 1.0:
+            height = int(round(height * self.config.input_scale))
+            width = int(round(width * self.config.input_scale))
+        return height, width, 1
+
+    def edge_map(self, gray_image: np.ndarray) -> np.ndarray:
+        if self.roi_frames:
+            return self._roi_edge_map(gray_image)
 
         gray_image = cv2.resize(gray_image, (self.config.image_width, self.config.image_height))
 
         gray_image = gray_image[self.height_from:, self.width_from:self.width_to]
         gray_image = gray_image.astype(np.uint8)
 
-        canny = cv2.Canny(gray_image, CANNY_THRESHOLD_LOW, CANNY_THRESHOLD_HIGH)
+        if self.config.input_scale != 1.0:
+            height, width, _ = self.output_shape()
+            gray_image = cv2.resize(gray_image, (width, height), interpolation=cv2.INTER_AREA)
+
+        return cv2.Canny(gray_image, CANNY_THRESHOLD_LOW, CANNY_THRESHOLD_HIGH)
+
+    def _roi_edge_map(self, gray_image: np.ndarray) -> np.ndarray:
+        # Square camera pixels rarely match the stretched model crop exactly,
+        # so the frame is scaled (never upsampled) to the model input
+        height, width, _ = self.output_shape()
+        gray_image = gray_image.astype(np.uint8)
+        if gray_image.shape[:2] != (height, width):
+            gray_image = cv2.resize(gray_image, (width, height), interpolation=cv2.INTER_AREA)
+        return cv2.Canny(gray_image, CANNY_THRESHOLD_LOW, CANNY_THRESHOLD_HIGH)
+
+    def image_edge_map(self, image: np.ndarray) -> np.ndarray:
+        img = np.float32(image)
+        gray_image = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        return self.edge_map(gray_image)
 
+    def to_model_input(self, canny: np.ndarray) -> np.ndarray:
         canny = canny / NORMALIZATION_FACTOR
 
         canny = canny[:, :, np.newaxis]
@@ -45,6 +93,101 @@ class ImagePreprocessor:
 
         return canny
 
+    def preprocess(self, image: np.ndarray) -> np.ndarray:
+        return self.to_model_input(self.image_edge_map(image))
+
+
+def roi_camera_config(
+    model_config: Optional["ModelConfig"] = None,
+    camera_config: Optional["CameraConfig"] = None,
+) -> "CameraConfig":
+    """Camera that sees only the region ImagePreprocessor crops.
+
+    The crop of camera_config's frames is converted to view angles, and the
+    camera is turned to the centre of that region with a field of view just
+    covering it. Resolution is the smallest with square pixels that is at
+    least the model input on both axes. The turned camera differs from the
+    crop by a slight keystone, since its image plane is tilted.
+
+    Args:
+        model_config: Model whose crop and input size are used.
+        camera_config: Full-frame camera the crop is defined on.
+
+    Returns:
+        Camera config for frames to preprocess with roi_frames=True.
+    """
+    model_config = model_config or DEFAULT_MODEL_CONFIG
+    camera_config = camera_config or DEFAULT_CAMERA_CONFIG
+    preprocessor = ImagePreprocessor(model_config)
+    height, width, _ = preprocessor.output_shape()
+
+    # Crop bounds as image plane coordinates at unit focal length (y down)
+    half_width = math.tan(math.radians(camera_config.fov) / 2.0)
+    aspect = camera_config.image_size_y / camera_config.image_size_x
+    x0, x1 = (
+        (column / model_config.image_width - 0.5) * 2.0 * half_width
+        for column in (preprocessor.width_from, preprocessor.width_to)
+    )
+    y0, y1 = (
+        (row / model_config.image_height - 0.5) * 2.0 * half_width * aspect
+        for row in (preprocessor.height_from, model_config.image_height)
+    )
+
+    yaw = (math.atan(x0) + math.atan(x1)) / 2.0
+    pitch = (math.atan(y0) + math.atan(y1)) / 2.0
+    # Extents on the tilted image plane through the region's centre
+    plane_width = 2.0 * math.tan((math.atan(x1) - math.atan(x0)) / 2.0) * math.cos(pitch)
+    plane_height = 2.0 * math.tan((math.atan(y1) - math.atan(y0)) / 2.0)
+
+    pixels_per_unit = max(width / plane_width, height / plane_height)
+    return replace(
+        camera_config,
+        image_size_x=math.ceil(plane_width * pixels_per_unit - 1e-6),
+        image_size_y=math.ceil(plane_height * pixels_per_unit - 1e-6),
+        fov=math.degrees(2.0 * math.atan(plane_width / 2.0)),
+        pitch=camera_config.pitch - math.degrees(pitch),
+        yaw=camera_config.yaw + math.degrees(yaw),
+    )
+
+
+class ChangeGate:
+    """Detects edge maps that barely differ from the last one run through the model.
+
+    Edge maps are block-averaged by downsample_factor and compared by mean
+    absolute difference against the map of the last inference, so slow
+    drift over several skipped frames still adds up to a change.
+    """
+
+    def __init__(self, config: Optional["ChangeGateConfig"] = None) -> None:
+        self.config = config or DEFAULT_CHANGE_GATE
+        self.reference: Optional[np.ndarray] = None
+        self.consecutive_skips = 0
+        self.last_change = 0.0
+
+    def _thumbnail(self, canny: np.ndarray) -> np.ndarray:
+        factor = self.config.downsample_factor
+        size = (max(canny.shape[1] // factor, 1), max(canny.shape[0] // factor, 1))
+        return cv2.resize(canny, size, interpolation=cv2.INTER_AREA).astype(np.float32) / NORMALIZATION_FACTOR
+
+    def should_skip(self, canny: np.ndarray) -> bool:
+        thumbnail = self._thumbnail(canny)
+        if self.reference is not None and self.reference.shape == thumbnail.shape:
+            self.last_change = float(np.abs(thumbnail - self.reference).mean())
+            if (
+                self.last_change < self.config.threshold
+                and self.consecutive_skips < self.config.max_consecutive_skips
+            ):
+                self.consecutive_skips += 1
+                return True
+
+        self.reference = thumbnail
+        self.consecutive_skips = 0
+        return False
+
+    def reset(self) -> None:
+        self.reference = None
+        self.consecutive_skips = 0
+
 
 class SpeedController:
     def __init__(
@@ -64,27 +207,379 @@ class SpeedController:
             return 0.3
 
 
+def resolve_model_path(model_path: str) -> Path:
+    # Relative paths are taken from the repository root
+    model_path_obj = Path(model_path)
+    if not model_path_obj.is_absolute():
+        model_path_obj = Path(__file__).parent.parent / model_path
+    return model_path_obj
+
+
+def load_lane_model(model_path: str):
+    model = load_model(str(resolve_model_path(model_path)), compile=False)
+    model.compile()
+    return model
+
+
+def model_config_for(model, base: Optional["ModelConfig"] = None) -> "ModelConfig":
+    """Config whose preprocessing produces the model's input shape.
+
+    Models trained on a downscaled crop (e.g. the small_crop variant) are
+    recognised by their input size, so the scale need not be passed around
+    with the model file.
+
+    Args:
+        model: Loaded lane model.
+        base: Config to take the crop and control settings from.
+
+    Returns:
+        base with input_scale set to match the model.
+
+    Raises:
+        ValueError: If no scale of base's crop matches the model input.
+    """
+    base = replace(base or DEFAULT_MODEL_CONFIG, input_scale=1.0)
+    height, width = (int(size) for size in model.input_shape[1:3])
+    full_height, full_width, _ = ImagePreprocessor(base).output_shape()
+    config = replace(base, input_scale=height / full_height) if height != full_height else base
+    if ImagePreprocessor(config).output_shape()[:2] != (height, width):
+        raise ValueError(
+            f"Model input {width}x{height} is not a scaled {full_width}x{full_height} crop of the camera frame"
+        )
+    return config
+
+
+def model_mtime(model_path: str) -> float:
+    # SavedModel checkpoints are directories; use their newest file
+    path = resolve_model_path(model_path)
+    if not path.is_dir():
+        return path.stat().st_mtime
+    return max(
+        [path.stat().st_mtime]
+        + [os.stat(os.path.join(root, name)).st_mtime for root, _, names in os.walk(path) for name in names]
+    )
+
+
 class LanePredictor:
     def __init__(
         self,
         model_path: str,
         config: Optional["ModelConfig"] = None,
+        change_gate: Optional["ChangeGateConfig"] = None,
+        roi_frames: bool = False,
     ) -> None:
-        self.config = config or DEFAULT_MODEL_CONFIG
-        self.preprocessor = ImagePreprocessor(self.config)
+        self.model_path = model_path
+        self.model = load_lane_model(model_path)
+        self.config = model_config_for(self.model, config)
+        self.preprocessor = ImagePreprocessor(self.config, roi_frames)
+        self.change_gate = ChangeGate(change_gate) if change_gate is not None else None
+        self.last_angle = 0.0
+        # Running totals, plus a bounded window of recent latencies for the p95
+        self.inference_count = 0
+        self.inference_ms_total = 0.0
+        self.skip_count = 0
+        self.skip_ms_total = 0.0
+        self.recent_predict_ms: deque = deque(maxlen=PREDICT_LATENCY_WINDOW)
+
+        self.model_generation = 0
+        self._generation_count = 0
+        # The current model's latest in-loop latencies; the previous model's
+        # mean is reported once the new one has made as many predictions
+        self._generation_recent_ms: deque = deque(maxlen=MODEL_SWAP_REPORT_PREDICTIONS)
+        self._previous_generation_ms: Optional[float] = None
+        # (model, warmup latency ms) loaded in the background, swapped in by
+        # the next predict_angle call
+        self._pending_model: Optional[tuple] = None
+        self._pending_lock = threading.Lock()
+
+    def set_pending_model(self, model, warmup_ms: float) -> None:
+        with self._pending_lock:
+            self._pending_model = (model, warmup_ms)
+
+    def _swap_pending_model(self) -> None:
+        with self._pending_lock:
+            pending, self._pending_model = self._pending_model, None
+        if pending is None:
+            return
+        model, warmup_ms = pending
+        if self._generation_recent_ms:
+            self._previous_generation_ms = float(np.mean(self._generation_recent_ms))
 
-        model_path_obj = Path(model_path)
-        if not model_path_obj.is_absolute():
-            model_path_obj = Path(__file__).parent.parent / model_path
+        self.model = model
+        self.model_generation += 1
+        self._generation_count = 0
+        self._generation_recent_ms.clear()
+        self.reset_change_gate()
+        print(
+            f"Swapped in model {self.model_generation} from {self.model_path} "
+            f"({warmup_ms:.2f} ms model-only warmup latency)"
+        )
 
-        self.model = load_model(str(model_path_obj), compile=False)
-        self.model.compile()
+    def _report_generation_latency(self) -> None:
+        # Both means include preprocessing, unlike the warmup latency
+        print(
+            f"Model {self.model_generation}: {np.mean(self._generation_recent_ms):.2f} ms mean "
+            f"over its first {self._generation_count} predictions in the loop, "
+            f"previous model {self._previous_generation_ms:.2f} ms over its last ones"
+        )
+        self._previous_generation_ms = None
 
     def predict_angle(self, image: np.ndarray) -> float:
-        preprocessed = self.preprocessor.preprocess(image)
-        angle = self.model(preprocessed, training=False)
+        if self._pending_model is not None:
+            self._swap_pending_model()
+        with trace_span("predict_angle"):
+            return self._predict_angle(image)
+
+    def _predict_angle(self, image: np.ndarray) -> float:
+        start = time.perf_counter()
+        canny = self.preprocessor.image_edge_map(image)
+
+        # Reuse the previous angle while the edge map stays nearly the same
+        if self.change_gate is not None and self.change_gate.should_skip(canny):
+            elapsed_ms = 1000.0 * (time.perf_counter() - start)
+            self.skip_count += 1
+            self.skip_ms_total += elapsed_ms
+            self.recent_predict_ms.append(elapsed_ms)
+            return self.last_angle
+
+        angle = self.model(self.preprocessor.to_model_input(canny), training=False)
+        self.last_angle = angle.numpy()[0][0] * self.config.yaw_adjustment_degrees / self.config.max_steer_angle_degrees
+        elapsed_ms = 1000.0 * (time.perf_counter() - start)
+        self.inference_count += 1
+        self.inference_ms_total += elapsed_ms
+        self._generation_count += 1
+        self._generation_recent_ms.append(elapsed_ms)
+        self.recent_predict_ms.append(elapsed_ms)
+        if self._previous_generation_ms is not None and self._generation_count == MODEL_SWAP_REPORT_PREDICTIONS:
+            self._report_generation_latency()
+
+        return self.last_angle
+
+    def reset_change_gate(self) -> None:
+        # Call when the scene jumps, e.g. after an episode reset
+        if self.change_gate is not None:
+            self.change_gate.reset()
+
+    def latency_summary(self) -> dict:
+        calls = self.inference_count + self.skip_count
+        recent = np.array(self.recent_predict_ms or [0.0])
+        return {
+            "predictions": calls,
+            "skip_rate": self.skip_count / calls if calls else 0.0,
+            "mean_predict_ms": (self.inference_ms_total + self.skip_ms_total) / calls if calls else 0.0,
+            # Over the last PREDICT_LATENCY_WINDOW predictions
+            "p95_predict_ms": float(np.percentile(recent, 95)),
+            "mean_inference_ms": self.inference_ms_total / self.inference_count if self.inference_count else 0.0,
+            "mean_skip_ms": self.skip_ms_total / self.skip_count if self.skip_count else 0.0,
+        }
+
+
+class ModelReloader:
+    """Reloads a LanePredictor's model on a background thread.
+
+    The model path is polled for a newer modification time, and
+    request_reload() forces a reload, e.g. from a SIGHUP handler. A new
+    model is only read once its files have stopped changing for one poll
+    interval, then loaded and warmed up off the control loop and handed to
+    the predictor, which swaps it in before its next prediction. A model
+    that fails to load is reported and the current one kept.
+    """
+
+    def __init__(
+        self,
+        predictor: LanePredictor,
+        poll_seconds: float = MODEL_RELOAD_POLL_SECONDS,
+        warmup_runs: int = MODEL_WARMUP_RUNS,
+        watch: bool = True,
+    ) -> None:
+        self.predictor = predictor
+        self.poll_seconds = poll_seconds
+        self.warmup_runs = warmup_runs
+        self.watch = watch
+        self._loaded_mtime = model_mtime(predictor.model_path)
+        self._reload_requested = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-reloader", daemon=True)
+
+    def start(self) -> "ModelReloader":
+        self._thread.start()
+        return self
+
+    def request_reload(self) -> None:
+        self._reload_requested.set()
+
+    def _warmup_ms(self, model) -> float:
+        sample = np.zeros((1,) + self.predictor.preprocessor.output_shape(), dtype=np.float32)
+        times = []
+        for _ in range(self.warmup_runs):
+            start = time.perf_counter()
+            np.asarray(model(sample, training=False))
+            times.append(1000.0 * (time.perf_counter() - start))
+        # The first call includes graph tracing
+        return float(np.median(times[1:] or times))
+
+    def _reload(self) -> None:
+        path = self.predictor.model_path
+        try:
+            # A failed version is not retried until the files change again
+            self._loaded_mtime = model_mtime(path)
+            model = load_lane_model(path)
+            # The preprocessing is fixed for the session
+            if tuple(model.input_shape[1:]) != tuple(self.predictor.model.input_shape[1:]):
+                raise ValueError(
+                    f"input shape {model.input_shape[1:]} differs from the current "
+                    f"{self.predictor.model.input_shape[1:]}"
+                )
+            warmup_ms = self._warmup_ms(model)
+        except Exception as e:
+            print(f"Model reload from {path} failed, keeping the current model: {e}")
+            return
+        self.predictor.set_pending_model(model, warmup_ms)
+
+    def _run(self) -> None:
+        seen_mtime = self._loaded_mtime
+        while not self._stop.is_set():
+            if self._reload_requested.wait(self.poll_seconds):
+                if self._stop.is_set():
+                    break
+                self._reload_requested.clear()
+                self._reload()
+                seen_mtime = self._loaded_mtime
+                continue
+            if not self.watch:
+                continue
+
+            try:
+                mtime = model_mtime(self.predictor.model_path)
+            except OSError:
+                # Mid-replacement; try again on the next poll
+                continue
+            if mtime != self._loaded_mtime and mtime == seen_mtime:
+                self._reload()
+            seen_mtime = mtime
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._reload_requested.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+class SteeringScheduler:
+    def __init__(
+        self,
+        predictor: "LanePredictor",
+        config: Optional["InferenceScheduleConfig"] = None,
+    ) -> None:
+        self.predictor = predictor
+        self.config = config or DEFAULT_INFERENCE_SCHEDULE
+        if self.config.mode not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode: {self.config.mode}")
+        if self.config.steering_policy not in STEERING_HOLD_POLICIES:
+            raise ValueError(f"Unknown steering policy: {self.config.steering_policy}")
+
+        # (frame, angle) of the last two completed predictions
+        self._history: List[Tuple[int, float]] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[Future] = None
+        self._pending_frame = -1
+        if self.config.mode not in (INFERENCE_MODE_EVERY_FRAME, INFERENCE_MODE_INTERVAL):
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lane-inference")
+
+        self.ticks = 0
+        self.inferences = 0
+
+    def _record(self, frame: int, angle: float) -> None:
+        self._history = (self._history + [(frame, angle)])[-2:]
+        self.inferences += 1
+
+    def _collect_async_result(self) -> None:
+        if self._pending is not None and self._pending.done():
+            self._record(self._pending_frame, float(self._pending.result()))
+            self._pending = None
+
+    def _submit_async(self, frame: int, image: np.ndarray) -> None:
+        if self._pending is None:
+            self._pending_frame = frame
+            self._pending = self._executor.submit(self.predictor.predict_angle, image.copy())
+
+    def held_angle(self, frame: int) -> float:
+        if not self._history:
+            return 0.0
+        last_frame, last_angle = self._history[-1]
+        if self.config.steering_policy != STEERING_EXTRAPOLATE or len(self._history) < 2:
+            return last_angle
+
+        # Linear extrapolation from the last two predictions, limited in time
+        previous_frame, previous_angle = self._history[0]
+        if last_frame == previous_frame:
+            return last_angle
+        slope = (last_angle - previous_angle) / (last_frame - previous_frame)
+        ahead = min(frame - last_frame, self.config.max_extrapolation_frames)
+        return float(np.clip(last_angle + slope * ahead, -1.0, 1.0))
+
+    def update(self, frame: int, image: np.ndarray) -> float:
+        self.ticks += 1
+        if self.config.mode == INFERENCE_MODE_EVERY_FRAME:
+            angle = self.predictor.predict_angle(image)
+            self._record(frame, angle)
+            return angle
+
+        if self.config.mode == INFERENCE_MODE_INTERVAL:
+            if not self._history or frame - self._history[-1][0] >= self.config.interval_frames:
+                self._record(frame, self.predictor.predict_angle(image))
+                return self._history[-1][1]
+            return self.held_angle(frame)
+
+        self._collect_async_result()
+        self._submit_async(frame, image)
+        return self.held_angle(frame)
+
+    def inference_ratio(self) -> float:
+        return self.inferences / self.ticks if self.ticks else 0.0
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+class ControlLoopStats:
+    # Running totals only, so memory stays constant however long the loop runs
+    def __init__(self) -> None:
+        self.ticks = 0
+        self.speed_mean_kph = 0.0
+        self._speed_m2 = 0.0
+        self.steering_change_total = 0.0
+        self._first_time: Optional[float] = None
+        self._last_time: Optional[float] = None
+        self._last_steer: Optional[float] = None
+
+    def record(self, speed_kph: float, steer: float) -> None:
+        now = time.perf_counter()
+        if self._first_time is None:
+            self._first_time = now
+        self._last_time = now
+        self.ticks += 1
+
+        # Welford's update for the speed mean and variance
+        delta = speed_kph - self.speed_mean_kph
+        self.speed_mean_kph += delta / self.ticks
+        self._speed_m2 += delta * (speed_kph - self.speed_mean_kph)
+
+        if self._last_steer is not None:
+            self.steering_change_total += abs(steer - self._last_steer)
+        self._last_steer = steer
 
-        return angle.numpy()[0][0] * self.config.yaw_adjustment_degrees / self.config.max_steer_angle_degrees
+    def summary(self) -> dict:
+        elapsed = self._last_time - self._first_time if self.ticks > 1 else 0.0
+        return {
+            "ticks": self.ticks,
+            "control_rate_hz": (self.ticks - 1) / elapsed if elapsed > 0 else 0.0,
+            "mean_speed_kph": self.speed_mean_kph,
+            "speed_std_kph": math.sqrt(self._speed_m2 / self.ticks) if self.ticks else 0.0,
+            # Steering jitter is a proxy for how settled the lane keeping is
+            "mean_steering_change": self.steering_change_total / (self.ticks - 1) if self.ticks > 1 else 0.0,
+        }
 
 
 class VehicleMonitor:
@@ -0,0 +1,131 @@
+import numpy as np
+from typing import List
+
+from .config import SEMANTIC_TAG_COLORS
+
+
+# Layout of one point in carla.SemanticLidarMeasurement.raw_data
+SEMANTIC_LIDAR_DTYPE = np.dtype(
+    [
+        ("x", np.float32),
+        ("y", np.float32),
+        ("z", np.float32),
+        ("cos_inc_angle", np.float32),
+        ("object_idx", np.uint32),
+        ("object_tag", np.uint32),
+    ]
+)
+
+SEMANTIC_TAG_COUNT = len(SEMANTIC_TAG_COLORS)
+
+
+def decode_semantic_lidar(raw_data: bytes) -> np.ndarray:
+    # Zero-copy structured view; fields are read without reinterpreting ObjIdx
+    # and ObjTag as floats.
+    return np.frombuffer(raw_data, dtype=SEMANTIC_LIDAR_DTYPE)
+
+
+class SemanticBEVGrid:
+    """Bird's-eye occupancy grid with per-cell semantic class counts.
+
+    The grid is indexed (u, v) like a pygame surface array: u runs left to
+    right (sensor +y) and v top to bottom (sensor -x), with the sensor at the
+    centre. All buffers are allocated once and reused between sweeps.
+    """
+
+    def __init__(
+        self,
+        grid_size: List[int],
+        meters_per_cell: float,
+        num_classes: int = SEMANTIC_TAG_COUNT,
+        initial_capacity: int = 8192,
+    ) -> None:
+        self.width, self.height = int(grid_size[0]), int(grid_size[1])
+        self.meters_per_cell = meters_per_cell
+        self.num_classes = num_classes
+
+        self.counts = np.zeros((self.width, self.height, num_classes), dtype=np.int32)
+        self.image = np.zeros((self.width, self.height, 3), dtype=np.uint8)
+        self.palette = np.array(SEMANTIC_TAG_COLORS[:num_classes], dtype=np.uint8)
+        self._cell_counts = self.counts.reshape(-1, num_classes)
+        self._cell_pixels = self.image.reshape(-1, 3)
+
+        # Only cells hit by a sweep are cleared and redrawn by the next one
+        self.occupied_cells = np.zeros(0, dtype=np.int64)
+        self._drawn_cells = np.zeros(0, dtype=np.int64)
+        self._occupied_flag = np.zeros(self.width * self.height, dtype=np.uint8)
+        self._compact_index = np.zeros(self.width * self.height, dtype=np.int64)
+
+        self._allocate_scratch(initial_capacity)
+
+    def _allocate_scratch(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._u = np.empty(capacity, dtype=np.float32)
+        self._v = np.empty(capacity, dtype=np.float32)
+        self._iu = np.empty(capacity, dtype=np.int64)
+        self._iv = np.empty(capacity, dtype=np.int64)
+        self._cell = np.empty(capacity, dtype=np.int64)
+        self._valid = np.empty(capacity, dtype=bool)
+        self._scratch_mask = np.empty(capacity, dtype=bool)
+
+    def build(self, points: np.ndarray) -> np.ndarray:
+        count = points.shape[0]
+        if count > self._capacity:
+            self._allocate_scratch(max(count, 2 * self._capacity))
+
+        u, v = self._u[:count], self._v[:count]
+        iu, iv = self._iu[:count], self._iv[:count]
+        cell, valid, mask = self._cell[:count], self._valid[:count], self._scratch_mask[:count]
+        inverse_cell = 1.0 / self.meters_per_cell
+
+        # Cell coordinates
+        np.multiply(points["y"], inverse_cell, out=u)
+        u += 0.5 * self.width
+        np.multiply(points["x"], -inverse_cell, out=v)
+        v += 0.5 * self.height
+        np.floor(u, out=u)
+        np.floor(v, out=v)
+        np.copyto(iu, u, casting="unsafe")
+        np.copyto(iv, v, casting="unsafe")
+
+        np.greater_equal(iu, 0, out=valid)
+        np.less(iu, self.width, out=mask)
+        valid &= mask
+        np.greater_equal(iv, 0, out=mask)
+        valid &= mask
+        np.less(iv, self.height, out=mask)
+        valid &= mask
+
+        # Cell index u * height + v for every point inside the grid
+        np.multiply(iu, self.height, out=cell)
+        cell += iv
+        cell = cell[valid]
+        np.minimum(points["object_tag"], self.num_classes - 1, out=iv, casting="unsafe")
+        tag = iv[valid]
+
+        # Mark occupied cells without sorting, then count classes over a
+        # compact numbering of just those cells
+        self._cell_counts[self.occupied_cells] = 0
+        self._occupied_flag.fill(0)
+        self._occupied_flag[cell] = 1
+        self.occupied_cells = np.flatnonzero(self._occupied_flag)
+        self._compact_index[self.occupied_cells] = np.arange(self.occupied_cells.shape[0])
+
+        compact = self._compact_index[cell]
+        compact *= self.num_classes
+        compact += tag
+        class_counts = np.bincount(compact, minlength=self.occupied_cells.shape[0] * self.num_classes)
+        self._cell_counts[self.occupied_cells] = class_counts.reshape(-1, self.num_classes)
+        return self.counts
+
+    def render(self) -> np.ndarray:
+        # Color each occupied cell by its most frequent semantic class
+        self._cell_pixels[self._drawn_cells] = 0
+        dominant = np.argmax(self._cell_counts[self.occupied_cells], axis=1)
+        self._cell_pixels[self.occupied_cells] = self.palette[dominant]
+        self._drawn_cells = self.occupied_cells
+        return self.image
+
+    def process(self, raw_data: bytes) -> np.ndarray:
+        self.build(decode_semantic_lidar(raw_data))
+        return self.render()
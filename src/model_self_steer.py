@@ -4,9 +4,11 @@ This script uses a trained convolutional neural network to predict steering
 angles for autonomous lane following in CARLA.
 """
 import argparse
+import signal
+import time
 import cv2
-import numpy as np
 import carla
+from typing import Optional
 
 from .config import (
     DEFAULT_CARLA_HOST,
@@ -15,19 +17,40 @@ from .config import (
     VEHICLE_BLUEPRINT_FILTER,
     TOWN05_GOOD_ROAD_IDS,
     DEFAULT_CAMERA_CONFIG,
+    DEFAULT_SIMULATION_SETTINGS,
+    DEFAULT_FRAME_SYNC_CONFIG,
+    FRAME_POLICIES,
+    FrameSyncConfig,
+    DEFAULT_SHARED_DISPLAY_NAME,
+    DEFAULT_INFERENCE_SCHEDULE,
+    INFERENCE_MODES,
+    STEERING_HOLD_POLICIES,
+    InferenceScheduleConfig,
+    DEFAULT_CHANGE_GATE,
+    ChangeGateConfig,
 )
 from .carla_utils import (
     create_client,
+    load_world_if_needed,
     setup_synchronous_mode,
     spawn_vehicle_on_road,
     destroy_all_vehicles,
     destroy_all_sensors,
 )
+from .frame_sync import FrameSynchronizer, attach_camera
+from .shared_display import SharedFrameRing, start_viewer_process
+from .world_state import WorldStateCache, CachedVehicleMonitor
+from .tracing import enable_tracing, get_tracer, trace_span
+from .telemetry import TelemetryRecorder, read_telemetry, telemetry_summary
 from .lane_predictor import (
     LanePredictor,
+    ModelReloader,
+    SteeringScheduler,
+    ControlLoopStats,
     SpeedController,
     VehicleMonitor,
     OverlayRenderer,
+    roi_camera_config,
 )
 
 
@@ -43,81 +66,86 @@ def setup_camera(world: carla.World, vehicle: carla.Vehicle, camera_config) -> t
         camera_config: Camera configuration.
 
     Returns:
-        Tuple of (camera actor, camera_data dict, image_width, image_height).
+        Tuple of (camera actor, frame buffer tagged with simulation frame ids).
     """
-    camera_bp = world.get_blueprint_library().find("sensor.camera.rgb")
-    camera_bp.set_attribute("image_size_x", str(camera_config.image_size_x))
-    camera_bp.set_attribute("image_size_y", str(camera_config.image_size_y))
-
-    camera_init_trans = carla.Transform(
-        carla.Location(z=camera_config.pos_z, x=camera_config.pos_x)
-    )
-    camera = world.spawn_actor(camera_bp, camera_init_trans, attach_to=vehicle)
-
-    def camera_callback(image, data_dict):
-        data_dict["image"] = np.reshape(
-            np.copy(image.raw_data), (image.height, image.width, 4)
-        )
-
-    image_width = camera_bp.get_attribute("image_size_x").as_int()
-    image_height = camera_bp.get_attribute("image_size_y").as_int()
-
-    camera_data = {"image": np.zeros((image_height, image_width, 4))}
-    camera.listen(lambda image: camera_callback(image, camera_data))
-
-    return camera, camera_data
+    return attach_camera(world, vehicle, camera_config)
 
 
 def run_autonomous_loop(
     world: carla.World,
     vehicle: carla.Vehicle,
-    camera_data: dict,
+    synchronizer: FrameSynchronizer,
     predictor: LanePredictor,
     speed_controller: SpeedController,
     monitor: VehicleMonitor,
     renderer: OverlayRenderer,
+    frame_ring: Optional[SharedFrameRing] = None,
+    scheduler: Optional[SteeringScheduler] = None,
+    stats: Optional[ControlLoopStats] = None,
+    world_state: Optional[WorldStateCache] = None,
+    telemetry: Optional[TelemetryRecorder] = None,
 ) -> None:
     """Main autonomous driving loop.
 
     Args:
         world: CARLA world instance.
         vehicle: Vehicle to control.
-        camera_data: Dictionary containing camera image data.
+        synchronizer: Frame synchronizer matching camera frames to ticks.
         predictor: Lane predictor instance.
         speed_controller: Speed controller instance.
         monitor: Vehicle monitor instance.
         renderer: Overlay renderer instance.
+        frame_ring: If given, frames and overlay values are published here for
+            an out-of-process viewer instead of being drawn in this process.
+        scheduler: Decides on which ticks inference runs and what steering is
+            applied in between (default: infer on every tick).
+        stats: Collects control rate, speed and steering per tick.
+        world_state: Snapshot cache refreshed after every tick, for monitors
+            that read from it instead of making per-actor RPCs.
+        telemetry: Records speed, control and stage latencies of every tick.
     """
-    cv2.namedWindow("RGB Camera", cv2.WINDOW_AUTOSIZE)
+    scheduler = scheduler or SteeringScheduler(predictor)
 
     # Get initial image
-    image = camera_data["image"]
+    image, _ = synchronizer.frame_buffer.latest()
     predicted_angle = predictor.predict_angle(image)
-    initial_image = renderer.render_angle(image.copy(), predicted_angle)
-    cv2.imshow("RGB Camera", initial_image)
+
+    if frame_ring is None:
+        cv2.namedWindow("RGB Camera", cv2.WINDOW_AUTOSIZE)
+        initial_image = renderer.render_angle(image.copy(), predicted_angle)
+        cv2.imshow("RGB Camera", initial_image)
 
     running = True
     while running:
         # CARLA Tick
-        world.tick()
+        tick_start = time.perf_counter()
+        with trace_span("world.tick"):
+            tick_frame = world.tick()
+        tick_end = time.perf_counter()
+        if world_state is not None:
+            world_state.update_from_world(world)
 
         # Check for quit key
-        if cv2.waitKey(1) == ord("q"):
+        with trace_span("cv2.waitKey"):
+            quit_pressed = frame_ring is None and cv2.waitKey(1) == ord("q")
+        if quit_pressed:
             running = False
             break
 
-        # Get latest camera image
-        image = camera_data["image"]
+        # Get the camera image for this tick, recording how old it is
+        frame_wait_start = time.perf_counter()
+        with trace_span("frame wait"):
+            image, _ = synchronizer.get_frame(tick_frame)
 
-        # Predict steering angle
-        predicted_angle = predictor.predict_angle(image)
+        # Predict steering angle, or hold the last prediction between inferences
+        predict_start = time.perf_counter()
+        predicted_angle = scheduler.update(tick_frame, image)
+        predict_end = time.perf_counter()
 
         # Get current speed
         speed = monitor.get_speed_kph(vehicle)
-
-        # Render overlays
-        display_image = renderer.render_angle(image.copy(), predicted_angle)
-        display_image = renderer.render_speed(display_image, speed)
+        if stats is not None:
+            stats.record(speed, predicted_angle)
 
         # Calculate and apply control
         throttle = speed_controller.calculate_throttle(speed)
@@ -126,10 +154,34 @@ def run_autonomous_loop(
         )
 
         # Update display
-        cv2.imshow("RGB Camera", display_image)
+        render_start = time.perf_counter()
+        if frame_ring is not None:
+            frame_ring.publish(
+                image,
+                {"frame": tick_frame, "speed_kph": speed, "angle": predicted_angle},
+            )
+        else:
+            display_image = renderer.render_angle(image.copy(), predicted_angle)
+            display_image = renderer.render_speed(display_image, speed)
+            with trace_span("cv2.imshow"):
+                cv2.imshow("RGB Camera", display_image)
+
+        if telemetry is not None:
+            telemetry.record(
+                tick_frame,
+                speed,
+                predicted_angle,
+                throttle,
+                -predicted_angle,
+                1000.0 * (tick_end - tick_start),
+                1000.0 * (predict_start - frame_wait_start),
+                1000.0 * (predict_end - predict_start),
+                1000.0 * (time.perf_counter() - render_start),
+            )
 
     # Cleanup
-    cv2.destroyAllWindows()
+    if frame_ring is None:
+        cv2.destroyAllWindows()
 
 
 def main(args: argparse.Namespace) -> None:
@@ -138,14 +190,23 @@ def main(args: argparse.Namespace) -> None:
     Args:
         args: Command-line arguments.
     """
+    if args.trace:
+        enable_tracing()
+
     # Connect to CARLA and setup world
     client = create_client(args.host, args.port, CARLA_TIMEOUT_SECONDS)
 
-    if args.town:
-        client.load_world(args.town)
-
-    world = client.get_world()
+    # Only reload the map when a different town is requested
+    world = load_world_if_needed(client, args.town)
     original_settings = setup_synchronous_mode(world, client)
+    camera = None
+    synchronizer = None
+    frame_ring = None
+    predictor = None
+    reloader = None
+    scheduler = None
+    telemetry = None
+    stats = ControlLoopStats()
 
     try:
         # Spawn vehicle on preferred road
@@ -156,33 +217,107 @@ def main(args: argparse.Namespace) -> None:
             autopilot=False,
         )
 
-        # Setup camera
-        camera, camera_data = setup_camera(world, vehicle, DEFAULT_CAMERA_CONFIG)
-
         # Initialize prediction and control components
-        predictor = LanePredictor(args.model)
+        change_gate = None
+        if args.change_threshold is not None:
+            change_gate = ChangeGateConfig(threshold=args.change_threshold)
+        predictor = LanePredictor(args.model, change_gate=change_gate, roi_frames=args.roi_camera)
+
+        # Setup camera; an ROI camera renders only the region the model reads
+        camera_config = roi_camera_config(predictor.config) if args.roi_camera else DEFAULT_CAMERA_CONFIG
+        camera, frame_buffer = setup_camera(world, vehicle, camera_config)
+        synchronizer = FrameSynchronizer(
+            frame_buffer,
+            FrameSyncConfig(policy=args.frame_policy, timeout_seconds=args.frame_timeout),
+        )
+
+        # Swap in new checkpoints without restarting the session
+        reloader = ModelReloader(predictor, watch=args.watch_model).start()
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda signum, frame: reloader.request_reload())
         speed_controller = SpeedController()
-        monitor = VehicleMonitor()
+        world_state = WorldStateCache()
+        monitor = CachedVehicleMonitor(world_state)
         renderer = OverlayRenderer()
+        scheduler = SteeringScheduler(
+            predictor,
+            InferenceScheduleConfig(
+                mode=args.inference_mode,
+                interval_frames=args.inference_interval,
+                steering_policy=args.steering_policy,
+            ),
+        )
+
+        # Publish frames for an out-of-process viewer if requested
+        if args.viewer:
+            frame_ring = SharedFrameRing.create(
+                args.viewer_name,
+                (camera_config.image_size_y, camera_config.image_size_x, 4),
+            )
+            start_viewer_process(args.viewer_name)
+
+        if args.telemetry:
+            telemetry = TelemetryRecorder(args.telemetry)
 
         # Get initial prediction
-        image = camera_data["image"]
+        image, _ = frame_buffer.latest()
         predicted_angle = predictor.predict_angle(image)
 
         # Run autonomous driving loop
         run_autonomous_loop(
             world,
             vehicle,
-            camera_data,
+            synchronizer,
             predictor,
             speed_controller,
             monitor,
             renderer,
+            frame_ring,
+            scheduler,
+            stats,
+            world_state,
+            telemetry,
         )
 
     finally:
-        # Cleanup resources
-        cv2.destroyAllWindows()
+        # Report control rate against lane-keeping quality
+        if reloader:
+            reloader.stop()
+
+        if scheduler:
+            scheduler.shutdown()
+            summary = stats.summary()
+            summary["inference_ratio"] = scheduler.inference_ratio()
+            if predictor:
+                summary.update(predictor.latency_summary())
+            print(", ".join(f"{key}: {value:.3f}" for key, value in summary.items()))
+
+        # Export frame age statistics
+        if synchronizer and args.frame_age_out:
+            synchronizer.histogram.export(
+                args.frame_age_out,
+                DEFAULT_SIMULATION_SETTINGS.fixed_delta_seconds,
+                policy=synchronizer.config.policy,
+            )
+            print(f"Frame age histogram written to {args.frame_age_out}")
+
+        # Per-tick rows are appended to the file by the time the recorder closes
+        if telemetry:
+            telemetry.close()
+            summary = telemetry_summary(read_telemetry(args.telemetry))
+            print(f"Telemetry appended to {args.telemetry} ({telemetry.dropped} rows dropped); file totals:")
+            print(", ".join(f"{key}: {value:.3f}" for key, value in summary.items()))
+
+        # Timeline of tick, callback, inference and render spans
+        if args.trace:
+            get_tracer().export(args.trace)
+            print(f"Trace written to {args.trace}")
+
+        # Cleanup resources; with a viewer no cv2 window was ever opened
+        if frame_ring:
+            frame_ring.close()
+        else:
+            cv2.destroyAllWindows()
 
         if camera:
             camera.stop()
@@ -224,6 +359,92 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="CARLA town/map to load (default: current map)",
     )
+    argparser.add_argument(
+        "--frame-policy",
+        choices=FRAME_POLICIES,
+        default=DEFAULT_FRAME_SYNC_CONFIG.policy,
+        help="wait for the camera frame matching each tick, or reuse the "
+        f"latest one while it is fresh enough (default: {DEFAULT_FRAME_SYNC_CONFIG.policy})",
+    )
+    argparser.add_argument(
+        "--frame-timeout",
+        metavar="SECONDS",
+        default=DEFAULT_FRAME_SYNC_CONFIG.timeout_seconds,
+        type=float,
+        help=f"Maximum wait for a matching camera frame (default: {DEFAULT_FRAME_SYNC_CONFIG.timeout_seconds})",
+    )
+    argparser.add_argument(
+        "--frame-age-out",
+        metavar="PATH",
+        default=None,
+        help="Write the camera frame age histogram to this JSON file on exit",
+    )
+    argparser.add_argument(
+        "--inference-mode",
+        choices=INFERENCE_MODES,
+        default=DEFAULT_INFERENCE_SCHEDULE.mode,
+        help="run the model on every tick, on every --inference-interval ticks, or "
+        f"on a worker thread whenever it is free (default: {DEFAULT_INFERENCE_SCHEDULE.mode})",
+    )
+    argparser.add_argument(
+        "--inference-interval",
+        metavar="K",
+        default=DEFAULT_INFERENCE_SCHEDULE.interval_frames,
+        type=int,
+        help=f"Ticks between inferences in interval mode (default: {DEFAULT_INFERENCE_SCHEDULE.interval_frames})",
+    )
+    argparser.add_argument(
+        "--steering-policy",
+        choices=STEERING_HOLD_POLICIES,
+        default=DEFAULT_INFERENCE_SCHEDULE.steering_policy,
+        help="hold the last predicted steering between inferences, or extrapolate "
+        f"it linearly (default: {DEFAULT_INFERENCE_SCHEDULE.steering_policy})",
+    )
+    argparser.add_argument(
+        "--watch-model",
+        action="store_true",
+        help="Reload the model in the background when its files change; "
+        "SIGHUP triggers a reload either way",
+    )
+    argparser.add_argument(
+        "--roi-camera",
+        action="store_true",
+        help="Render only the region the model crops, at the model's input resolution, "
+        "so the server draws and sends far fewer pixels",
+    )
+    argparser.add_argument(
+        "--change-threshold",
+        metavar="T",
+        default=None,
+        type=float,
+        help="Reuse the previous angle while the downsampled edge map changes by less than T "
+        f"(mean absolute change in [0, 1], e.g. {DEFAULT_CHANGE_GATE.threshold}; default: always run the model)",
+    )
+    argparser.add_argument(
+        "--trace",
+        metavar="PATH",
+        default=None,
+        help="Record tick, callback, inference and render spans and write them "
+        "as Chrome trace-event JSON to PATH on exit",
+    )
+    argparser.add_argument(
+        "--telemetry",
+        metavar="PATH",
+        default=None,
+        help="Append speed, control and stage latencies of every tick to this "
+        "binary file (read with telemetry.read_telemetry)",
+    )
+    argparser.add_argument(
+        "--viewer",
+        action="store_true",
+        help="Show the camera in a separate viewer process fed through shared memory",
+    )
+    argparser.add_argument(
+        "--viewer-name",
+        metavar="NAME",
+        default=DEFAULT_SHARED_DISPLAY_NAME,
+        help=f"Shared memory name used with --viewer (default: {DEFAULT_SHARED_DISPLAY_NAME})",
+    )
 
     return argparser.parse_args()
 
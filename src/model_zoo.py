@@ -0,0 +1,161 @@
+"""Train and profile the lane model variants side by side.
+
+Every variant in lane_models.LANE_MODEL_VARIANTS is trained on the same
+labeled images and the same validation split, then profiled for parameter
+count, FLOPs and single-frame CPU latency, so the fastest model that is
+still accurate enough can be picked. The data is either a directory of
+labeled images or of dataset_factory shards:
+
+    python -m src.model_zoo --data archive/train_label --epochs 10
+    python -m src.model_zoo --data archive/generated --limit 20000
+    python -m src.model_zoo --variants baseline narrow --save-dir model/zoo
+"""
+import argparse
+import os
+import time
+import numpy as np
+from typing import Callable, Dict, Optional, Tuple
+
+from .config import ModelConfig, DEFAULT_TRAINING_DATA_DIR, VALIDATION_SPLIT, TRAINING_BATCH_SIZE
+from .dataset import list_labeled_images, list_shards, load_edge_maps, load_shard_edge_maps, to_training_arrays
+from .lane_predictor import ImagePreprocessor
+from .lane_models import LANE_MODEL_VARIANTS, LaneModelVariant, build_lane_model, count_flops, measure_latency
+
+
+def profile_variant(
+    variant: LaneModelVariant,
+    load: Callable[[ModelConfig], Tuple[np.ndarray, np.ndarray]],
+    epochs: int,
+    latency_runs: int,
+    save_dir: Optional[str] = None,
+) -> Dict[str, float]:
+    """Train one variant and measure its cost.
+
+    Args:
+        variant: Model variant to train.
+        load: Returns (edge maps, labels) for a model config, in the same
+            order for every variant so the validation split is the same.
+        epochs: Training epochs.
+        latency_runs: Single-frame inference calls to time.
+        save_dir: Where to save the trained model (default: not saved).
+
+    Returns:
+        Dictionary of profiling results.
+    """
+    config = variant.model_config()
+    input_shape = ImagePreprocessor(config).output_shape()
+
+    edges, labels = load(config)
+    x, y = to_training_arrays(edges, labels)
+
+    model = build_lane_model(variant, input_shape)
+    model.compile(loss="mean_squared_error", optimizer="adam")
+
+    start = time.perf_counter()
+    history = model.fit(
+        x,
+        y,
+        batch_size=TRAINING_BATCH_SIZE,
+        shuffle=False,
+        epochs=epochs,
+        validation_split=VALIDATION_SPLIT,
+        verbose=0,
+    )
+    train_seconds = time.perf_counter() - start
+
+    if save_dir is not None:
+        os.makedirs(save_dir, exist_ok=True)
+        model.save(os.path.join(save_dir, f"{variant.name}.keras"))
+
+    return {
+        "params": model.count_params(),
+        "mflops": count_flops(model) / 1e6,
+        "latency_ms": measure_latency(model, input_shape, runs=latency_runs),
+        "val_mse": float(history.history["val_loss"][-1]),
+        "train_s": train_seconds,
+    }
+
+
+def print_results(input_shapes: Dict[str, tuple], results: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'variant':<12} {'input':>10} {'params':>10} {'MFLOPs':>9} {'latency ms':>11} {'val MSE':>9} {'train s':>8}")
+    for name, result in sorted(results.items(), key=lambda item: item[1]["latency_ms"]):
+        height, width, _ = input_shapes[name]
+        print(
+            f"{name:<12} {f'{height}x{width}':>10} {result['params']:>10,} {result['mflops']:>9.1f} "
+            f"{result['latency_ms']:>11.2f} {result['val_mse']:>9.4f} {result['train_s']:>8.1f}"
+        )
+
+
+def main(args: argparse.Namespace) -> None:
+    """Entry point for the model zoo comparison.
+
+    Args:
+        args: Command-line arguments.
+    """
+    shards = list_shards(args.data)
+    if shards:
+
+        def load(config: ModelConfig) -> Tuple[np.ndarray, np.ndarray]:
+            edges, labels = load_shard_edge_maps(shards, config)
+            order = np.random.default_rng(args.seed).permutation(labels.shape[0])[: args.limit or None]
+            return edges[order], labels[order]
+
+        print(f"{len(shards)} shards from {args.data}")
+    else:
+        stems = list_labeled_images(args.data, seed=args.seed)
+        if args.limit:
+            stems = stems[: args.limit]
+
+        def load(config: ModelConfig) -> Tuple[np.ndarray, np.ndarray]:
+            return load_edge_maps(args.data, config, stems=stems)
+
+        print(f"{len(stems)} labeled images from {args.data}")
+
+    results = {}
+    input_shapes = {}
+    for name in args.variants:
+        variant = LANE_MODEL_VARIANTS[name]
+        input_shapes[name] = ImagePreprocessor(variant.model_config()).output_shape()
+        print(f"Training {name}...")
+        results[name] = profile_variant(variant, load, args.epochs, args.latency_runs, args.save_dir)
+
+    print_results(input_shapes, results)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    argparser = argparse.ArgumentParser(description="Train and profile lane model variants")
+    argparser.add_argument(
+        "--data",
+        metavar="DIR",
+        default=DEFAULT_TRAINING_DATA_DIR,
+        help=f"Directory of labeled images or .npz shards (default: {DEFAULT_TRAINING_DATA_DIR})",
+    )
+    argparser.add_argument(
+        "--variants",
+        nargs="+",
+        choices=list(LANE_MODEL_VARIANTS),
+        default=list(LANE_MODEL_VARIANTS),
+        help="Variants to compare (default: all)",
+    )
+    argparser.add_argument("--epochs", default=10, type=int, help="Training epochs per variant (default: 10)")
+    argparser.add_argument("--limit", default=0, type=int, help="Use at most this many images (default: all)")
+    argparser.add_argument("--seed", default=0, type=int, help="Shuffle seed for the image order (default: 0)")
+    argparser.add_argument(
+        "--latency-runs",
+        default=100,
+        type=int,
+        help="Single-frame inference calls timed per variant (default: 100)",
+    )
+    argparser.add_argument(
+        "--save-dir",
+        metavar="DIR",
+        default=None,
+        help="Save each trained variant as <DIR>/<name>.keras (default: not saved)",
+    )
+
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,131 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .config import (
+    RADAR_RANGE,
+    RADAR_CLOSING_SPEED_THRESHOLD_MPS,
+    RADAR_POINT_RADIUS_PIXELS,
+    RADAR_COLOR_CLOSING,
+    RADAR_COLOR_RECEDING,
+    RADAR_COLOR_STATIC,
+)
+
+
+# Layout of one detection in carla.RadarMeasurement.raw_data
+RADAR_DETECTION_DTYPE = np.dtype(
+    [
+        ("velocity", np.float32),
+        ("azimuth", np.float32),
+        ("altitude", np.float32),
+        ("depth", np.float32),
+    ]
+)
+
+
+@dataclass
+class RadarTarget:
+    x: float
+    y: float
+    z: float
+    depth: float
+    azimuth_degrees: float
+    altitude_degrees: float
+    velocity_mps: float
+    time_to_contact_seconds: float
+
+
+class RadarProcessor:
+    def __init__(
+        self,
+        display_size: List[int],
+        radar_range: float = RADAR_RANGE,
+        closing_speed_threshold: float = RADAR_CLOSING_SPEED_THRESHOLD_MPS,
+        point_radius: int = RADAR_POINT_RADIUS_PIXELS,
+    ) -> None:
+        self.width, self.height = int(display_size[0]), int(display_size[1])
+        self.radar_range = radar_range
+        self.closing_speed_threshold = closing_speed_threshold
+
+        # The sensor sits at the bottom centre of the cell looking up (forward)
+        self.pixels_per_meter = min(self.width / 2.0, float(self.height)) / radar_range
+        self.origin = (0.5 * self.width, self.height - 1.0)
+
+        # Reused between frames: the (width, height, 3) image in pygame
+        # surfarray order and the per-point splat offsets
+        self.image = np.zeros((self.width, self.height, 3), dtype=np.uint8)
+        self.palette = np.array(
+            [RADAR_COLOR_CLOSING, RADAR_COLOR_STATIC, RADAR_COLOR_RECEDING], dtype=np.uint8
+        )
+        offsets = np.arange(-point_radius, point_radius + 1)
+        grid_u, grid_v = np.meshgrid(offsets, offsets, indexing="ij")
+        self.splat_u = grid_u.ravel()
+        self.splat_v = grid_v.ravel()
+
+        self.points = np.zeros((0, 3), dtype=np.float32)
+        self.nearest_closing: Optional[RadarTarget] = None
+
+    @staticmethod
+    def decode(raw_data: bytes) -> np.ndarray:
+        return np.frombuffer(raw_data, dtype=RADAR_DETECTION_DTYPE)
+
+    @staticmethod
+    def to_cartesian(detections: np.ndarray) -> np.ndarray:
+        depth = detections["depth"]
+        azimuth = detections["azimuth"]
+        altitude = detections["altitude"]
+
+        horizontal = depth * np.cos(altitude)
+        points = np.empty((detections.shape[0], 3), dtype=np.float32)
+        points[:, 0] = horizontal * np.cos(azimuth)
+        points[:, 1] = horizontal * np.sin(azimuth)
+        points[:, 2] = depth * np.sin(altitude)
+        return points
+
+    def find_nearest_closing(self, detections: np.ndarray, points: np.ndarray) -> Optional[RadarTarget]:
+        # CARLA reports velocity towards the sensor as negative
+        closing = np.flatnonzero(detections["velocity"] < -self.closing_speed_threshold)
+        if closing.size == 0:
+            return None
+
+        index = closing[np.argmin(detections["depth"][closing])]
+        detection = detections[index]
+        velocity = float(detection["velocity"])
+        return RadarTarget(
+            x=float(points[index, 0]),
+            y=float(points[index, 1]),
+            z=float(points[index, 2]),
+            depth=float(detection["depth"]),
+            azimuth_degrees=float(np.degrees(detection["azimuth"])),
+            altitude_degrees=float(np.degrees(detection["altitude"])),
+            velocity_mps=velocity,
+            time_to_contact_seconds=float(detection["depth"]) / -velocity,
+        )
+
+    def render(self, detections: np.ndarray, points: np.ndarray) -> np.ndarray:
+        self.image.fill(0)
+        if points.shape[0] == 0:
+            return self.image
+
+        u = (self.origin[0] + points[:, 1] * self.pixels_per_meter).astype(np.int32)
+        v = (self.origin[1] - points[:, 0] * self.pixels_per_meter).astype(np.int32)
+        velocity = detections["velocity"]
+        color_index = np.where(
+            velocity < -self.closing_speed_threshold,
+            0,
+            np.where(velocity > self.closing_speed_threshold, 2, 1),
+        )
+
+        # Splat every point into a small square in one pass
+        u = (u[:, np.newaxis] + self.splat_u).ravel()
+        v = (v[:, np.newaxis] + self.splat_v).ravel()
+        color_index = np.repeat(color_index, self.splat_u.shape[0])
+        inside = (u >= 0) & (u < self.width) & (v >= 0) & (v < self.height)
+        self.image[u[inside], v[inside]] = self.palette[color_index[inside]]
+        return self.image
+
+    def process(self, raw_data: bytes) -> np.ndarray:
+        detections = self.decode(raw_data)
+        self.points = self.to_cartesian(detections)
+        self.nearest_closing = self.find_nearest_closing(detections, self.points)
+        return self.render(detections, self.points)
@@ -1,9 +1,14 @@
+import threading
 import time
+import traceback
+import cv2
 import numpy as np
 import pygame
 import carla
-from dataclasses import dataclass
-from typing import Optional, Dict, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Optional, Dict, List, Tuple
 
 from .config import (
     CAMERA_HEIGHT,
@@ -13,8 +18,22 @@ from .config import (
     LIDAR_ROTATION_FREQUENCY,
     SEMANTIC_LIDAR_POINTS_PER_SECOND,
     LIDAR_RANGE_MULTIPLIER,
+    RADAR_RANGE,
+    RADAR_HORIZONTAL_FOV,
+    RADAR_VERTICAL_FOV,
+    RADAR_POINTS_PER_SECOND,
     COLOR_WHITE,
+    SENSOR_TYPE_RGB_CAMERA,
+    SENSOR_TYPE_LIDAR,
+    SENSOR_TYPE_SEMANTIC_LIDAR,
+    SENSOR_TYPE_RADAR,
+    DISPLAY_PRIMARY_SENSOR_HZ,
+    DISPLAY_SECONDARY_SENSOR_HZ,
+    DEFAULT_SENSOR_WORKER_THREADS,
 )
+from .radar_processing import RadarProcessor, RadarTarget
+from .lidar_processing import SemanticBEVGrid
+from .tracing import trace_span, record_span
 
 
 @dataclass
@@ -23,6 +42,16 @@ class SensorConfig:
     transform: carla.Transform
     sensor_options: Dict[str, str]
     display_pos: List[int]
+    name: str = ""
+    # None streams at the simulation rate, otherwise applied as sensor_tick
+    target_hz: Optional[float] = None
+
+
+@dataclass
+class SensorConsumer:
+    name: str
+    # Sensor name -> rate in Hz this consumer needs
+    sensor_rates_hz: Dict[str, float] = field(default_factory=dict)
 
 
 class CustomTimer:
@@ -36,30 +65,132 @@ class CustomTimer:
         return self.timer()
 
 
+class SensorWorkerPool:
+    """Processes sensor measurements on a few worker threads.
+
+    Callbacks only copy their measurement out and submit it, so the stream
+    thread is free for the next one; the NumPy and OpenCV work in the jobs
+    releases the GIL for most of its time. Each sensor has at most one job
+    running and one waiting: a newer measurement replaces the waiting one,
+    which keeps memory bounded and the display on the latest data. Results
+    are collected with drain() on the thread that renders.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="sensor-worker")
+        self._lock = threading.Lock()
+        self._running = set()
+        self._waiting: Dict[Any, tuple] = {}
+        self._results: deque = deque()
+        self.superseded = 0
+
+    def submit(self, key: Any, process: Callable[[Any], Any], payload: Any, arrival: float) -> None:
+        job = (process, payload, arrival)
+        with self._lock:
+            if key in self._running:
+                if key in self._waiting:
+                    self.superseded += 1
+                self._waiting[key] = job
+                return
+            self._running.add(key)
+        self._executor.submit(self._run, key, job)
+
+    def _run(self, key: Any, job: tuple) -> None:
+        while job is not None:
+            process, payload, arrival = job
+            start = time.perf_counter()
+            try:
+                self._results.append((key, process(payload), arrival, time.perf_counter() - start))
+            except Exception:
+                traceback.print_exc()
+            with self._lock:
+                job = self._waiting.pop(key, None)
+                if job is None:
+                    self._running.discard(key)
+
+    def drain(self) -> List[tuple]:
+        # (key, result, arrival time, worker seconds) of every finished job
+        results = []
+        while self._results:
+            results.append(self._results.popleft())
+        return results
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
 class DisplayManager:
-    def __init__(self, grid_size: List[int], window_size: List[int]) -> None:
+    """Composites sensor surfaces into a grid of cells.
+
+    Only cells whose sensor delivered a new surface since the last render
+    are blitted, and only their rectangles are pushed to the window.
+    max_cell_fps optionally caps how often each cell is redrawn; a capped
+    cell keeps its newest surface until it is due. full_redraw restores
+    blitting every cell and flipping the whole window each render.
+    """
+
+    def __init__(
+        self,
+        grid_size: List[int],
+        window_size: List[int],
+        headless: bool = False,
+        max_cell_fps: Optional[float] = None,
+        full_redraw: bool = False,
+        worker_threads: int = DEFAULT_SENSOR_WORKER_THREADS,
+    ) -> None:
         pygame.init()
         pygame.font.init()
-        self.display = pygame.display.set_mode(
-            window_size, pygame.HWSURFACE | pygame.DOUBLEBUF
-        )
+        self.headless = headless
+        if headless:
+            # Composite into an offscreen surface, e.g. for a shared memory viewer
+            self.display = pygame.Surface(window_size)
+        else:
+            self.display = pygame.display.set_mode(
+                window_size, pygame.HWSURFACE | pygame.DOUBLEBUF
+            )
 
         self.grid_size = grid_size
         self.window_size = window_size
         self.sensor_list: List["SensorManager"] = []
+        self.full_redraw = full_redraw
+        self.worker_pool = SensorWorkerPool(worker_threads) if worker_threads > 0 else None
+
+        self._display_size = [
+            int(self.window_size[0] / self.grid_size[1]),
+            int(self.window_size[1] / self.grid_size[0]),
+        ]
+        # Grid position -> rect, and per-cell minimum seconds between redraws
+        self._cell_rects: Dict[Tuple[int, int], pygame.Rect] = {
+            (row, column): pygame.Rect(
+                column * self._display_size[0], row * self._display_size[1], *self._display_size
+            )
+            for row in range(self.grid_size[0])
+            for column in range(self.grid_size[1])
+        }
+        self._default_interval = 1.0 / max_cell_fps if max_cell_fps else 0.0
+        self._cell_intervals = {position: self._default_interval for position in self._cell_rects}
+        self._cell_last_render: Dict[Tuple[int, int], float] = {}
+
+        self.render_seconds = 0.0
+        self.render_count = 0
+        self.cells_rendered = 0
 
     def get_window_size(self) -> List[int]:
         return [int(self.window_size[0]), int(self.window_size[1])]
 
     def get_display_size(self) -> List[int]:
-        return [
-            int(self.window_size[0] / self.grid_size[1]),
-            int(self.window_size[1] / self.grid_size[0]),
-        ]
+        return list(self._display_size)
 
     def get_display_offset(self, grid_pos: List[int]) -> List[int]:
-        disp_size = self.get_display_size()
-        return [int(grid_pos[1] * disp_size[0]), int(grid_pos[0] * disp_size[1])]
+        # Positions outside the grid (e.g. the default layout on a smaller
+        # autotune grid) still get an offset; they just draw off-window
+        return [int(grid_pos[1] * self._display_size[0]), int(grid_pos[0] * self._display_size[1])]
+
+    def get_cell_rect(self, grid_pos: List[int]) -> Optional[pygame.Rect]:
+        return self._cell_rects.get(tuple(grid_pos))
+
+    def set_cell_max_fps(self, grid_pos: List[int], max_fps: Optional[float]) -> None:
+        self._cell_intervals[tuple(grid_pos)] = 1.0 / max_fps if max_fps else 0.0
 
     def add_sensor(self, sensor: "SensorManager") -> None:
         self.sensor_list.append(sensor)
@@ -68,22 +199,101 @@ class DisplayManager:
         return self.sensor_list
 
     def render(self) -> None:
+        # Collected even without a display so finished jobs do not pile up
+        if self.worker_pool is not None:
+            with trace_span("sensor results"):
+                for sensor, result, arrival, worker_seconds in self.worker_pool.drain():
+                    sensor.show_result(result, arrival, worker_seconds)
+
         if not self.render_enabled():
             return
 
+        start = time.perf_counter()
+        with trace_span("render"):
+            rects = []
+            for sensor in self.sensor_list:
+                position = tuple(sensor.display_pos)
+                if not self.full_redraw:
+                    if not sensor.dirty:
+                        continue
+                    last = self._cell_last_render.get(position)
+                    interval = self._cell_intervals.get(position, self._default_interval)
+                    if last is not None and start - last < interval:
+                        continue
+                # Cleared before blitting, so a frame arriving meanwhile is drawn next time
+                sensor.dirty = False
+                self._cell_last_render[position] = start
+                sensor.render()
+                sensor.record_render(start)
+                if position in self._cell_rects:
+                    rects.append(self._cell_rects[position])
+
+        if not self.headless:
+            if self.full_redraw:
+                with trace_span("display.flip"):
+                    pygame.display.flip()
+            elif rects:
+                with trace_span("display.update"):
+                    pygame.display.update(rects)
+
+        self.render_seconds += time.perf_counter() - start
+        self.render_count += 1
+        self.cells_rendered += len(rects)
+
+    def get_frame_view(self) -> np.ndarray:
+        # (height, width, 3) RGB view into the composited surface; the surface
+        # stays locked until the returned array is released.
+        return pygame.surfarray.pixels3d(self.display).swapaxes(0, 1)
+
+    def get_timing_report(self) -> List[str]:
+        lines = []
         for sensor in self.sensor_list:
-            sensor.render()
+            line = (
+                f"{sensor.sensor_type} {sensor.display_pos}: "
+                f"{sensor.get_average_processing_ms():.3f} ms/frame over {sensor.tics_processing} frames"
+            )
+            if sensor.worker_frames:
+                line += f", worker {1000.0 * sensor.worker_seconds / sensor.worker_frames:.3f} ms/frame"
+            if sensor.rendered_frames:
+                line += f", {1000.0 * sensor.latency_seconds / sensor.rendered_frames:.1f} ms callback to screen"
+            lines.append(line)
+        if self.worker_pool is not None:
+            lines.append(f"Sensor workers: {self.worker_pool.superseded} frames replaced by newer ones while waiting")
+        return lines
+
+    def get_render_report(self) -> str:
+        renders = max(self.render_count, 1)
+        mode = "full redraw" if self.full_redraw else "dirty cells"
+        return (
+            f"Render ({mode}): {1000.0 * self.render_seconds / renders:.3f} ms/tick, "
+            f"{self.cells_rendered / renders:.2f} cells/tick over {self.render_count} ticks"
+        )
 
-        pygame.display.flip()
+    def get_bandwidth_report(self, ticks: int) -> List[str]:
+        ticks = max(ticks, 1)
+        lines = [
+            f"{sensor.sensor_type} {sensor.display_pos}: {sensor.bytes_received / ticks / 1024:.1f} KiB/tick"
+            for sensor in self.sensor_list
+        ]
+        total = sum(sensor.bytes_received for sensor in self.sensor_list)
+        lines.append(f"Total: {total / ticks / 1024:.1f} KiB/tick over {ticks} ticks")
+        return lines
 
     def destroy(self) -> None:
         for sensor in self.sensor_list:
             sensor.destroy()
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown()
 
     def render_enabled(self) -> bool:
         return self.display is not None
 
 
+def _bgra_to_surface_array(bgra: np.ndarray) -> np.ndarray:
+    # pygame surface arrays are indexed (x, y)
+    return cv2.cvtColor(bgra, cv2.COLOR_BGRA2RGB).swapaxes(0, 1)
+
+
 class SensorManager:
     def __init__(
         self,
@@ -94,17 +304,34 @@ class SensorManager:
         attached: carla.Actor,
         sensor_options: Dict[str, str],
         display_pos: List[int],
+        zero_copy_rgb: bool = True,
     ) -> None:
         self.surface = None
+        # Set by the sensor callback for every new surface, cleared by rendering
+        self.dirty = False
+        self._surface_sources = (None, None)
         self.world = world
         self.display_man = display_man
         self.display_pos = display_pos
-        self.sensor = self._init_sensor(sensor_type, transform, attached, sensor_options)
+        self.sensor_type = sensor_type
         self.sensor_options = sensor_options
+        self.zero_copy_rgb = zero_copy_rgb
         self.timer = CustomTimer()
 
         self.time_processing = 0.0
         self.tics_processing = 0
+        self.bytes_received = 0
+        # Worker time, and time from a measurement's callback to its first
+        # blit, for the frames that reached the screen
+        self.worker_seconds = 0.0
+        self.worker_frames = 0
+        self.latency_seconds = 0.0
+        self.rendered_frames = 0
+        self._surface_arrival = None
+        self._array_surface = None
+        self._trace_name = f"{sensor_type} {display_pos} callback"
+
+        self.sensor = self._init_sensor(sensor_type, transform, attached, sensor_options)
 
         self.display_man.add_sensor(self)
 
@@ -133,16 +360,18 @@ class SensorManager:
         sensor_options: Dict[str, str],
     ) -> carla.Actor:
         camera_bp = self.world.get_blueprint_library().find("sensor.camera.rgb")
+        # Render at exactly the grid cell size so frames blit without scaling
         disp_size = self.display_man.get_display_size()
-        scalar = 1
-        disp_size = [256, 256] * scalar
         camera_bp.set_attribute("image_size_x", str(disp_size[0]))
         camera_bp.set_attribute("image_size_y", str(disp_size[1]))
         for key in sensor_options:
             camera_bp.set_attribute(key, sensor_options[key])
 
         camera = self.world.spawn_actor(camera_bp, transform, attach_to=attached)
-        camera.listen(self._save_rgb_image)
+        if self.zero_copy_rgb:
+            camera.listen(self._save_rgb_image)
+        else:
+            camera.listen(self._save_rgb_image_copied)
         return camera
 
     def _init_lidar(
@@ -187,6 +416,11 @@ class SensorManager:
         for key in sensor_options:
             lidar_bp.set_attribute(key, sensor_options[key])
 
+        disp_size = self.display_man.get_display_size()
+        lidar_range = LIDAR_RANGE_MULTIPLIER * lidar_bp.get_attribute("range").as_float()
+        self.semantic_grid = SemanticBEVGrid(disp_size, lidar_range / min(disp_size))
+        self._array_surface = pygame.Surface(disp_size)
+
         lidar = self.world.spawn_actor(lidar_bp, transform, attach_to=attached)
         lidar.listen(self._save_semanticlidar_image)
         return lidar
@@ -201,6 +435,12 @@ class SensorManager:
         for key in sensor_options:
             radar_bp.set_attribute(key, sensor_options[key])
 
+        disp_size = self.display_man.get_display_size()
+        self.radar_processor = RadarProcessor(
+            disp_size, radar_bp.get_attribute("range").as_float()
+        )
+        self._array_surface = pygame.Surface(disp_size)
+
         radar = self.world.spawn_actor(radar_bp, transform, attach_to=attached)
         radar.listen(self._save_radar_image)
         return radar
@@ -211,22 +451,33 @@ class SensorManager:
     def _save_rgb_image(self, image: carla.Image) -> None:
         self.t_start = self.timer.time()
 
+        # CARLA delivers BGRA, which pygame can wrap directly. The surface
+        # shares the measurement buffer, so the image (and the previous one,
+        # which may still be blitting) must be kept alive alongside it.
+        if self.display_man.render_enabled():
+            self._surface_sources = (image, self._surface_sources[0])
+            self.surface = pygame.image.frombuffer(image.raw_data, (image.width, image.height), "BGRA")
+            self._surface_arrival = self.t_start
+            self.dirty = True
+
+        self._update_timing_stats(len(image.raw_data))
+
+    def _save_rgb_image_copied(self, image: carla.Image) -> None:
+        self.t_start = self.timer.time()
+
         image.convert(carla.ColorConverter.Raw)
         array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
         array = np.reshape(array, (image.height, image.width, 4))
-        array = array[:, :, :3]
-        array = array[:, :, ::-1]
-
         if self.display_man.render_enabled():
-            self.surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
+            self._process(_bgra_to_surface_array, array)
 
-        self._update_timing_stats()
+        self._update_timing_stats(len(image.raw_data))
 
-    def _process_lidar_data(self, points_per_channel: bytes, channels: int) -> None:
+    def _lidar_image(self, raw_data: Any, channels: int = 4) -> np.ndarray:
         disp_size = self.display_man.get_display_size()
         lidar_range = LIDAR_RANGE_MULTIPLIER * float(self.sensor_options["range"])
 
-        points = np.frombuffer(points_per_channel, dtype=np.dtype("f4"))
+        points = np.frombuffer(raw_data, dtype=np.dtype("f4"))
         points = np.reshape(points, (int(points.shape[0] / channels), channels))
         lidar_data = np.array(points[:, :2])
         lidar_data *= min(disp_size) / lidar_range
@@ -238,30 +489,84 @@ class SensorManager:
         lidar_img = np.zeros((lidar_img_size), dtype=np.uint8)
 
         lidar_img[tuple(lidar_data.T)] = COLOR_WHITE
+        return lidar_img
+
+    def _process(self, process: Callable[[Any], np.ndarray], raw: Any, reuses_output: bool = False) -> None:
+        # With a worker pool the callback only copies the measurement out,
+        # since CARLA may reuse its buffer once the callback returns.
+        # Processors that render into one persistent image (reuses_output)
+        # need their result copied too, as the next job overwrites it
+        # before the display picks it up.
+        pool = self.display_man.worker_pool
+        if pool is None:
+            self._show_array(process(raw), self.t_start)
+        elif reuses_output:
+            pool.submit(self, lambda payload: process(payload).copy(), np.array(raw, copy=True), self.t_start)
+        else:
+            pool.submit(self, process, np.array(raw, copy=True), self.t_start)
 
-        if self.display_man.render_enabled():
-            self.surface = pygame.surfarray.make_surface(lidar_img)
-
-    def _update_timing_stats(self) -> None:
+    def _show_array(self, array: np.ndarray, arrival: float) -> None:
+        if not self.display_man.render_enabled():
+            return
+        if self._array_surface is not None:
+            pygame.surfarray.blit_array(self._array_surface, array)
+            self.surface = self._array_surface
+        else:
+            self.surface = pygame.surfarray.make_surface(array)
+        self._surface_arrival = arrival
+        self.dirty = True
+
+    def show_result(self, array: np.ndarray, arrival: float, worker_seconds: float) -> None:
+        # Called on the rendering thread with a finished worker job
+        self.worker_seconds += worker_seconds
+        self.worker_frames += 1
+        self._show_array(array, arrival)
+
+    def record_render(self, now: float) -> None:
+        if self._surface_arrival is not None:
+            self.latency_seconds += now - self._surface_arrival
+            self.rendered_frames += 1
+            self._surface_arrival = None
+
+    def _update_timing_stats(self, bytes_received: int = 0) -> None:
         t_end = self.timer.time()
+        record_span(self._trace_name, self.t_start, t_end)
         self.time_processing += t_end - self.t_start
         self.tics_processing += 1
+        self.bytes_received += bytes_received
+
+    def get_average_processing_ms(self) -> float:
+        if self.tics_processing == 0:
+            return 0.0
+        return 1000.0 * self.time_processing / self.tics_processing
 
     def _save_lidar_image(self, image: carla.LidarMeasurement) -> None:
         self.t_start = self.timer.time()
-        self._process_lidar_data(image.raw_data, 4)
-        self._update_timing_stats()
+        self._process(self._lidar_image, np.frombuffer(image.raw_data, dtype=np.dtype("f4")))
+        self._update_timing_stats(len(image.raw_data))
 
-    def _save_semanticlidar_image(self, image: carla.LidarMeasurement) -> None:
+    def _save_semanticlidar_image(self, image: carla.SemanticLidarMeasurement) -> None:
         self.t_start = self.timer.time()
-        self._process_lidar_data(image.raw_data, 6)
-        self._update_timing_stats()
+        self._process(
+            self.semantic_grid.process,
+            np.frombuffer(image.raw_data, dtype=np.dtype("uint8")),
+            reuses_output=True,
+        )
+        self._update_timing_stats(len(image.raw_data))
 
     def _save_radar_image(self, radar_data: carla.RadarMeasurement) -> None:
         self.t_start = self.timer.time()
-        points = np.frombuffer(radar_data.raw_data, dtype=np.dtype("f4"))
-        points = np.reshape(points, (len(radar_data), 4))
-        self._update_timing_stats()
+        self._process(
+            self.radar_processor.process,
+            np.frombuffer(radar_data.raw_data, dtype=np.dtype("uint8")),
+            reuses_output=True,
+        )
+        self._update_timing_stats(len(radar_data.raw_data))
+
+    def get_nearest_closing_object(self) -> Optional[RadarTarget]:
+        if self.sensor_type != SENSOR_TYPE_RADAR:
+            return None
+        return self.radar_processor.nearest_closing
 
     def render(self) -> None:
         if self.surface is not None:
@@ -281,6 +586,7 @@ def get_default_sensor_configs() -> List[SensorConfig]:
                 carla.Location(x=0, z=CAMERA_HEIGHT), carla.Rotation(yaw=-90)
             ),
             sensor_options={},
+            name="left_camera",
             display_pos=[0, 0],
         ),
         SensorConfig(
@@ -289,6 +595,7 @@ def get_default_sensor_configs() -> List[SensorConfig]:
                 carla.Location(x=0, z=CAMERA_HEIGHT), carla.Rotation(yaw=0)
             ),
             sensor_options={},
+            name="front_camera",
             display_pos=[0, 1],
         ),
         SensorConfig(
@@ -297,6 +604,7 @@ def get_default_sensor_configs() -> List[SensorConfig]:
                 carla.Location(x=0, z=CAMERA_HEIGHT), carla.Rotation(yaw=90)
             ),
             sensor_options={},
+            name="right_camera",
             display_pos=[0, 2],
         ),
         SensorConfig(
@@ -305,6 +613,7 @@ def get_default_sensor_configs() -> List[SensorConfig]:
                 carla.Location(x=0, z=CAMERA_HEIGHT), carla.Rotation(yaw=180)
             ),
             sensor_options={},
+            name="rear_camera",
             display_pos=[1, 1],
         ),
         SensorConfig(
@@ -317,6 +626,7 @@ def get_default_sensor_configs() -> List[SensorConfig]:
                 "rotation_frequency": str(LIDAR_ROTATION_FREQUENCY),
             },
             display_pos=[1, 0],
+            name="lidar",
         ),
         SensorConfig(
             sensor_type="SemanticLiDAR",
@@ -328,23 +638,118 @@ def get_default_sensor_configs() -> List[SensorConfig]:
                 "rotation_frequency": str(LIDAR_ROTATION_FREQUENCY),
             },
             display_pos=[1, 2],
+            name="semantic_lidar",
         ),
     ]
 
 
+def get_radar_sensor_config(display_pos: List[int]) -> SensorConfig:
+    return SensorConfig(
+        sensor_type="Radar",
+        transform=carla.Transform(carla.Location(x=2.0, z=1.0)),
+        sensor_options={
+            "horizontal_fov": str(RADAR_HORIZONTAL_FOV),
+            "vertical_fov": str(RADAR_VERTICAL_FOV),
+            "range": str(RADAR_RANGE),
+            "points_per_second": str(RADAR_POINTS_PER_SECOND),
+        },
+        display_pos=display_pos,
+        name="front_radar",
+    )
+
+
 def spawn_sensors_from_configs(
     world: carla.World,
     display_manager: DisplayManager,
     vehicle: carla.Vehicle,
     configs: List[SensorConfig],
+    zero_copy_rgb: bool = True,
 ) -> None:
     for config in configs:
+        sensor_options = dict(config.sensor_options)
+        if config.target_hz:
+            sensor_options["sensor_tick"] = str(1.0 / config.target_hz)
+
         SensorManager(
             world,
             display_manager,
             config.sensor_type,
             config.transform,
             vehicle,
-            config.sensor_options,
+            sensor_options,
             display_pos=config.display_pos,
+            zero_copy_rgb=zero_copy_rgb,
         )
+
+
+def get_default_sensor_consumers() -> List[SensorConsumer]:
+    # The grid display follows the front view closely and only glances at
+    # the other cells
+    return [
+        SensorConsumer(
+            name="display",
+            sensor_rates_hz={
+                "front_camera": DISPLAY_PRIMARY_SENSOR_HZ,
+                "left_camera": DISPLAY_SECONDARY_SENSOR_HZ,
+                "right_camera": DISPLAY_SECONDARY_SENSOR_HZ,
+                "rear_camera": DISPLAY_SECONDARY_SENSOR_HZ,
+                "lidar": DISPLAY_SECONDARY_SENSOR_HZ,
+                "semantic_lidar": DISPLAY_SECONDARY_SENSOR_HZ,
+                "front_radar": DISPLAY_PRIMARY_SENSOR_HZ,
+            },
+        ),
+    ]
+
+
+def derive_sensor_rates(
+    configs: List[SensorConfig],
+    consumers: List[SensorConsumer],
+    fixed_delta_seconds: float,
+) -> List[SensorConfig]:
+    """Set each sensor's target rate to the fastest rate any consumer needs.
+
+    Sensors no consumer asks for are left out, and rates at or above the
+    simulation rate stream every tick.
+    """
+    simulation_hz = 1.0 / fixed_delta_seconds
+    derived = []
+    for config in configs:
+        rates = [
+            consumer.sensor_rates_hz[config.name]
+            for consumer in consumers
+            if config.name in consumer.sensor_rates_hz
+        ]
+        if not rates:
+            continue
+        target_hz = max(rates)
+        derived.append(replace(config, target_hz=None if target_hz >= simulation_hz else target_hz))
+    return derived
+
+
+def estimate_bytes_per_measurement(config: SensorConfig, display_size: List[int], fixed_delta_seconds: float) -> float:
+    options = config.sensor_options
+    if config.sensor_type == SENSOR_TYPE_RGB_CAMERA:
+        width = int(options.get("image_size_x", display_size[0]))
+        height = int(options.get("image_size_y", display_size[1]))
+        return 4.0 * width * height
+    if config.sensor_type == SENSOR_TYPE_LIDAR:
+        return 16.0 * float(options.get("points_per_second", LIDAR_POINTS_PER_SECOND)) * fixed_delta_seconds
+    if config.sensor_type == SENSOR_TYPE_SEMANTIC_LIDAR:
+        return 24.0 * float(options.get("points_per_second", SEMANTIC_LIDAR_POINTS_PER_SECOND)) * fixed_delta_seconds
+    if config.sensor_type == SENSOR_TYPE_RADAR:
+        return 16.0 * float(options.get("points_per_second", RADAR_POINTS_PER_SECOND)) * fixed_delta_seconds
+    return 0.0
+
+
+def estimate_bytes_per_tick(
+    configs: List[SensorConfig], display_size: List[int], fixed_delta_seconds: float
+) -> Dict[str, float]:
+    # Each sensor sends one measurement every max(1, 1 / (target_hz * delta)) ticks
+    estimates = {}
+    for config in configs:
+        measurements_per_tick = 1.0
+        if config.target_hz:
+            measurements_per_tick = min(1.0, config.target_hz * fixed_delta_seconds)
+        size = estimate_bytes_per_measurement(config, display_size, fixed_delta_seconds)
+        estimates[config.name or config.sensor_type] = size * measurements_per_tick
+    return estimates
@@ -0,0 +1,250 @@
+"""Out-of-process visualization through a shared memory frame ring.
+
+The control process publishes frames and overlay values into a
+multiprocessing.shared_memory ring and never waits on a reader. A viewer
+process (started with --viewer by the entry scripts, or manually with this
+script) attaches to the ring by name, shows the newest complete frame and
+can come and go without affecting the simulation loop.
+"""
+import argparse
+import multiprocessing
+import time
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+from .config import (
+    DEFAULT_SHARED_DISPLAY_NAME,
+    SHARED_DISPLAY_SLOTS,
+    SHARED_DISPLAY_POLL_SECONDS,
+    SHARED_DISPLAY_ATTACH_TIMEOUT_SECONDS,
+)
+
+
+_MAGIC = 0x43524C41
+_HEADER_FIELDS = ("magic", "slots", "height", "width", "channels", "color_order", "write_seq")
+_HEADER_SIZE = len(_HEADER_FIELDS) * 8
+
+COLOR_ORDER_BGR = 0
+COLOR_ORDER_RGB = 1
+
+OVERLAY_FIELDS = ("frame", "speed_kph", "angle", "has_overlay")
+_OVERLAY_SIZE = len(OVERLAY_FIELDS) * 8
+# Each slot starts with its sequence number, followed by the overlay values
+# and the frame pixels.
+_SLOT_META_SIZE = 8 + _OVERLAY_SIZE
+
+
+class SharedDisplayError(Exception):
+    pass
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    # A reader with its own resource tracker must not let it unlink the
+    # publisher's segment when it exits. Readers spawned by the publisher
+    # share its tracker, where this would drop the publisher's registration.
+    try:
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+class SharedFrameRing:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((len(_HEADER_FIELDS),), dtype=np.int64, buffer=shm.buf)
+        if self.header[0] != _MAGIC:
+            raise SharedDisplayError(f"Shared memory '{shm.name}' is not a frame ring")
+
+        self.slots = int(self.header[1])
+        self.frame_shape = (int(self.header[2]), int(self.header[3]), int(self.header[4]))
+        self.color_order = int(self.header[5])
+        frame_size = int(np.prod(self.frame_shape))
+        slot_size = _SLOT_META_SIZE + frame_size
+
+        self._slot_seq = []
+        self._slot_overlay = []
+        self._slot_frame = []
+        for slot in range(self.slots):
+            offset = _HEADER_SIZE + slot * slot_size
+            self._slot_seq.append(np.ndarray((1,), dtype=np.int64, buffer=shm.buf, offset=offset))
+            self._slot_overlay.append(
+                np.ndarray((len(OVERLAY_FIELDS),), dtype=np.float64, buffer=shm.buf, offset=offset + 8)
+            )
+            self._slot_frame.append(
+                np.ndarray(self.frame_shape, dtype=np.uint8, buffer=shm.buf, offset=offset + _SLOT_META_SIZE)
+            )
+        self._last_read_seq = 0
+
+    @classmethod
+    def create(
+        cls,
+        name: str,
+        frame_shape: Tuple[int, int, int],
+        color_order: int = COLOR_ORDER_BGR,
+        slots: int = SHARED_DISPLAY_SLOTS,
+    ) -> "SharedFrameRing":
+        frame_size = int(np.prod(frame_shape))
+        size = _HEADER_SIZE + slots * (_SLOT_META_SIZE + frame_size)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left over from a publisher that did not shut down cleanly
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((len(_HEADER_FIELDS),), dtype=np.int64, buffer=shm.buf)
+        header[:] = (_MAGIC, slots, frame_shape[0], frame_shape[1], frame_shape[2], color_order, 0)
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, untrack: bool = False) -> "SharedFrameRing":
+        # untrack only for readers that are not children of the publisher
+        shm = shared_memory.SharedMemory(name=name)
+        if untrack:
+            _untrack(shm)
+        return cls(shm, owner=False)
+
+    def publish(self, frame: np.ndarray, overlay: Optional[Dict[str, float]] = None) -> None:
+        """Write a frame into the next slot without ever blocking.
+
+        The slot sequence number is cleared while the slot is being written
+        and set afterwards, so a reader can detect torn reads and retry.
+        """
+        seq = int(self.header[6]) + 1
+        slot = seq % self.slots
+
+        self._slot_seq[slot][0] = 0
+        np.copyto(self._slot_frame[slot], frame[:, :, : self.frame_shape[2]], casting="unsafe")
+        values = self._slot_overlay[slot]
+        values[:] = 0.0
+        if overlay:
+            for index, field in enumerate(OVERLAY_FIELDS):
+                values[index] = overlay.get(field, 0.0)
+            values[OVERLAY_FIELDS.index("has_overlay")] = 1.0
+        self._slot_seq[slot][0] = seq
+        self.header[6] = seq
+
+    def read_latest(self) -> Optional[Tuple[np.ndarray, Dict[str, float]]]:
+        seq = int(self.header[6])
+        if seq == 0 or seq == self._last_read_seq:
+            return None
+
+        slot = seq % self.slots
+        if self._slot_seq[slot][0] != seq:
+            return None
+        frame = self._slot_frame[slot].copy()
+        overlay = dict(zip(OVERLAY_FIELDS, self._slot_overlay[slot].tolist()))
+        if self._slot_seq[slot][0] != seq:
+            # Overwritten while copying
+            return None
+
+        self._last_read_seq = seq
+        return frame, overlay
+
+    def is_open(self) -> bool:
+        return int(self.header[0]) == _MAGIC
+
+    def close(self) -> None:
+        if self.owner:
+            self.header[0] = 0
+        del self.header
+        self._slot_seq = []
+        self._slot_overlay = []
+        self._slot_frame = []
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def run_viewer(
+    name: str = DEFAULT_SHARED_DISPLAY_NAME,
+    attach_timeout: float = SHARED_DISPLAY_ATTACH_TIMEOUT_SECONDS,
+    untrack: bool = False,
+) -> None:
+    """Show the newest frame of a shared frame ring until it closes.
+
+    Args:
+        name: Shared memory name of the ring.
+        attach_timeout: How long to wait for the publisher to create the ring.
+        untrack: Unregister the ring from this process's resource tracker;
+            only for viewers started independently of the publisher.
+    """
+    from .lane_predictor import OverlayRenderer
+
+    deadline = time.monotonic() + attach_timeout
+    ring = None
+    while ring is None:
+        try:
+            ring = SharedFrameRing.attach(name, untrack=untrack)
+        except FileNotFoundError:
+            if time.monotonic() > deadline:
+                raise SharedDisplayError(f"No frame ring named '{name}' appeared")
+            time.sleep(SHARED_DISPLAY_POLL_SECONDS)
+
+    renderer = OverlayRenderer()
+    window_name = f"CARLA viewer ({name})"
+    cv2.namedWindow(window_name, cv2.WINDOW_AUTOSIZE)
+
+    try:
+        while ring.is_open():
+            latest = ring.read_latest()
+            if latest is not None:
+                frame, overlay = latest
+                if ring.color_order == COLOR_ORDER_RGB:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+                if overlay["has_overlay"]:
+                    frame = renderer.render_angle(frame, overlay["angle"])
+                    frame = renderer.render_speed(frame, overlay["speed_kph"])
+                cv2.imshow(window_name, frame)
+
+            if cv2.waitKey(1) == ord("q"):
+                break
+            if latest is None:
+                time.sleep(SHARED_DISPLAY_POLL_SECONDS)
+    finally:
+        cv2.destroyWindow(window_name)
+        ring.close()
+
+
+def start_viewer_process(name: str = DEFAULT_SHARED_DISPLAY_NAME) -> multiprocessing.Process:
+    """Launch a viewer for the named ring in a separate, daemonic process."""
+    context = multiprocessing.get_context("spawn")
+    process = context.Process(target=run_viewer, args=(name,), daemon=True)
+    process.start()
+    return process
+
+
+def main() -> None:
+    """Entry point for the standalone viewer."""
+    argparser = argparse.ArgumentParser(description="Viewer for frames published over shared memory")
+    argparser.add_argument(
+        "--name",
+        metavar="NAME",
+        default=DEFAULT_SHARED_DISPLAY_NAME,
+        help=f"Shared memory name of the frame ring (default: {DEFAULT_SHARED_DISPLAY_NAME})",
+    )
+    argparser.add_argument(
+        "--attach-timeout",
+        metavar="SECONDS",
+        default=SHARED_DISPLAY_ATTACH_TIMEOUT_SECONDS,
+        type=float,
+        help=f"How long to wait for the publisher (default: {SHARED_DISPLAY_ATTACH_TIMEOUT_SECONDS})",
+    )
+    args = argparser.parse_args()
+
+    try:
+        run_viewer(args.name, args.attach_timeout, untrack=True)
+    except KeyboardInterrupt:
+        print("\nKeyboard Interrupt or Cancelled by user")
+
+
+if __name__ == "__main__":
+    main()
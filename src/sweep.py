@@ -0,0 +1,363 @@
+"""Lane-following robustness sweeps over weather, town and model.
+
+Every combination of the given weather presets, towns and model files is
+run as one headless episode: the ego vehicle is spawned at a seeded spawn
+point and driven by the lane model for a fixed number of ticks, and its
+offset from the lane centerline is measured with the lane index. Results
+are cached under a hash of the full episode configuration and the model
+file contents, so a rerun only drives the combinations that are new or
+whose model changed:
+
+    python -m src.sweep --towns Town05 Town03 --weathers clear-noon hard-rain-noon \\
+        --models model/lane_model model/zoo/strided.keras
+
+With CARLA_FAKE_SERVER=1 the episodes run on the fake server's ring road,
+which checks the sweep end to end in seconds; those results are cached
+separately from real ones.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+import numpy as np
+import carla
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from .config import (
+    DEFAULT_CARLA_HOST,
+    DEFAULT_CARLA_PORT,
+    CARLA_TIMEOUT_SECONDS,
+    DEFAULT_CAMERA_CONFIG,
+    DEFAULT_MODEL_CONFIG,
+    DEFAULT_SWEEP_CACHE_DIR,
+    SWEEP_EPISODE_TICKS,
+    SWEEP_WARMUP_TICKS,
+    SIMULATION_PROFILE_DEFAULT,
+    SIMULATION_PROFILES,
+    WEATHER_PRESETS,
+    CameraConfig,
+    ModelConfig,
+    SimulationSettings,
+)
+from .carla_utils import (
+    create_client,
+    is_fake_server,
+    load_world_if_needed,
+    setup_synchronous_mode,
+    to_weather_parameters,
+    spawn_vehicle,
+    destroy_actor,
+    restore_world_settings,
+)
+from .frame_sync import FrameSynchronizer, attach_camera
+from .lane_index import load_lane_index
+from .lane_predictor import LanePredictor, SpeedController, VehicleMonitor, resolve_model_path
+
+
+@dataclass
+class SweepEpisode:
+    town: str
+    weather: str
+    model_path: str
+    simulation: SimulationSettings
+    camera: CameraConfig
+    model: ModelConfig
+    ticks: int
+    seed: int
+
+
+def expand_sweep(
+    towns: List[str],
+    weathers: List[str],
+    model_paths: List[str],
+    simulation: SimulationSettings,
+    ticks: int = SWEEP_EPISODE_TICKS,
+    seed: int = 0,
+) -> List[SweepEpisode]:
+    # Town outermost so every map is loaded once
+    return [
+        SweepEpisode(town, weather, model_path, simulation, DEFAULT_CAMERA_CONFIG, DEFAULT_MODEL_CONFIG, ticks, seed)
+        for town, weather, model_path in itertools.product(towns, weathers, model_paths)
+    ]
+
+
+def model_digest(model_path: str) -> str:
+    """SHA-1 of a model file, or of every file of a SavedModel directory."""
+    path = resolve_model_path(model_path)
+    digest = hashlib.sha1()
+    if path.is_dir():
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    else:
+        files = [str(path)]
+    for file_path in files:
+        digest.update(os.path.relpath(file_path, path).encode())
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def episode_key(episode: SweepEpisode, digest: str) -> str:
+    # The model is identified by its content and the weather by its
+    # parameters, so a renamed model file still hits the cache and an edited
+    # preset runs again
+    config = asdict(episode)
+    del config["model_path"]
+    config["weather_parameters"] = asdict(WEATHER_PRESETS[episode.weather])
+    config["model_digest"] = digest
+    if is_fake_server():
+        config["fake_server"] = True
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+class SweepCache:
+    def __init__(self, cache_dir: str = DEFAULT_SWEEP_CACHE_DIR) -> None:
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, float]]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)["result"]
+
+    def put(self, key: str, episode: SweepEpisode, result: Dict[str, float]) -> None:
+        # Written under a temporary name so an interrupted sweep leaves no partial entry
+        temp_path = self._path(key) + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"episode": asdict(episode), "result": result}, f, indent=2)
+        os.replace(temp_path, self._path(key))
+
+
+def run_episode(client: carla.Client, episode: SweepEpisode, predictor: LanePredictor) -> Dict[str, float]:
+    """Drive one episode with the lane model and measure lane keeping.
+
+    Args:
+        client: CARLA client instance.
+        episode: Town, weather, model and settings of the episode.
+        predictor: Lane predictor loaded from episode.model_path.
+
+    Returns:
+        Dictionary of lane-keeping and throughput results.
+    """
+    world = load_world_if_needed(client, episode.town)
+    world_map = world.get_map()
+    lane_index = load_lane_index(world_map)
+    world.set_weather(to_weather_parameters(WEATHER_PRESETS[episode.weather]))
+    original_settings = setup_synchronous_mode(world, client, simulation=episode.simulation)
+    vehicle = None
+    camera = None
+
+    try:
+        spawn_point = random.Random(episode.seed).choice(world_map.get_spawn_points())
+        vehicle = spawn_vehicle(world, spawn_point=spawn_point)
+        camera, frame_buffer = attach_camera(world, vehicle, episode.camera)
+        synchronizer = FrameSynchronizer(frame_buffer)
+        speed_controller = SpeedController()
+        predictor.reset_change_gate()
+
+        # Let the vehicle settle on the road and the camera start streaming
+        for _ in range(SWEEP_WARMUP_TICKS):
+            world.tick()
+
+        locations = np.empty((episode.ticks, 3), dtype=np.float64)
+        yaws = np.empty(episode.ticks, dtype=np.float64)
+        speeds = np.empty(episode.ticks, dtype=np.float64)
+        predict_ms = np.empty(episode.ticks, dtype=np.float64)
+
+        start = time.perf_counter()
+        for i in range(episode.ticks):
+            tick_frame = world.tick()
+            image, _ = synchronizer.get_frame(tick_frame)
+
+            predict_start = time.perf_counter()
+            angle = predictor.predict_angle(image)
+            predict_ms[i] = 1000.0 * (time.perf_counter() - predict_start)
+
+            transform = vehicle.get_transform()
+            locations[i] = (transform.location.x, transform.location.y, transform.location.z)
+            yaws[i] = transform.rotation.yaw
+            speeds[i] = VehicleMonitor.get_speed_kph(vehicle)
+            vehicle.apply_control(
+                carla.VehicleControl(throttle=speed_controller.calculate_throttle(speeds[i]), steer=-angle)
+            )
+        elapsed = time.perf_counter() - start
+    finally:
+        if camera:
+            camera.stop()
+            destroy_actor(camera)
+        destroy_actor(vehicle)
+        restore_world_settings(world, original_settings)
+
+    # All positions matched against the centerlines in one batch
+    deviation = lane_index.query(locations, yaws)
+    found = deviation.sample_index >= 0
+    abs_offset = np.abs(deviation.lateral_offset[found])
+    half_widths = lane_index.lane_widths[deviation.sample_index[found]] / 2.0
+    off_lane = np.count_nonzero(~found) + np.count_nonzero(abs_offset > half_widths)
+    abs_heading_error = np.abs(deviation.heading_error_degrees[found])
+
+    return {
+        "ticks_per_second": episode.ticks / elapsed,
+        "mean_abs_offset_m": float(abs_offset.mean()) if abs_offset.size else float("nan"),
+        "p95_abs_offset_m": float(np.percentile(abs_offset, 95)) if abs_offset.size else float("nan"),
+        "off_lane_fraction": off_lane / episode.ticks,
+        "mean_abs_heading_error_deg": float(abs_heading_error.mean()) if found.any() else float("nan"),
+        "mean_speed_kph": float(speeds.mean()),
+        "distance_m": float(np.linalg.norm(np.diff(locations[:, :2], axis=0), axis=1).sum()),
+        "mean_predict_ms": float(predict_ms.mean()),
+    }
+
+
+def run_sweep(
+    client: carla.Client,
+    episodes: List[SweepEpisode],
+    cache: SweepCache,
+    force: bool = False,
+) -> List[Tuple[SweepEpisode, Dict[str, float], bool]]:
+    """Run every episode that has no cached result.
+
+    Returns:
+        (episode, result, whether it came from the cache) per episode.
+    """
+    digests = {path: model_digest(path) for path in {episode.model_path for episode in episodes}}
+    # Each model's preprocessing follows from its input shape, and is part
+    # of the cache key
+    predictors: Dict[str, LanePredictor] = {}
+    for episode in episodes:
+        if episode.model_path not in predictors:
+            predictors[episode.model_path] = LanePredictor(episode.model_path, episode.model)
+    rows = []
+
+    for index, episode in enumerate(episodes, start=1):
+        episode = replace(episode, model=predictors[episode.model_path].config)
+        key = episode_key(episode, digests[episode.model_path])
+        result = None if force else cache.get(key)
+        cached = result is not None
+        label = f"[{index}/{len(episodes)}] {episode.town}, {episode.weather}, {episode.model_path}"
+
+        if cached:
+            print(f"{label}: cached")
+        else:
+            result = run_episode(client, episode, predictors[episode.model_path])
+            cache.put(key, episode, result)
+            print(f"{label}: off lane {100.0 * result['off_lane_fraction']:.1f}% of ticks")
+        rows.append((episode, result, cached))
+
+    return rows
+
+
+def print_summary(rows: List[Tuple[SweepEpisode, Dict[str, float], bool]]) -> None:
+    print(
+        f"{'town':<10} {'weather':<15} {'model':<20} {'ticks/s':>8} {'|offset| m':>11} {'p95 m':>7} "
+        f"{'off lane':>9} {'heading':>8} {'km/h':>6} {'predict ms':>11} {'source':>7}"
+    )
+    for episode, result, cached in rows:
+        model_name = os.path.basename(os.path.normpath(episode.model_path))
+        print(
+            f"{episode.town:<10} {episode.weather:<15} {model_name:<20} {result['ticks_per_second']:>8.1f} "
+            f"{result['mean_abs_offset_m']:>11.2f} {result['p95_abs_offset_m']:>7.2f} "
+            f"{100.0 * result['off_lane_fraction']:>8.1f}% {result['mean_abs_heading_error_deg']:>8.1f} "
+            f"{result['mean_speed_kph']:>6.1f} {result['mean_predict_ms']:>11.2f} {'cache' if cached else 'run':>7}"
+        )
+
+    # Robustness per model across every town and weather
+    for model_path in dict.fromkeys(episode.model_path for episode, _, _ in rows):
+        fractions = [result["off_lane_fraction"] for episode, result, _ in rows if episode.model_path == model_path]
+        print(
+            f"{model_path}: off lane {100.0 * np.mean(fractions):.1f}% of ticks on average, "
+            f"worst {100.0 * np.max(fractions):.1f}% over {len(fractions)} episodes"
+        )
+
+
+def main(args: argparse.Namespace) -> None:
+    """Entry point for the sweep runner.
+
+    Args:
+        args: Command-line arguments.
+    """
+    episodes = expand_sweep(
+        args.towns,
+        args.weathers,
+        args.models,
+        SIMULATION_PROFILES[args.sim_profile],
+        args.ticks,
+        args.seed,
+    )
+    cache = SweepCache(args.cache_dir)
+    client = create_client(args.host, args.port, CARLA_TIMEOUT_SECONDS)
+    if is_fake_server():
+        print("Running against the fake CARLA server; results are cached separately")
+
+    rows = run_sweep(client, episodes, cache, force=args.force)
+    executed = sum(1 for _, _, cached in rows if not cached)
+    print(f"{executed} episodes run, {len(rows) - executed} from {args.cache_dir}")
+    print_summary(rows)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    argparser = argparse.ArgumentParser(description="Sweep lane following over weather, town and model")
+    argparser.add_argument(
+        "--host",
+        metavar="H",
+        default=DEFAULT_CARLA_HOST,
+        help=f"IP of the host server (default: {DEFAULT_CARLA_HOST})",
+    )
+    argparser.add_argument(
+        "-p",
+        "--port",
+        metavar="P",
+        default=DEFAULT_CARLA_PORT,
+        type=int,
+        help=f"TCP port to listen to (default: {DEFAULT_CARLA_PORT})",
+    )
+    argparser.add_argument("--towns", nargs="+", default=["Town05"], help="Towns to drive in (default: Town05)")
+    argparser.add_argument(
+        "--weathers",
+        nargs="+",
+        choices=list(WEATHER_PRESETS),
+        default=list(WEATHER_PRESETS),
+        help="Weather presets from config.WEATHER_PRESETS (default: all)",
+    )
+    argparser.add_argument(
+        "--models",
+        metavar="PATH",
+        nargs="+",
+        default=["./model/lane_model"],
+        help="Trained models to compare (default: ./model/lane_model)",
+    )
+    argparser.add_argument(
+        "--ticks",
+        default=SWEEP_EPISODE_TICKS,
+        type=int,
+        help=f"Ticks per episode (default: {SWEEP_EPISODE_TICKS})",
+    )
+    argparser.add_argument("--seed", default=0, type=int, help="Seed for the spawn point (default: 0)")
+    argparser.add_argument(
+        "--sim-profile",
+        choices=[name for name, profile in SIMULATION_PROFILES.items() if not profile.no_rendering_mode],
+        default=SIMULATION_PROFILE_DEFAULT,
+        help=f"Simulation settings profile; the camera needs rendering (default: {SIMULATION_PROFILE_DEFAULT})",
+    )
+    argparser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        default=DEFAULT_SWEEP_CACHE_DIR,
+        help=f"Directory of cached episode results (default: {DEFAULT_SWEEP_CACHE_DIR})",
+    )
+    argparser.add_argument("--force", action="store_true", help="Rerun every episode and overwrite cached results")
+
+    return argparser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,167 @@
+import json
+import os
+import struct
+import threading
+import time
+import numpy as np
+from typing import Dict
+
+from .config import DEFAULT_TELEMETRY_CAPACITY, TELEMETRY_FLUSH_SECONDS
+
+
+# One control loop tick; time is time.perf_counter() seconds, latencies in ms
+TELEMETRY_DTYPE = np.dtype(
+    [
+        ("frame", np.int64),
+        ("time", np.float64),
+        ("speed_kph", np.float32),
+        ("predicted_angle", np.float32),
+        ("throttle", np.float32),
+        ("steer", np.float32),
+        ("tick_ms", np.float32),
+        ("frame_wait_ms", np.float32),
+        ("predict_ms", np.float32),
+        ("render_ms", np.float32),
+    ]
+)
+
+TELEMETRY_MAGIC = b"CTLM"
+# Magic, then the JSON dtype description prefixed with its length
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+class TelemetryRecorder:
+    """Records one row per tick into a preallocated structured ring buffer.
+
+    record() writes each value straight into its column, so recording a
+    tick allocates nothing. A background thread appends the rows recorded
+    since its last pass to a binary file every flush interval. If the loop
+    laps the flush, the overwritten rows are counted as dropped.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = DEFAULT_TELEMETRY_CAPACITY,
+        flush_seconds: float = TELEMETRY_FLUSH_SECONDS,
+    ) -> None:
+        self.path = path
+        self.capacity = capacity
+        self.flush_seconds = flush_seconds
+        self.rows = np.zeros(capacity, dtype=TELEMETRY_DTYPE)
+        self.recorded = 0
+        self.flushed = 0
+        self.dropped = 0
+
+        self._columns = tuple(self.rows[name] for name in TELEMETRY_DTYPE.names)
+        self._file = open_telemetry_file(path)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry-flush", daemon=True)
+        self._thread.start()
+
+    def record(
+        self,
+        frame: int,
+        speed_kph: float,
+        predicted_angle: float,
+        throttle: float,
+        steer: float,
+        tick_ms: float = 0.0,
+        frame_wait_ms: float = 0.0,
+        predict_ms: float = 0.0,
+        render_ms: float = 0.0,
+    ) -> None:
+        slot = self.recorded % self.capacity
+        (
+            frame_col,
+            time_col,
+            speed_col,
+            angle_col,
+            throttle_col,
+            steer_col,
+            tick_col,
+            wait_col,
+            predict_col,
+            render_col,
+        ) = self._columns
+        frame_col[slot] = frame
+        time_col[slot] = time.perf_counter()
+        speed_col[slot] = speed_kph
+        angle_col[slot] = predicted_angle
+        throttle_col[slot] = throttle
+        steer_col[slot] = steer
+        tick_col[slot] = tick_ms
+        wait_col[slot] = frame_wait_ms
+        predict_col[slot] = predict_ms
+        render_col[slot] = render_ms
+        # Publish the row only once it is complete
+        self.recorded += 1
+
+    def flush(self) -> None:
+        end = self.recorded
+        start = max(self.flushed, end - self.capacity)
+        if end == start:
+            return
+        first, last = start % self.capacity, end % self.capacity
+        if first < last:
+            chunk = self.rows[first:last].copy()
+        else:
+            chunk = np.concatenate([self.rows[first:], self.rows[:last]])
+
+        # Rows the loop overwrote while they were being copied, plus the one
+        # record() may be writing right now (slot recorded % capacity) once
+        # the writer has lapped into the copied window
+        overwritten = max(0, self.recorded + 1 - self.capacity - start)
+        self.dropped += start - self.flushed + min(overwritten, chunk.shape[0])
+        self._file.write(chunk[overwritten:].tobytes())
+        self._file.flush()
+        self.flushed = end
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+
+
+def open_telemetry_file(path: str):
+    # Appending to an existing file keeps earlier sessions; a new file gets a header
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    f = open(path, "ab")
+    if f.tell() == 0:
+        header = json.dumps(TELEMETRY_DTYPE.descr).encode()
+        f.write(TELEMETRY_MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+        f.flush()
+    return f
+
+
+def read_telemetry(path: str) -> np.ndarray:
+    """Read every complete row of a telemetry file.
+
+    A row cut short by a crash at the end of the file is ignored.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(TELEMETRY_MAGIC)) != TELEMETRY_MAGIC:
+            raise ValueError(f"{path} is not a telemetry file")
+        (header_length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+        dtype = np.dtype([tuple(field) for field in json.loads(f.read(header_length))])
+        rows = (os.fstat(f.fileno()).st_size - f.tell()) // dtype.itemsize
+        return np.fromfile(f, dtype=dtype, count=rows)
+
+
+def telemetry_summary(rows: np.ndarray) -> Dict[str, float]:
+    if rows.shape[0] == 0:
+        return {"ticks": 0}
+    summary = {"ticks": rows.shape[0]}
+    if rows.shape[0] > 1:
+        summary["tick_rate_hz"] = (rows.shape[0] - 1) / float(rows["time"][-1] - rows["time"][0])
+    for name in ("tick_ms", "frame_wait_ms", "predict_ms", "render_ms"):
+        summary[f"{name}_mean"] = float(rows[name].mean())
+        summary[f"{name}_p99"] = float(np.percentile(rows[name], 99))
+    summary["speed_kph_mean"] = float(rows["speed_kph"].mean())
+    summary["abs_angle_mean"] = float(np.abs(rows["predicted_angle"]).mean())
+    return summary
@@ -0,0 +1,132 @@
+import itertools
+import json
+import os
+import threading
+import time
+import numpy as np
+from contextlib import nullcontext
+from typing import Dict, Optional
+
+from .config import DEFAULT_TRACE_CAPACITY
+
+
+# One recorded span; times are time.perf_counter() seconds
+TRACE_SPAN_DTYPE = np.dtype(
+    [
+        ("name", np.int32),
+        ("thread", np.uint64),
+        ("start", np.float64),
+        ("end", np.float64),
+    ]
+)
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer: "SpanTracer", name: str) -> None:
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.tracer.record(self.name, self.start, time.perf_counter())
+
+
+class SpanTracer:
+    """Records named spans from any thread into a preallocated ring buffer.
+
+    Recording claims a slot from an atomic counter and writes one row, so
+    threads never block each other. Once the buffer is full the oldest spans
+    are overwritten.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_TRACE_CAPACITY) -> None:
+        self.capacity = capacity
+        self.spans = np.zeros(capacity, dtype=TRACE_SPAN_DTYPE)
+        self.origin = time.perf_counter()
+        self._slots = itertools.count()
+        self._names: Dict[str, int] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def _name_id(self, name: str) -> int:
+        name_id = self._names.get(name)
+        if name_id is None:
+            with self._lock:
+                name_id = self._names.setdefault(name, len(self._names))
+        return name_id
+
+    def record(self, name: str, start: float, end: float) -> None:
+        thread = threading.get_ident()
+        if thread not in self._thread_names:
+            self._thread_names[thread] = threading.current_thread().name
+        slot = next(self._slots) % self.capacity
+        self.spans[slot] = (self._name_id(name), thread, start, end)
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def recorded_spans(self) -> np.ndarray:
+        # Read without claiming a slot; slots that are claimed but not yet
+        # written still have end 0, and the rest are ordered by start time
+        spans = self.spans.copy()
+        spans = spans[spans["end"] != 0]
+        return spans[np.argsort(spans["start"], kind="stable")]
+
+    def to_chrome_trace(self) -> dict:
+        names = {name_id: name for name, name_id in self._names.items()}
+        pid = os.getpid()
+        spans = self.recorded_spans()
+        starts_us = (spans["start"] - self.origin) * 1e6
+        durations_us = (spans["end"] - spans["start"]) * 1e6
+
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": thread, "args": {"name": thread_name}}
+            for thread, thread_name in self._thread_names.items()
+        ]
+        events.extend(
+            {
+                "name": names[int(span["name"])],
+                "ph": "X",
+                "pid": pid,
+                "tid": int(span["thread"]),
+                "ts": round(float(start), 3),
+                "dur": round(float(duration), 3),
+            }
+            for span, start, duration in zip(spans, starts_us, durations_us)
+        )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+_tracer: Optional[SpanTracer] = None
+_NULL_SPAN = nullcontext()
+
+
+def enable_tracing(capacity: int = DEFAULT_TRACE_CAPACITY) -> SpanTracer:
+    global _tracer
+    _tracer = SpanTracer(capacity)
+    return _tracer
+
+
+def get_tracer() -> Optional[SpanTracer]:
+    return _tracer
+
+
+def trace_span(name: str):
+    # Shared no-op context manager while tracing is off
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name)
+
+
+def record_span(name: str, start: float, end: float) -> None:
+    if _tracer is not None:
+        _tracer.record(name, start, end)
@@ -0,0 +1,128 @@
+import numpy as np
+import carla
+from typing import Iterable, Optional
+
+from .config import MPS_TO_KPH_MULTIPLIER
+from .lane_predictor import VehicleMonitor
+
+
+# Column layout of one actor row
+_ID = 0
+_LOCATION = slice(1, 4)
+_ROTATION = slice(4, 7)
+_VELOCITY = slice(7, 10)
+_ACCELERATION = slice(10, 13)
+
+
+class WorldStateCache:
+    """Per-tick actor state taken from a world snapshot.
+
+    All actors of a snapshot are read in one pass without RPCs and stored as
+    NumPy arrays sorted by actor id, so lookups are a binary search and speeds
+    for every actor are computed at once.
+    """
+
+    def __init__(self) -> None:
+        self.frame = -1
+        self.timestamp = 0.0
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.locations = np.zeros((0, 3), dtype=np.float64)
+        self.rotations = np.zeros((0, 3), dtype=np.float64)
+        self.velocities = np.zeros((0, 3), dtype=np.float64)
+        self.accelerations = np.zeros((0, 3), dtype=np.float64)
+        self._speeds_mps: Optional[np.ndarray] = None
+        self._accelerations_mps2: Optional[np.ndarray] = None
+
+    def update(self, snapshot: carla.WorldSnapshot) -> None:
+        rows = []
+        for actor in snapshot:
+            transform = actor.get_transform()
+            velocity = actor.get_velocity()
+            acceleration = actor.get_acceleration()
+            rows.append(
+                (
+                    actor.id,
+                    transform.location.x,
+                    transform.location.y,
+                    transform.location.z,
+                    transform.rotation.pitch,
+                    transform.rotation.yaw,
+                    transform.rotation.roll,
+                    velocity.x,
+                    velocity.y,
+                    velocity.z,
+                    acceleration.x,
+                    acceleration.y,
+                    acceleration.z,
+                )
+            )
+
+        table = np.array(rows, dtype=np.float64).reshape(-1, 13)
+        table = table[np.argsort(table[:, _ID], kind="stable")]
+
+        self.frame = snapshot.frame
+        self.timestamp = snapshot.timestamp.elapsed_seconds
+        self.ids = table[:, _ID].astype(np.int64)
+        self.locations = table[:, _LOCATION]
+        self.rotations = table[:, _ROTATION]
+        self.velocities = table[:, _VELOCITY]
+        self.accelerations = table[:, _ACCELERATION]
+        self._speeds_mps = None
+        self._accelerations_mps2 = None
+
+    def update_from_world(self, world: carla.World) -> None:
+        self.update(world.get_snapshot())
+
+    def index_of(self, actor_ids: Iterable[int]) -> np.ndarray:
+        # Row of every id, or -1 where the actor is not in the snapshot
+        actor_ids = np.asarray(actor_ids, dtype=np.int64)
+        rows = np.searchsorted(self.ids, actor_ids)
+        rows = np.minimum(rows, max(self.ids.shape[0] - 1, 0))
+        found = self.ids.shape[0] > 0 and self.ids[rows] == actor_ids
+        return np.where(found, rows, -1)
+
+    def speeds_mps(self) -> np.ndarray:
+        if self._speeds_mps is None:
+            self._speeds_mps = np.linalg.norm(self.velocities, axis=1)
+        return self._speeds_mps
+
+    def speeds_kph(self) -> np.ndarray:
+        return MPS_TO_KPH_MULTIPLIER * self.speeds_mps()
+
+    def accelerations_mps2(self) -> np.ndarray:
+        if self._accelerations_mps2 is None:
+            self._accelerations_mps2 = np.linalg.norm(self.accelerations, axis=1)
+        return self._accelerations_mps2
+
+
+class CachedVehicleMonitor(VehicleMonitor):
+    """VehicleMonitor that answers from a WorldStateCache.
+
+    Falls back to the per-actor RPCs of VehicleMonitor for actors missing
+    from the last snapshot.
+    """
+
+    def __init__(self, cache: WorldStateCache) -> None:
+        self.cache = cache
+
+    def _row(self, vehicle: carla.Vehicle) -> int:
+        return int(self.cache.index_of([vehicle.id])[0])
+
+    def get_speed_kph(self, vehicle: carla.Vehicle) -> float:
+        row = self._row(vehicle)
+        if row < 0:
+            return VehicleMonitor.get_speed_kph(vehicle)
+        return round(float(self.cache.speeds_kph()[row]), 0)
+
+    def get_acceleration_mps2(self, vehicle: carla.Vehicle) -> float:
+        row = self._row(vehicle)
+        if row < 0:
+            return VehicleMonitor.get_acceleration_mps2(vehicle)
+        return round(float(self.cache.accelerations_mps2()[row]), 1)
+
+    def get_speeds_kph(self, vehicles: Iterable[carla.Vehicle]) -> np.ndarray:
+        rows = self.cache.index_of([vehicle.id for vehicle in vehicles])
+        if self.cache.ids.shape[0] == 0:
+            return np.full(rows.shape, np.nan)
+        speeds = np.where(rows >= 0, self.cache.speeds_kph()[np.maximum(rows, 0)], np.nan)
+        return np.round(speeds, 0)